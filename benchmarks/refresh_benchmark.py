@@ -0,0 +1,454 @@
+"""Banc de mesure des rafraîchissements Hypontech contre le simulateur local.
+
+Mesure la latence (p50/p95/p99) de `HypontechAPI.async_get_data`, de cycles
+complets de coordinateurs, du rafraîchissement des onduleurs d'une
+installation et de la lecture locale en Modbus TCP, le nombre de requêtes par
+rafraîchissement et les authentifications par heure, sans interroger
+api.hypon.cloud. Le scénario de décodage mesure le temps CPU du décodage JSON
+et de l'extraction des réponses d'un rafraîchissement.
+
+Exécution depuis la racine du dépôt (Home Assistant installé)::
+
+    python -m benchmarks.refresh_benchmark --iterations 200 --latency 0.3
+    python -m benchmarks.refresh_benchmark --plants 20 --token-ttl 5 --json out.json
+    python -m benchmarks.refresh_benchmark --devices 50
+    python -m benchmarks.refresh_benchmark --accounts 20 --interval 10
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import statistics
+import tempfile
+import time
+from datetime import timedelta
+from typing import Any
+
+import aiohttp
+from homeassistant.core import HomeAssistant
+
+from benchmarks.simulator import HypontechCloudSimulator, HypontechModbusSimulator
+from custom_components.hypontech_ha.account import HypontechAccount
+from custom_components.hypontech_ha.coordinator import HypontechDataUpdateCoordinator
+from custom_components.hypontech_ha.devices import HypontechDeviceCoordinator
+from custom_components.hypontech_ha.hypontech_api import (
+    HypontechAPI,
+    extract_overview_data,
+    extract_production_data,
+    json_loads,
+)
+from custom_components.hypontech_ha.local import HypontechLocalSource
+from custom_components.hypontech_ha.modbus import HypontechModbusClient
+from custom_components.hypontech_ha.session import HypontechSessionManager
+from custom_components.hypontech_ha.stagger import RefreshStagger
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    """Percentiles de latence en millisecondes."""
+    if len(samples) < 2:
+        value = samples[0] * 1000 if samples else 0.0
+        return {"p50": value, "p95": value, "p99": value}
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {
+        "p50": cuts[49] * 1000,
+        "p95": cuts[94] * 1000,
+        "p99": cuts[98] * 1000,
+    }
+
+
+def _report(
+    name: str,
+    latencies: list[float],
+    failures: int,
+    refreshes: int,
+    simulator: HypontechCloudSimulator | HypontechModbusSimulator,
+    elapsed: float,
+) -> dict[str, Any]:
+    """Construit le rapport d'un scénario."""
+    return {
+        "scenario": name,
+        "refreshes": refreshes,
+        "failures": failures,
+        "latency_ms": _percentiles(latencies),
+        "requests_per_refresh": simulator.stats["requests"] / max(refreshes, 1),
+        "logins": simulator.stats["logins"],
+        "logins_per_hour": simulator.stats["logins"] / elapsed * 3600,
+        "elapsed_s": elapsed,
+        "server": dict(simulator.stats),
+    }
+
+
+async def bench_api(
+    simulator: HypontechCloudSimulator, iterations: int, timeout: float
+) -> dict[str, Any]:
+    """Rafraîchissements successifs de `HypontechAPI.async_get_data`."""
+    api = HypontechAPI("bench", "bench", "1", base_url=simulator.base_url, timeout=timeout)
+    simulator.reset_stats()
+    latencies: list[float] = []
+    failures = 0
+    start = time.monotonic()
+    for _ in range(iterations):
+        begin = time.monotonic()
+        try:
+            await api.async_get_data()
+        except Exception:  # pylint: disable=broad-except
+            failures += 1
+            continue
+        latencies.append(time.monotonic() - begin)
+    elapsed = time.monotonic() - start
+    await api.close()
+    return _report("api", latencies, failures, iterations, simulator, elapsed)
+
+
+async def bench_decode(
+    simulator: HypontechCloudSimulator, iterations: int
+) -> dict[str, Any]:
+    """Temps CPU du décodage et de l'extraction des réponses d'un rafraîchissement.
+
+    Compare le décodeur du client (orjson s'il est installé) au module `json`
+    de la bibliothèque standard, sur les corps bruts servis par le simulateur.
+    """
+    async with aiohttp.ClientSession() as session:
+        async with session.post(
+            f"{simulator.base_url}/login", json={"username": "bench", "password": "bench"}
+        ) as response:
+            token = (await response.json())["data"]["token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        async with session.get(
+            f"{simulator.base_url}/plant/overview", headers=headers
+        ) as response:
+            overview_body = await response.read()
+        async with session.get(
+            f"{simulator.base_url}/plant/0/production2", headers=headers
+        ) as response:
+            production_body = await response.read()
+
+    def _cpu_per_refresh(loads: Any) -> float:
+        begin = time.process_time()
+        for _ in range(iterations):
+            data = extract_overview_data(loads(overview_body)["data"])
+            data.update(extract_production_data(loads(production_body)["data"]))
+        return (time.process_time() - begin) / iterations * 1e6
+
+    results = {
+        "json": _cpu_per_refresh(json.loads),
+        "client": _cpu_per_refresh(json_loads),
+    }
+    return {
+        "scenario": "decode",
+        "decoder": json_loads.__module__,
+        "iterations": iterations,
+        "body_bytes": len(overview_body) + len(production_body),
+        "cpu_us_per_refresh": results,
+    }
+
+
+async def bench_coordinator(
+    hass: HomeAssistant,
+    simulator: HypontechCloudSimulator,
+    iterations: int,
+    plants: int,
+    timeout: float,
+) -> dict[str, Any]:
+    """Cycles complets de coordinateurs partageant un client de compte."""
+    api = HypontechAPI("bench", "bench", "0", base_url=simulator.base_url, timeout=timeout)
+    account = HypontechAccount(api, max_concurrency=4, slow_interval=900)
+    coordinators = [
+        HypontechDataUpdateCoordinator(hass, account, str(plant), timedelta(seconds=60))
+        for plant in range(plants)
+    ]
+    simulator.reset_stats()
+    latencies: list[float] = []
+    failures = 0
+    start = time.monotonic()
+    for _ in range(iterations):
+        begin = time.monotonic()
+        await coordinators[0].async_refresh()
+        if not coordinators[0].last_update_success:
+            failures += 1
+            continue
+        latencies.append(time.monotonic() - begin)
+    elapsed = time.monotonic() - start
+    await api.close()
+    return _report(
+        f"coordinator ({plants} installations)",
+        latencies,
+        failures,
+        iterations,
+        simulator,
+        elapsed,
+    )
+
+
+async def bench_devices(
+    hass: HomeAssistant,
+    simulator: HypontechCloudSimulator,
+    iterations: int,
+    timeout: float,
+) -> dict[str, Any]:
+    """Rafraîchissements des onduleurs d'une installation par lots concurrents."""
+    api = HypontechAPI("bench", "bench", "0", base_url=simulator.base_url, timeout=timeout)
+    account = HypontechAccount(api, max_concurrency=4, slow_interval=900)
+    coordinator = HypontechDeviceCoordinator(hass, account, "0", timedelta(seconds=300))
+    # Découverte initiale hors mesure
+    await coordinator.async_refresh()
+    simulator.reset_stats()
+    latencies: list[float] = []
+    failures = 0
+    start = time.monotonic()
+    for _ in range(iterations):
+        begin = time.monotonic()
+        await coordinator.async_refresh()
+        if not coordinator.last_update_success or len(coordinator.data) != len(
+            coordinator.devices
+        ):
+            failures += 1
+            continue
+        latencies.append(time.monotonic() - begin)
+    elapsed = time.monotonic() - start
+    await api.close()
+    report = _report(
+        f"devices ({simulator.devices} onduleurs)",
+        latencies,
+        failures,
+        iterations,
+        simulator,
+        elapsed,
+    )
+    # Allers-retours équivalents: latence médiane rapportée à celle du serveur
+    report["round_trips"] = report["latency_ms"]["p50"] / max(simulator.latency * 1000, 1)
+    return report
+
+
+async def bench_local(
+    hass: HomeAssistant, iterations: int, timeout: float
+) -> dict[str, Any]:
+    """Cycles d'un coordinateur lisant l'onduleur en Modbus TCP."""
+    simulator = HypontechModbusSimulator()
+    port = await simulator.start()
+    source = HypontechLocalSource(HypontechModbusClient("127.0.0.1", port, 1, timeout))
+    coordinator = HypontechDataUpdateCoordinator(
+        hass, source, f"127.0.0.1:{port}:1", timedelta(seconds=5)
+    )
+    latencies: list[float] = []
+    failures = 0
+    start = time.monotonic()
+    for _ in range(iterations):
+        begin = time.monotonic()
+        await coordinator.async_refresh()
+        if not coordinator.last_update_success:
+            failures += 1
+            continue
+        latencies.append(time.monotonic() - begin)
+    elapsed = time.monotonic() - start
+    await source.async_close()
+    await simulator.stop()
+    return _report("local (Modbus TCP)", latencies, failures, iterations, simulator, elapsed)
+
+
+async def bench_restart(
+    hass: HomeAssistant,
+    simulator: HypontechCloudSimulator,
+    accounts: int,
+    interval: float,
+    cycles: int,
+    timeout: float,
+    staggered: bool,
+) -> dict[str, Any]:
+    """Redémarrage de plusieurs comptes puis `cycles` intervalles planifiés.
+
+    Mesure la latence des premiers rafraîchissements, le pic de requêtes
+    simultanées côté serveur et le maximum de requêtes reçues en une seconde,
+    avec ou sans répartition des cycles.
+    """
+    session_manager = HypontechSessionManager()
+    stagger = RefreshStagger(seed=0) if staggered else None
+    coordinators = []
+    for index in range(accounts):
+        api = HypontechAPI(
+            f"bench{index}",
+            "bench",
+            str(index),
+            session=session_manager.session,
+            base_url=simulator.base_url,
+            timeout=timeout,
+        )
+        account = HypontechAccount(api, max_concurrency=4, slow_interval=900)
+        coordinator = HypontechDataUpdateCoordinator(
+            hass, account, str(index), timedelta(seconds=interval)
+        )
+        if stagger is not None:
+            stagger.register(account)
+            coordinator.stagger = stagger
+        # Un abonné suffit à déclencher la planification des rafraîchissements
+        coordinator.async_add_listener(lambda: None)
+        coordinators.append(coordinator)
+
+    async def _first_refresh(coordinator: HypontechDataUpdateCoordinator) -> float:
+        begin = time.monotonic()
+        if stagger is None:
+            await coordinator.async_refresh()
+        else:
+            # Même chemin que l'installation d'une entrée sans données restaurées
+            async with stagger.async_startup_slot(coordinator.account):
+                await coordinator.async_refresh()
+        return time.monotonic() - begin
+
+    simulator.reset_stats()
+    start = time.monotonic()
+    latencies = list(
+        await asyncio.gather(*(_first_refresh(coordinator) for coordinator in coordinators))
+    )
+    await asyncio.sleep(interval * cycles)
+    elapsed = time.monotonic() - start
+    for coordinator in coordinators:
+        await coordinator.async_shutdown()
+        await coordinator.account.api.close()
+    await session_manager.async_close()
+
+    failures = sum(not coordinator.last_update_success for coordinator in coordinators)
+    report = _report(
+        f"restart ({accounts} comptes, {'réparti' if staggered else 'synchrone'})",
+        latencies,
+        failures,
+        accounts * (cycles + 1),
+        simulator,
+        elapsed,
+    )
+    report["peak_concurrency"] = simulator.stats["peak_concurrency"]
+    report["peak_client_in_flight"] = session_manager.stats["peak_in_flight"]
+    # Pic du démarrage (premier intervalle) et pic du régime établi
+    report["max_requests_per_second_startup"] = max(
+        (
+            count
+            for second, count in simulator.per_second.items()
+            if second < int(start + interval)
+        ),
+        default=0,
+    )
+    report["max_requests_per_second"] = max(
+        (
+            count
+            for second, count in simulator.per_second.items()
+            if second >= int(start + interval)
+        ),
+        default=0,
+    )
+    return report
+
+
+async def async_main(args: argparse.Namespace) -> list[dict[str, Any]]:
+    """Exécute les scénarios demandés."""
+    simulator = HypontechCloudSimulator(
+        latency=args.latency,
+        jitter=args.jitter,
+        token_ttl=args.token_ttl,
+        jwt_expiry=args.jwt,
+        error_rate=args.error_rate,
+        timeout_rate=args.timeout_rate,
+        timeout_delay=args.timeout * 2,
+        devices=args.devices,
+        seed=args.seed,
+    )
+    await simulator.start()
+    reports = [
+        await bench_decode(simulator, args.iterations * 200),
+        await bench_api(simulator, args.iterations, args.timeout),
+    ]
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        reports.append(
+            await bench_coordinator(
+                hass, simulator, args.iterations, args.plants, args.timeout
+            )
+        )
+        reports.append(
+            await bench_devices(hass, simulator, args.iterations, args.timeout)
+        )
+        reports.append(await bench_local(hass, args.iterations, args.timeout))
+        if args.accounts:
+            for staggered in (False, True):
+                reports.append(
+                    await bench_restart(
+                        hass,
+                        simulator,
+                        args.accounts,
+                        args.interval,
+                        args.cycles,
+                        args.timeout,
+                        staggered,
+                    )
+                )
+        await hass.async_stop(force=True)
+
+    await simulator.stop()
+    return reports
+
+
+def main() -> None:
+    """Point d'entrée en ligne de commande."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--plants", type=int, default=1)
+    parser.add_argument("--devices", type=int, default=50, help="onduleurs par installation")
+    parser.add_argument(
+        "--accounts", type=int, default=0, help="comptes du scénario de redémarrage"
+    )
+    parser.add_argument(
+        "--interval", type=float, default=10.0, help="intervalle du redémarrage (s)"
+    )
+    parser.add_argument("--cycles", type=int, default=3, help="intervalles mesurés")
+    parser.add_argument("--latency", type=float, default=0.3, help="secondes")
+    parser.add_argument("--jitter", type=float, default=0.1, help="secondes")
+    parser.add_argument("--token-ttl", type=float, default=None, help="secondes")
+    parser.add_argument("--jwt", action="store_true", help="expiration dans un claim JWT")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout-rate", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=2.0, help="timeout client")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", help="fichier de sortie JSON")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    reports = asyncio.run(async_main(args))
+
+    for report in reports:
+        if report["scenario"] == "decode":
+            cpu = report["cpu_us_per_refresh"]
+            print(
+                f"{report['scenario']:<32} "
+                f"json={cpu['json']:7.1f} µs  "
+                f"{report['decoder']}={cpu['client']:7.1f} µs par rafraîchissement"
+            )
+            continue
+        latency = report["latency_ms"]
+        print(
+            f"{report['scenario']:<32} "
+            f"p50={latency['p50']:7.1f} ms  p95={latency['p95']:7.1f} ms  "
+            f"p99={latency['p99']:7.1f} ms  "
+            f"req/refresh={report['requests_per_refresh']:5.2f}  "
+            f"logins/h={report['logins_per_hour']:8.1f}  "
+            f"échecs={report['failures']}"
+            + (
+                f"  allers-retours={report['round_trips']:.2f}"
+                if "round_trips" in report
+                else ""
+            )
+            + (
+                f"  pic simultané={report['peak_concurrency']}"
+                f"  max req/s démarrage={report['max_requests_per_second_startup']}"
+                f"  régime={report['max_requests_per_second']}"
+                if "peak_concurrency" in report
+                else ""
+            )
+        )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(reports, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
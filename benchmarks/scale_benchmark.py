@@ -0,0 +1,347 @@
+"""Banc de montée en charge: N entrées Hypontech sur une seule boucle d'événements.
+
+Installe N entrées de configuration par le vrai chemin de Home Assistant
+(`async_setup_entry`, coordinateurs, capteurs) contre le simulateur local de
+l'API, puis mesure le temps d'installation, le retard de la boucle
+d'événements, la mémoire par entrée, les sockets ouverts et les écritures
+d'état par minute. Chaque taille est mesurée dans un processus neuf; le
+simulateur tourne dans le processus parent pour ne pas charger la boucle
+mesurée.
+
+Exécution depuis la racine du dépôt (Home Assistant installé)::
+
+    python -m benchmarks.scale_benchmark --entries 10 100 500
+    python -m benchmarks.scale_benchmark --entries 100 --duration 120 --json scale.json
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from functools import partial
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+from homeassistant import bootstrap, config_entries, loader
+from homeassistant.const import (
+    CONF_PASSWORD,
+    CONF_SCAN_INTERVAL,
+    EVENT_STATE_CHANGED,
+    __version__ as HA_VERSION,
+)
+from homeassistant.core import Event, HomeAssistant, callback
+
+from benchmarks.simulator import HypontechCloudSimulator
+from custom_components.hypontech_ha.const import (
+    CONF_FAST_START,
+    CONF_PLANT_ID,
+    CONF_USERNAME,
+    DOMAIN,
+)
+from custom_components.hypontech_ha.hypontech_api import HypontechAPI
+
+# Période de la sonde de retard de la boucle (secondes)
+LAG_PROBE_INTERVAL = 0.05
+MANIFEST = Path(__file__).parent.parent / "custom_components" / DOMAIN / "manifest.json"
+
+
+def _lag_summary(samples: list[float]) -> dict[str, float]:
+    """Retard de la boucle en millisecondes (p50, p99, maximum)."""
+    if not samples:
+        return {"p50": 0.0, "p99": 0.0, "max": 0.0}
+    cuts = (
+        statistics.quantiles(samples, n=100, method="inclusive")
+        if len(samples) > 1
+        else samples * 99
+    )
+    return {"p50": cuts[49] * 1000, "p99": cuts[98] * 1000, "max": max(samples) * 1000}
+
+
+def _rss_bytes() -> int | None:
+    """Mémoire résidente du processus (Linux)."""
+    try:
+        with open("/proc/self/statm", encoding="ascii") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return None
+
+
+def _open_sockets() -> int | None:
+    """Nombre de sockets ouverts par le processus (Linux)."""
+    try:
+        descriptors = os.listdir("/proc/self/fd")
+    except OSError:
+        return None
+    count = 0
+    for descriptor in descriptors:
+        try:
+            count += os.readlink(f"/proc/self/fd/{descriptor}").startswith("socket:")
+        except OSError:
+            continue
+    return count
+
+
+class LoopLagProbe:
+    """Mesure le retard des réveils d'une tâche qui dort à intervalle fixe."""
+
+    def __init__(self) -> None:
+        """Initialisation de la sonde."""
+        self.samples: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """Démarre une nouvelle série de mesures."""
+        self.samples = []
+        self._task = asyncio.get_running_loop().create_task(self._async_run())
+
+    async def stop(self) -> list[float]:
+        """Arrête la sonde et retourne les retards mesurés (secondes)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        return self.samples
+
+    async def _async_run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            begin = loop.time()
+            await asyncio.sleep(LAG_PROBE_INTERVAL)
+            self.samples.append(max(loop.time() - begin - LAG_PROBE_INTERVAL, 0.0))
+
+
+async def _async_start_hass(config_dir: str) -> HomeAssistant:
+    """Démarre une instance Home Assistant minimale."""
+    hass = HomeAssistant(config_dir)
+    loader.async_setup(hass)
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    await bootstrap.async_load_base_functionality(hass)
+    await hass.async_start()
+    return hass
+
+
+def _make_entries(args: argparse.Namespace) -> list[config_entries.ConfigEntry]:
+    """Entrées de configuration du banc, `plants_per_account` installations par compte."""
+    options: dict[str, Any] = {CONF_SCAN_INTERVAL: args.scan_interval}
+    if args.fast_start:
+        options[CONF_FAST_START] = True
+    return [
+        config_entries.ConfigEntry(
+            version=1,
+            minor_version=1,
+            domain=DOMAIN,
+            title=f"Bench {index}",
+            data={
+                CONF_USERNAME: f"bench{index // args.plants_per_account}",
+                CONF_PASSWORD: "bench",
+                CONF_PLANT_ID: str(index),
+            },
+            source=config_entries.SOURCE_USER,
+            options=options,
+        )
+        for index in range(args.entries)
+    ]
+
+
+async def async_run_worker(args: argparse.Namespace) -> dict[str, Any]:
+    """Installe les entrées et mesure une taille (processus de mesure)."""
+    probe = LoopLagProbe()
+    with tempfile.TemporaryDirectory() as config_dir, patch(
+        "custom_components.hypontech_ha.account.HypontechAPI",
+        partial(HypontechAPI, base_url=args.base_url, timeout=args.timeout),
+    ):
+        hass = await _async_start_hass(config_dir)
+        entries = _make_entries(args)
+        rss_baseline = _rss_bytes()
+        sockets_baseline = _open_sockets()
+
+        probe.start()
+        start = time.monotonic()
+        await asyncio.gather(
+            *(hass.config_entries.async_add(entry) for entry in entries)
+        )
+        await hass.async_block_till_done()
+        setup_s = time.monotonic() - start
+        setup_lag = await probe.stop()
+
+        state_writes = 0
+
+        @callback
+        def _async_count_write(event: Event) -> None:
+            nonlocal state_writes
+            if event.data["entity_id"].startswith("sensor."):
+                state_writes += 1
+
+        unsub = hass.bus.async_listen(EVENT_STATE_CHANGED, _async_count_write)
+        probe.start()
+        sockets_peak = sockets_baseline or 0
+        steady_start = time.monotonic()
+        while (elapsed := time.monotonic() - steady_start) < args.duration:
+            await asyncio.sleep(min(1.0, args.duration - elapsed))
+            sockets_peak = max(sockets_peak, _open_sockets() or 0)
+        steady_s = time.monotonic() - steady_start
+        steady_lag = await probe.stop()
+        unsub()
+
+        rss = _rss_bytes()
+        sockets = _open_sockets()
+        report = {
+            "entries": args.entries,
+            "accounts": -(-args.entries // args.plants_per_account),
+            "loaded": sum(
+                entry.state is config_entries.ConfigEntryState.LOADED
+                for entry in entries
+            ),
+            "entities": len(hass.states.async_entity_ids("sensor")),
+            "setup_s": setup_s,
+            "setup_per_entry_ms": setup_s / max(args.entries, 1) * 1000,
+            "loop_lag_ms": {
+                "setup": _lag_summary(setup_lag),
+                "steady": _lag_summary(steady_lag),
+            },
+            "rss_mb": rss / 2**20 if rss is not None else None,
+            "memory_per_entry_kb": (
+                (rss - rss_baseline) / max(args.entries, 1) / 1024
+                if rss is not None and rss_baseline is not None
+                else None
+            ),
+            "sockets": {
+                "baseline": sockets_baseline,
+                "peak": sockets_peak if sockets is not None else None,
+                "final": sockets,
+            },
+            "state_writes_per_minute": state_writes / steady_s * 60,
+            "steady_s": steady_s,
+        }
+        await hass.async_stop(force=True)
+    return report
+
+
+async def async_run_size(
+    simulator: HypontechCloudSimulator, args: argparse.Namespace, entries: int
+) -> dict[str, Any]:
+    """Mesure une taille dans un processus Python neuf."""
+    simulator.reset_stats()
+    start = time.monotonic()
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        "-m",
+        "benchmarks.scale_benchmark",
+        "--worker",
+        "--base-url",
+        simulator.base_url,
+        "--entries",
+        str(entries),
+        "--plants-per-account",
+        str(args.plants_per_account),
+        "--scan-interval",
+        str(args.scan_interval),
+        "--duration",
+        str(args.duration),
+        "--timeout",
+        str(args.timeout),
+        *(["--fast-start"] if args.fast_start else []),
+        stdout=asyncio.subprocess.PIPE,
+    )
+    stdout, _ = await process.communicate()
+    if process.returncode:
+        raise RuntimeError(f"Mesure de {entries} entrées en échec ({process.returncode})")
+    elapsed = time.monotonic() - start
+    report = json.loads(stdout)
+    report["server"] = {
+        "requests_per_minute": simulator.stats["requests"] / elapsed * 60,
+        "logins": simulator.stats["logins"],
+        "peak_concurrency": simulator.stats["peak_concurrency"],
+    }
+    return report
+
+
+async def async_main(args: argparse.Namespace) -> dict[str, Any]:
+    """Démarre le simulateur et mesure chaque taille."""
+    simulator = HypontechCloudSimulator(
+        latency=args.latency, jitter=args.jitter, seed=args.seed
+    )
+    await simulator.start()
+    try:
+        reports = [
+            await async_run_size(simulator, args, entries) for entries in args.entries
+        ]
+    finally:
+        await simulator.stop()
+    with open(MANIFEST, encoding="utf-8") as file:
+        version = json.load(file)["version"]
+    return {
+        "environment": {
+            "integration": version,
+            "homeassistant": HA_VERSION,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "parameters": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("worker", "base_url", "json")
+        },
+        "reports": reports,
+    }
+
+
+def main() -> None:
+    """Point d'entrée en ligne de commande."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, nargs="+", default=[10, 100])
+    parser.add_argument(
+        "--plants-per-account", type=int, default=1, help="installations par compte"
+    )
+    parser.add_argument(
+        "--scan-interval", type=int, default=10, help="intervalle des entrées (s)"
+    )
+    parser.add_argument("--duration", type=float, default=60.0, help="régime établi (s)")
+    parser.add_argument("--fast-start", action="store_true", help="démarrage rapide")
+    parser.add_argument("--latency", type=float, default=0.1, help="secondes")
+    parser.add_argument("--jitter", type=float, default=0.02, help="secondes")
+    parser.add_argument("--timeout", type=float, default=10.0, help="timeout client")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="fichier de sortie JSON")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+    if args.worker:
+        args.entries = args.entries[0]
+        print(json.dumps(asyncio.run(async_run_worker(args))))
+        return
+
+    result = asyncio.run(async_main(args))
+    for report in result["reports"]:
+        lag = report["loop_lag_ms"]
+        memory = report["memory_per_entry_kb"]
+        print(
+            f"{report['entries']:>5} entrées  "
+            f"chargées={report['loaded']:<5} "
+            f"installation={report['setup_s']:7.2f} s  "
+            f"retard boucle p99={lag['setup']['p99']:6.1f}/{lag['steady']['p99']:6.1f} ms  "
+            f"mémoire/entrée={memory if memory is None else f'{memory:7.1f} Ko'}  "
+            f"sockets={report['sockets']['peak']}  "
+            f"écritures/min={report['state_writes_per_minute']:8.1f}  "
+            f"requêtes/min={report['server']['requests_per_minute']:8.1f}"
+        )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(result, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,388 @@
+"""Simulateur local de l'API cloud Hypontech.
+
+Sert `/v2/login`, `/v2/plant/overview`, `/v2/plant/{id}/production2`, les
+onduleurs de l'installation (`/v2/plant/{id}/devices`, `/v2/plant/{id}/devices/realtime`)
+et l'historique de production (`/v2/plant/{id}/history`) avec une latence, des
+erreurs et une expiration de jeton configurables, pour mesurer le client sans
+interroger api.hypon.cloud::
+
+    simulator = HypontechCloudSimulator(latency=0.3, jitter=0.1, token_ttl=600)
+    base_url = await simulator.start()
+    api = HypontechAPI("user", "password", "1", base_url=base_url)
+
+`HypontechModbusSimulator` sert de la même façon la carte de registres
+`MODBUS_REGISTERS` en Modbus TCP pour le transport local.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import math
+import random
+import struct
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from aiohttp import web
+
+from custom_components.hypontech_ha.const import MODBUS_REGISTERS
+
+
+class HypontechCloudSimulator:
+    """Serveur aiohttp imitant l'API cloud Hypontech."""
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.3,
+        jitter: float = 0.1,
+        token_ttl: float | None = None,
+        jwt_expiry: bool = False,
+        error_rate: float = 0.0,
+        timeout_rate: float = 0.0,
+        timeout_delay: float = 30.0,
+        capacity: float = 6.0,
+        devices: int = 1,
+        password: str | None = None,
+        seed: int | None = None,
+    ) -> None:
+        """Initialisation du simulateur.
+
+        `token_ttl` fait refuser (401) les jetons plus anciens que cette durée;
+        `jwt_expiry` publie cette expiration dans un claim JWT `exp`.
+        `error_rate` et `timeout_rate` sont des probabilités par requête.
+        `devices` est le nombre d'onduleurs de chaque installation.
+        `password`, s'il est fixé, est le seul mot de passe accepté.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.token_ttl = token_ttl
+        self.jwt_expiry = jwt_expiry
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_delay = timeout_delay
+        self.capacity = capacity
+        self.devices = devices
+        self.password = password
+        self.stats: Counter[str] = Counter()
+        # Requêtes reçues par seconde et requêtes en cours de traitement
+        self.per_second: Counter[int] = Counter()
+        self._active = 0
+        self._random = random.Random(seed)
+        self._tokens: dict[str, float] = {}
+        self._runner: web.AppRunner | None = None
+        self.base_url: str | None = None
+
+    def reset_stats(self) -> None:
+        """Remet les compteurs à zéro."""
+        self.stats.clear()
+        self.per_second.clear()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Démarre le serveur et retourne l'URL de base de l'API."""
+        app = web.Application(middlewares=[self._middleware])
+        app.router.add_post("/v2/login", self._handle_login)
+        app.router.add_get("/v2/plant/overview", self._handle_overview)
+        app.router.add_get("/v2/plant/{plant_id}/production2", self._handle_production2)
+        app.router.add_get("/v2/plant/{plant_id}/devices", self._handle_devices)
+        app.router.add_get(
+            "/v2/plant/{plant_id}/devices/realtime", self._handle_devices_realtime
+        )
+        app.router.add_get("/v2/plant/{plant_id}/history", self._handle_history)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f"http://{host}:{port}/v2"
+        return self.base_url
+
+    async def stop(self) -> None:
+        """Arrête le serveur."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler: Any) -> web.StreamResponse:
+        """Comptage des requêtes reçues et du pic de requêtes simultanées."""
+        self.stats["requests"] += 1
+        self.stats[f"requests:{request.match_info.route.resource.canonical}"] += 1
+        self.per_second[int(time.monotonic())] += 1
+        self._active += 1
+        self.stats["peak_concurrency"] = max(self.stats["peak_concurrency"], self._active)
+        try:
+            return await self._async_serve(request, handler)
+        finally:
+            self._active -= 1
+
+    async def _async_serve(self, request: web.Request, handler: Any) -> web.StreamResponse:
+        """Latence, erreurs 5xx, timeouts et contrôle du jeton."""
+        await asyncio.sleep(
+            max(self.latency + self._random.uniform(-self.jitter, self.jitter), 0)
+        )
+
+        draw = self._random.random()
+        if draw < self.timeout_rate:
+            self.stats["timeouts"] += 1
+            await asyncio.sleep(self.timeout_delay)
+        elif draw < self.timeout_rate + self.error_rate:
+            self.stats["errors"] += 1
+            return web.json_response({"message": "error"}, status=503)
+
+        if request.path != "/v2/login" and not self._token_valid(request):
+            self.stats["unauthorized"] += 1
+            return web.json_response({"message": "unauthorized"}, status=401)
+        return await handler(request)
+
+    def _token_valid(self, request: web.Request) -> bool:
+        """Vérifie le jeton Bearer de la requête."""
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+        issued_at = self._tokens.get(token)
+        if issued_at is None:
+            return False
+        return self.token_ttl is None or time.time() - issued_at < self.token_ttl
+
+    def _new_token(self) -> str:
+        """Émet un jeton opaque ou JWT."""
+        now = time.time()
+        token = f"sim-{self.stats['logins']}-{now}"
+        if self.jwt_expiry and self.token_ttl is not None:
+            claims = json.dumps({"iat": int(now), "exp": int(now + self.token_ttl)})
+            payload = base64.urlsafe_b64encode(claims.encode()).decode().rstrip("=")
+            token = f"eyJhbGciOiJub25lIn0.{payload}.{self.stats['logins']}"
+        self._tokens[token] = now
+        return token
+
+    async def _handle_login(self, request: web.Request) -> web.Response:
+        """POST /v2/login."""
+        body = await request.json()
+        if (
+            not body.get("username")
+            or not body.get("password")
+            or (self.password is not None and body["password"] != self.password)
+        ):
+            return web.json_response({"message": "invalid credentials"}, status=401)
+        self.stats["logins"] += 1
+        return web.json_response({"data": {"token": self._new_token()}})
+
+    def _power(self) -> float:
+        """Puissance instantanée simulée (courbe solaire sur la journée)."""
+        hours = time.localtime().tm_hour + time.localtime().tm_min / 60
+        sun = max(math.sin((hours - 6) / 14 * math.pi), 0) if 6 <= hours <= 20 else 0
+        return round(self.capacity * 1000 * sun * self._random.uniform(0.9, 1.0), 1)
+
+    async def _handle_overview(self, request: web.Request) -> web.Response:
+        """GET /v2/plant/overview."""
+        return web.json_response(
+            {
+                "data": {
+                    "e_total": 12345.6,
+                    "e_today": 12.3,
+                    "total_co2": 4567.8,
+                    "total_tree": 123.4,
+                    "power": self._power(),
+                    "normal_dev_num": self.devices,
+                    "offline_dev_num": 0,
+                    "fault_dev_num": 0,
+                    "wait_dev_num": 0,
+                    "capacity": self.capacity,
+                }
+            }
+        )
+
+    async def _handle_production2(self, request: web.Request) -> web.Response:
+        """GET /v2/plant/{id}/production2."""
+        return web.json_response(
+            {
+                "data": {
+                    "today_generation": 12.3,
+                    "month_generation": 345.6,
+                    "year_generation": 4567.8,
+                    "total_generation": 12345.6,
+                    "co2": 4567.8,
+                    "tree": 123.4,
+                    "diesel": 987.6,
+                    "today_revenue": 2.1,
+                    "month_revenue": 58.7,
+                    "total_revenue": 2098.7,
+                }
+            }
+        )
+
+    def _serial(self, plant_id: str, index: int) -> str:
+        """Numéro de série simulé d'un onduleur."""
+        return f"HYP{plant_id}{index:04d}"
+
+    async def _handle_devices(self, request: web.Request) -> web.Response:
+        """GET /v2/plant/{id}/devices."""
+        plant_id = request.match_info["plant_id"]
+        return web.json_response(
+            {
+                "data": [
+                    {
+                        "sn": self._serial(plant_id, index),
+                        "model": "HMS-800W-2T",
+                        "name": f"Onduleur {index + 1}",
+                    }
+                    for index in range(self.devices)
+                ]
+            }
+        )
+
+    async def _handle_devices_realtime(self, request: web.Request) -> web.Response:
+        """GET /v2/plant/{id}/devices/realtime?sn=..."""
+        plant_id = request.match_info["plant_id"]
+        known = {self._serial(plant_id, index) for index in range(self.devices)}
+        power = self._power() / max(self.devices, 1)
+        return web.json_response(
+            {
+                "data": [
+                    {
+                        "sn": serial,
+                        "power": round(power * self._random.uniform(0.9, 1.1), 1),
+                        "e_today": 12.3 / max(self.devices, 1),
+                        "e_total": 12345.6 / max(self.devices, 1),
+                        "status": "normal",
+                    }
+                    for serial in request.query.get("sn", "").split(",")
+                    if serial in known
+                ]
+            }
+        )
+
+    def _hourly_energy(self, hour: int) -> float:
+        """Énergie simulée produite pendant une heure (kWh)."""
+        sun = math.sin((hour + 0.5 - 6) / 14 * math.pi) if 6 <= hour < 20 else 0
+        return round(self.capacity * 0.8 * max(sun, 0), 3)
+
+    async def _handle_history(self, request: web.Request) -> web.Response:
+        """GET /v2/plant/{id}/history?granularity=power|hour|day|month|year&date=..."""
+        period = request.query.get("date", "")
+        granularity = request.query.get("granularity")
+        now = datetime.now()
+        daily = round(sum(self._hourly_energy(hour) for hour in range(24)), 3)
+        if granularity == "day":
+            day = date.fromisoformat(f"{period}-01")
+            records = []
+            while day.strftime("%Y-%m") == period and day <= now.date():
+                records.append({"time": day.isoformat(), "energy": daily})
+                day += timedelta(days=1)
+        elif granularity == "month":
+            records = [
+                {"time": f"{period}-{month:02d}", "energy": round(daily * 30, 3)}
+                for month in range(1, 13)
+                if (int(period), month) <= (now.year, now.month)
+            ]
+        elif granularity == "year":
+            records = [
+                {"time": str(year), "energy": round(daily * 365, 3)}
+                for year in range(now.year - 4, now.year + 1)
+            ]
+        elif granularity == "power":
+            # Courbe de puissance au pas de 5 minutes (W)
+            start = datetime.combine(date.fromisoformat(period), datetime.min.time())
+            records = []
+            for step in range(288):
+                moment = start + timedelta(minutes=5 * step)
+                if moment > now:
+                    break
+                records.append(
+                    {
+                        "time": moment.strftime("%Y-%m-%d %H:%M"),
+                        "power": round(self._hourly_energy(moment.hour) * 1000, 1),
+                    }
+                )
+        else:
+            day = date.fromisoformat(period)
+            records = [
+                {"time": f"{period} {hour:02d}:00", "energy": self._hourly_energy(hour)}
+                for hour in range(24)
+                if datetime.combine(day, datetime.min.time()) + timedelta(hours=hour)
+                <= now
+            ]
+        return web.json_response({"data": records})
+
+class HypontechModbusSimulator:
+    """Serveur Modbus TCP imitant un onduleur Hypontech (fonction 0x03)."""
+
+    def __init__(
+        self,
+        *,
+        latency: float = 0.005,
+        capacity: float = 6.0,
+        unit_id: int = 1,
+        seed: int | None = None,
+    ) -> None:
+        """Initialisation du simulateur; `latency` est le délai de réponse."""
+        self.latency = latency
+        self.capacity = capacity
+        self.unit_id = unit_id
+        self.status = 1
+        self.stats: Counter[str] = Counter()
+        self._random = random.Random(seed)
+        self._server: asyncio.Server | None = None
+        self._started = time.monotonic()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Démarre le serveur et retourne le port d'écoute."""
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Arrête le serveur."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def registers(self) -> dict[int, int]:
+        """Valeurs courantes des registres de la carte."""
+        hours = time.localtime().tm_hour + time.localtime().tm_min / 60
+        sun = max(math.sin((hours - 6) / 14 * math.pi), 0) if 6 <= hours <= 20 else 0
+        fields = {
+            "status": self.status,
+            "power": self.capacity * 1000 * sun * self._random.uniform(0.9, 1.0),
+            "e_today": 12.3 + (time.monotonic() - self._started) / 3600,
+            "e_total": 12345.6,
+        }
+        values: dict[int, int] = {}
+        for field, spec in MODBUS_REGISTERS.items():
+            raw = round(fields[field] / spec.get("scale", 1))
+            for offset in range(spec["count"]):
+                shift = 16 * (spec["count"] - offset - 1)
+                values[spec["address"] + offset] = (raw >> shift) & 0xFFFF
+        return values
+
+    async def _handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Répond aux requêtes d'une connexion jusqu'à sa fermeture."""
+        self.stats["connections"] += 1
+        try:
+            while True:
+                transaction, _, length, unit_id = struct.unpack(
+                    ">HHHB", await reader.readexactly(7)
+                )
+                function, address, count = struct.unpack(
+                    ">BHH", await reader.readexactly(length - 1)
+                )
+                self.stats["requests"] += 1
+                await asyncio.sleep(self.latency)
+                if function != 0x03 or unit_id != self.unit_id:
+                    pdu = struct.pack(">BB", function | 0x80, 1)
+                else:
+                    # Registres absents de la carte lus à zéro
+                    registers = self.registers()
+                    words = [registers.get(address + offset, 0) for offset in range(count)]
+                    pdu = struct.pack(f">BB{count}H", function, 2 * count, *words)
+                writer.write(
+                    struct.pack(">HHHB", transaction, 0, len(pdu) + 1, unit_id) + pdu
+                )
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -5,65 +5,209 @@ from datetime import timedelta
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.typing import ConfigType
+from homeassistant.exceptions import ConfigEntryAuthFailed, ConfigEntryNotReady
 from homeassistant.const import (
-    CONF_PASSWORD,
+    CONF_HOST,
+    CONF_PORT,
     CONF_SCAN_INTERVAL,
     Platform,
 )
 from homeassistant.helpers import config_validation as cv
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.helpers.storage import Store
 
 from .const import (
     DOMAIN,
     DEFAULT_SCAN_INTERVAL,
-    CONF_USERNAME,
     CONF_PLANT_ID,
+    CONF_BACKFILL,
+    CONF_BACKFILL_DAYS,
+    CONF_DEVICE_INTERVAL,
+    CONF_DEVICE_POLLING,
+    CONF_FAST_START,
+    CONF_GRACE_PERIOD,
+    CONF_HOURLY_STATISTICS,
+    CONF_MIN_FRESHNESS,
+    CONF_POLLING_MODE,
+    CONF_TRANSPORT,
+    CONF_UNIT_ID,
+    DEFAULT_BACKFILL,
+    DEFAULT_BACKFILL_DAYS,
+    DEFAULT_DEVICE_INTERVAL,
+    DEFAULT_DEVICE_POLLING,
+    DEFAULT_FAST_START,
+    DEFAULT_GRACE_PERIOD,
+    DEFAULT_HOURLY_STATISTICS,
+    DEFAULT_MIN_FRESHNESS,
+    DEFAULT_POLLING_MODE,
+    POLLING_MODE_SOLAR,
+    STORAGE_KEY_SNAPSHOT,
+    STORAGE_KEY_STATISTICS,
+    STORAGE_VERSION,
+    TRANSPORT_CLOUD,
+    TRANSPORT_MODBUS,
 )
-from .hypontech_api import HypontechAPI
+from .account import HypontechAccount, async_get_account, async_release_account
+from .coordinator import HypontechDataUpdateCoordinator
+from .devices import HypontechDeviceCoordinator
+from .local import HypontechLocalSource
+from .modbus import HypontechModbusClient
+from .scheduler import SolarAwareScheduler
+from .services import async_setup_services
+from .stagger import async_get_stagger
 
 _LOGGER = logging.getLogger(__name__)
 
 # Pas de configuration YAML - configuration via l'interface graphique uniquement
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
 
 PLATFORMS: list[Platform] = [Platform.SENSOR]
 
 
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Enregistrement des services de l'intégration."""
+    async_setup_services(hass)
+    return True
+
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Configuration de l'intégration Hypontech."""
     hass.data.setdefault(DOMAIN, {})
 
     # Récupération des données de configuration
-    username = entry.data[CONF_USERNAME]
-    password = entry.data[CONF_PASSWORD]
     plant_id = entry.data[CONF_PLANT_ID]
     scan_interval = entry.options.get("scan_interval", entry.data.get("scan_interval", 60))
     if isinstance(scan_interval, int):
         scan_interval = timedelta(seconds=scan_interval)
+    local = entry.data.get(CONF_TRANSPORT, TRANSPORT_CLOUD) == TRANSPORT_MODBUS
+    grace_period = timedelta(
+        seconds=entry.options.get(CONF_GRACE_PERIOD, DEFAULT_GRACE_PERIOD)
+    )
 
-    # Création de l'API client
-    api = HypontechAPI(username, password, plant_id)
+    if local:
+        # Lecture directe des registres de l'onduleur sur le réseau local
+        account = HypontechLocalSource(
+            HypontechModbusClient(
+                entry.data[CONF_HOST], entry.data[CONF_PORT], entry.data[CONF_UNIT_ID]
+            )
+        )
+    else:
+        # Client de compte partagé: une authentification pour toutes les installations
+        account = await async_get_account(hass, entry)
+
+    # Planification adaptative selon l'ensoleillement
+    scheduler = None
+    if entry.options.get(CONF_POLLING_MODE, DEFAULT_POLLING_MODE) == POLLING_MODE_SOLAR:
+        scheduler = SolarAwareScheduler(hass, scan_interval)
+
+    # Démarrage rapide: dernières données connues conservées sur disque
+    snapshot_store = None
+    if entry.options.get(CONF_FAST_START, DEFAULT_FAST_START):
+        snapshot_store = Store(
+            hass, STORAGE_VERSION, f"{STORAGE_KEY_SNAPSHOT}.{entry.entry_id}"
+        )
 
     # Création du coordinateur de données
-    coordinator = DataUpdateCoordinator(
+    coordinator = HypontechDataUpdateCoordinator(
         hass,
-        _LOGGER,
-        name=DOMAIN,
-        update_method=api.async_get_data,
-        update_interval=scan_interval,
+        account,
+        plant_id,
+        scan_interval,
+        scheduler,
+        snapshot_store,
+        timedelta(seconds=entry.options.get(CONF_MIN_FRESHNESS, DEFAULT_MIN_FRESHNESS)),
+        grace_period,
     )
 
+    # Cycles des comptes répartis sur l'intervalle plutôt que tous à la même seconde
+    stagger = async_get_stagger(hass)
+    stagger.register(account)
+    entry.async_on_unload(lambda: stagger.unregister(account))
+    coordinator.stagger = stagger
+
+    # Statistiques à long terme: historique du cloud et heures calculées en direct
+    if "recorder" in hass.config.components:
+        from .backfill import HypontechBackfill
+        from .energy_statistics import HypontechEnergyStatistics
+
+        statistics = HypontechEnergyStatistics(
+            hass,
+            plant_id,
+            Store(hass, STORAGE_VERSION, f"{STORAGE_KEY_STATISTICS}.{entry.entry_id}"),
+        )
+        # L'historique n'est disponible que sur le cloud
+        if not local:
+            coordinator.backfill = HypontechBackfill(
+                hass,
+                account,
+                plant_id,
+                statistics,
+                entry.options.get(CONF_BACKFILL_DAYS, DEFAULT_BACKFILL_DAYS),
+            )
+        if entry.options.get(CONF_HOURLY_STATISTICS, DEFAULT_HOURLY_STATISTICS):
+            await statistics.async_load()
+            coordinator.statistics = statistics
+
+    # Les entités sont créées immédiatement avec les données restaurées (marquées
+    # obsolètes) et le premier rafraîchissement se fait en arrière-plan
+    restored = await coordinator.async_restore_snapshot()
+
     # Test de connexion initial
-    try:
-        await coordinator.async_config_entry_first_refresh()
-    except Exception as ex:
-        raise ConfigEntryNotReady(f"Impossible de se connecter à l'API Hypontech: {ex}") from ex
+    if not restored:
+        try:
+            # Premiers rafraîchissements du démarrage limités en nombre simultané
+            async with stagger.async_startup_slot(account):
+                await coordinator.async_config_entry_first_refresh()
+        except ConfigEntryAuthFailed:
+            await _async_release_source(hass, entry, account)
+            raise
+        except Exception as ex:
+            await _async_release_source(hass, entry, account)
+            raise ConfigEntryNotReady(f"Impossible de se connecter à l'API Hypontech: {ex}") from ex
+
+    # Onduleurs interrogés à leur propre cadence, entités créées à la découverte
+    if not local and entry.options.get(CONF_DEVICE_POLLING, DEFAULT_DEVICE_POLLING):
+        coordinator.device_coordinator = HypontechDeviceCoordinator(
+            hass,
+            account,
+            plant_id,
+            timedelta(
+                seconds=entry.options.get(CONF_DEVICE_INTERVAL, DEFAULT_DEVICE_INTERVAL)
+            ),
+            grace_period,
+        )
 
     hass.data[DOMAIN][entry.entry_id] = coordinator
 
+    # Rechargement de l'entrée lors d'un changement d'options
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
     # Configuration des plateformes
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    if restored:
+        # Premier rafraîchissement décalé selon la position du compte
+        entry.async_create_background_task(
+            hass,
+            _async_delayed_refresh(
+                coordinator, stagger.initial_delay(account, scan_interval)
+            ),
+            f"{DOMAIN} first refresh {plant_id}",
+        )
+    if coordinator.device_coordinator is not None:
+        entry.async_create_background_task(
+            hass,
+            coordinator.device_coordinator.async_refresh(),
+            f"{DOMAIN} device discovery {plant_id}",
+        )
+    # Reprise incrémentale de l'historique à chaque démarrage
+    if coordinator.backfill is not None and entry.options.get(
+        CONF_BACKFILL, DEFAULT_BACKFILL
+    ):
+        entry.async_create_background_task(
+            hass, coordinator.backfill.async_run(), f"{DOMAIN} backfill {plant_id}"
+        )
+
     return True
 
 
@@ -71,6 +215,32 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Déchargement de l'intégration Hypontech."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
+        await _async_release_source(hass, entry, coordinator.account)
+
+    return unload_ok
+
+
+async def _async_delayed_refresh(
+    coordinator: HypontechDataUpdateCoordinator, delay: float
+) -> None:
+    """Rafraîchit le coordinateur après `delay` secondes."""
+    await asyncio.sleep(delay)
+    await coordinator.async_refresh()
+
+
+async def _async_release_source(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    source: HypontechAccount | HypontechLocalSource,
+) -> None:
+    """Ferme la connexion locale ou libère le compte cloud de l'entrée."""
+    if isinstance(source, HypontechLocalSource):
+        await source.async_close()
+    else:
+        await async_release_account(hass, entry)
+
 
-    return unload_ok 
\ No newline at end of file
+async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Rechargement de l'intégration après modification des options."""
+    await hass.config_entries.async_reload(entry.entry_id) 
\ No newline at end of file
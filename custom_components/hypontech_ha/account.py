@@ -0,0 +1,340 @@
+"""Client de compte Hypontech partagé par plusieurs installations."""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .cache import TTLCache
+from .const import (
+    ALL_TIERS,
+    CONF_CONNECTOR_LIMIT,
+    CONF_MAX_CONCURRENCY,
+    CONF_PLANT_ID,
+    CONF_SLOW_INTERVAL,
+    CONF_USERNAME,
+    DATA_ACCOUNTS,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_SLOW_INTERVAL,
+    DEVICE_BATCH_SIZE,
+    DOMAIN,
+    STORAGE_KEY_TOKEN,
+    STORAGE_VERSION,
+    TIER_FAST,
+    TIER_SLOW,
+)
+from .exceptions import HypontechError
+from .hypontech_api import (
+    HypontechAPI,
+    extract_device_data,
+    extract_device_info,
+    extract_overview_data,
+    extract_production_data,
+)
+from .profiler import PHASE_EXTRACTION
+from .session import (
+    async_acquire_session_manager,
+    async_release_session_manager,
+    async_set_connector_limit,
+)
+
+if TYPE_CHECKING:
+    from .coordinator import HypontechDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HypontechAccount:
+    """Une authentification et une session pour toutes les installations d'un compte.
+
+    Un cycle de rafraîchissement récupère l'aperçu du compte une seule fois puis
+    la production de chaque installation dont le cache a expiré, avec une
+    concurrence bornée. Le premier
+    coordinateur qui demande ses données déclenche le cycle pour toutes les
+    installations; les résultats sont distribués aux autres coordinateurs.
+    """
+
+    def __init__(
+        self, api: HypontechAPI, max_concurrency: int, slow_interval: float
+    ) -> None:
+        """Initialisation du client de compte."""
+        self.api = api
+        self._production_cache = TTLCache(slow_interval)
+        self._refreshed_tiers: dict[str, frozenset[str]] = {}
+        self._max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._coordinators: dict[str, HypontechDataUpdateCoordinator] = {}
+        self._inflight: asyncio.Future[dict[str, Any]] | None = None
+        self._waiting: set[str] = set()
+
+    def configure(self, max_concurrency: int, slow_interval: float) -> None:
+        """Applique les options communes à toutes les installations du compte.
+
+        Les requêtes en cours terminent sous l'ancienne limite de concurrence.
+        """
+        if max_concurrency != self._max_concurrency:
+            self._max_concurrency = max_concurrency
+            self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._production_cache.ttl = slow_interval
+
+    @property
+    def plant_ids(self) -> list[str]:
+        """Installations enregistrées sur ce compte."""
+        return list(self._coordinators)
+
+    def register(self, plant_id: str, coordinator: HypontechDataUpdateCoordinator) -> None:
+        """Enregistre le coordinateur d'une installation."""
+        self._coordinators[plant_id] = coordinator
+
+    def unregister(self, plant_id: str) -> None:
+        """Retire le coordinateur d'une installation."""
+        self._coordinators.pop(plant_id, None)
+        self._production_cache.pop(plant_id)
+        self._refreshed_tiers.pop(plant_id, None)
+
+    async def _async_limited(self, coro: Any) -> Any:
+        """Exécute une requête sous la limite de concurrence du compte."""
+        async with self._semaphore:
+            return await coro
+
+    def refreshed_tiers(self, plant_id: str) -> frozenset[str]:
+        """Niveaux de rafraîchissement mis à jour lors du dernier cycle."""
+        return self._refreshed_tiers.get(plant_id, ALL_TIERS)
+
+    async def async_fetch_plants(self, plant_ids: list[str]) -> dict[str, Any]:
+        """Récupère les données de plusieurs installations en parallèle.
+
+        L'aperçu (niveau rapide) est récupéré à chaque cycle; la production
+        détaillée (niveau lent) est servie depuis le cache tant qu'elle est
+        valable. Retourne pour chaque installation ses données ou l'exception
+        rencontrée.
+        """
+        slow_plant_ids = [
+            plant_id
+            for plant_id in plant_ids
+            if self._production_cache.get(plant_id) is None
+        ]
+        results = await asyncio.gather(
+            self._async_limited(self.api._get_overview_data()),
+            *(
+                self._async_limited(self.api._get_production2_data(plant_id))
+                for plant_id in slow_plant_ids
+            ),
+            return_exceptions=True,
+        )
+        overview_data = results[0]
+        fetched = dict(zip(slow_plant_ids, results[1:]))
+        profiler = self.api.profiler
+        extraction_start = time.perf_counter() if profiler is not None else 0.0
+
+        plants: dict[str, Any] = {}
+        for plant_id in plant_ids:
+            if isinstance(overview_data, BaseException):
+                plants[plant_id] = overview_data
+                continue
+
+            tiers = {TIER_FAST}
+            production_data = fetched.get(plant_id)
+            if production_data is None:
+                production_data = self._production_cache.get(plant_id)
+            elif isinstance(production_data, BaseException):
+                # Niveau lent indisponible: dernière valeur connue si elle existe
+                cached = self._production_cache.get_stale(plant_id)
+                if cached is None:
+                    plants[plant_id] = production_data
+                    continue
+                _LOGGER.debug(
+                    "Production de %s servie depuis le cache: %s",
+                    plant_id,
+                    production_data,
+                )
+                production_data = cached
+            else:
+                production_data = extract_production_data(production_data)
+                self._production_cache.set(plant_id, production_data)
+                tiers.add(TIER_SLOW)
+
+            data = extract_overview_data(overview_data)
+            data.update(production_data)
+            plants[plant_id] = data
+            self._refreshed_tiers[plant_id] = frozenset(tiers)
+        if profiler is not None:
+            profiler.record(
+                PHASE_EXTRACTION, "plants", extraction_start, time.perf_counter()
+            )
+        return plants
+
+    async def async_discover_devices(self, plant_id: str) -> dict[str, dict[str, Any]]:
+        """Retourne les onduleurs d'une installation, par numéro de série."""
+        devices = await self._async_limited(self.api.async_get_devices(plant_id))
+        discovered = {}
+        for device in devices:
+            info = extract_device_info(device)
+            if info["sn"]:
+                discovered[info["sn"]] = info
+        return discovered
+
+    async def async_fetch_devices(
+        self, plant_id: str, serials: list[str]
+    ) -> dict[str, dict[str, Any]]:
+        """Récupère les données temps réel des onduleurs par lots.
+
+        Les lots sont interrogés en parallèle sous la limite de concurrence du
+        compte: le rafraîchissement d'une installation de plusieurs dizaines
+        d'onduleurs coûte un aller-retour plutôt qu'un par onduleur. Les
+        onduleurs d'un lot en échec sont absents du résultat.
+        """
+        batches = [
+            serials[index : index + DEVICE_BATCH_SIZE]
+            for index in range(0, len(serials), DEVICE_BATCH_SIZE)
+        ]
+        results = await asyncio.gather(
+            *(
+                self._async_limited(self.api.async_get_devices_realtime(batch, plant_id))
+                for batch in batches
+            ),
+            return_exceptions=True,
+        )
+
+        devices: dict[str, dict[str, Any]] = {}
+        errors = []
+        for result in results:
+            if isinstance(result, BaseException):
+                errors.append(result)
+                continue
+            for device in result:
+                devices[str(device.get("sn"))] = extract_device_data(device)
+        if errors:
+            if not devices:
+                raise errors[0]
+            _LOGGER.debug(
+                "%s lot(s) d'onduleurs en échec pour %s: %s",
+                len(errors),
+                plant_id,
+                errors[0],
+            )
+        return devices
+
+    async def async_get_history(
+        self, plant_id: str, granularity: str, period: str
+    ) -> list[dict[str, Any]]:
+        """Récupère une période d'historique de production d'une installation."""
+        return await self._async_limited(
+            self.api.async_get_history(granularity, period, plant_id)
+        )
+
+    async def async_get_plant_data(self, plant_id: str) -> dict[str, Any]:
+        """Retourne les données d'une installation depuis un cycle partagé.
+
+        Une installation enregistrée pendant un cycle déjà lancé (entrées
+        chargées en même temps) n'en fait pas partie: elle attend le cycle
+        suivant, lancé aussitôt et partagé avec les autres retardataires.
+        """
+        self._waiting.add(plant_id)
+        try:
+            while True:
+                if self._inflight is None:
+                    self._inflight = asyncio.ensure_future(self._async_refresh_cycle())
+                plants = await asyncio.shield(self._inflight)
+                if plant_id in plants or plant_id not in self._coordinators:
+                    break
+        finally:
+            self._waiting.discard(plant_id)
+
+        result = plants.get(plant_id)
+        if result is None:
+            raise HypontechError(f"Installation {plant_id} absente du compte")
+        if isinstance(result, BaseException):
+            raise result
+        return result
+
+    async def _async_refresh_cycle(self) -> dict[str, Any]:
+        """Cycle de rafraîchissement de toutes les installations du compte."""
+        plant_ids = self.plant_ids
+        try:
+            plants = await self.async_fetch_plants(plant_ids)
+        finally:
+            self._inflight = None
+
+        # Distribution aux coordinateurs qui n'attendent pas déjà ce cycle
+        for plant_id, result in plants.items():
+            coordinator = self._coordinators.get(plant_id)
+            if (
+                coordinator is None
+                or plant_id in self._waiting
+                or isinstance(result, BaseException)
+            ):
+                continue
+            coordinator.async_set_updated_data(result)
+        return plants
+
+
+def _account_key(username: str) -> str:
+    """Identifiant anonymisé d'un compte."""
+    return hashlib.sha256(username.encode()).hexdigest()[:12]
+
+
+async def async_get_account(hass: HomeAssistant, entry: ConfigEntry) -> HypontechAccount:
+    """Retourne le client partagé du compte de l'entrée, créé si nécessaire."""
+    accounts: dict[str, HypontechAccount] = hass.data[DOMAIN].setdefault(
+        DATA_ACCOUNTS, {}
+    )
+    session = async_set_connector_limit(hass, entry.options.get(CONF_CONNECTOR_LIMIT))
+    if session is not None:
+        # Connecteur recréé avec la nouvelle limite: tous les comptes l'utilisent
+        for other in accounts.values():
+            other.api.set_session(session)
+    username = entry.data[CONF_USERNAME]
+    if (account := accounts.get(username)) is not None:
+        if account.api.credentials_rejected:
+            # Nouveau mot de passe saisi lors de la réauthentification
+            account.api.update_credentials(entry.data[CONF_PASSWORD])
+        # Entrée rechargée après une modification de ses options
+        account.configure(
+            entry.options.get(CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY),
+            entry.options.get(CONF_SLOW_INTERVAL, DEFAULT_SLOW_INTERVAL),
+        )
+        return account
+
+    session_manager = async_acquire_session_manager(
+        hass, entry.options.get(CONF_CONNECTOR_LIMIT)
+    )
+    # Jeton persisté entre les redémarrages, un fichier par compte
+    token_store = Store(
+        hass, STORAGE_VERSION, f"{STORAGE_KEY_TOKEN}_{_account_key(username)}"
+    )
+    api = HypontechAPI(
+        username,
+        entry.data[CONF_PASSWORD],
+        entry.data[CONF_PLANT_ID],
+        session=session_manager.session,
+        store=token_store,
+    )
+    account = HypontechAccount(
+        api,
+        entry.options.get(CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY),
+        entry.options.get(CONF_SLOW_INTERVAL, DEFAULT_SLOW_INTERVAL),
+    )
+    accounts[username] = account
+    await api.async_initialize()
+    return account
+
+
+async def async_release_account(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Retire l'installation de l'entrée et ferme le compte s'il n'est plus utilisé."""
+    accounts: dict[str, HypontechAccount] = hass.data[DOMAIN].get(DATA_ACCOUNTS, {})
+    username = entry.data[CONF_USERNAME]
+    if (account := accounts.get(username)) is None:
+        return
+    account.unregister(entry.data[CONF_PLANT_ID])
+    if not account.plant_ids:
+        accounts.pop(username)
+        await account.api.close()
+        await async_release_session_manager(hass)
@@ -0,0 +1,231 @@
+"""Import de l'historique de production du cloud dans les statistiques."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable, Iterator
+from datetime import date, datetime, time, timedelta, tzinfo
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+
+from .account import HypontechAccount
+from .const import (
+    DEFAULT_BACKFILL_DAYS,
+    HISTORY_BATCH_SIZE,
+    HISTORY_GRANULARITY_DAY,
+    HISTORY_GRANULARITY_HOUR,
+    HISTORY_HOURLY_DAYS,
+    HISTORY_REQUEST_RATE,
+)
+from .energy_statistics import HypontechEnergyStatistics
+from .resilience import RateLimiter
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUR = timedelta(hours=1)
+DAY = timedelta(days=1)
+
+
+class HypontechBackfill:
+    """Importe incrémentalement l'historique d'une installation.
+
+    L'historique est parcouru mois par mois (valeurs journalières) puis, pour
+    les HISTORY_HOURLY_DAYS derniers jours, jour par jour (valeurs horaires).
+    La plage déjà parcourue est mémorisée séparément de la dernière heure
+    importée (que le calcul en direct fait aussi avancer): un import
+    interrompu reprend là où il s'est arrêté et une profondeur plus grande
+    n'ajoute que la période antérieure. Les requêtes sont espacées par un
+    limiteur de débit et les lignes envoyées à l'enregistreur par lots.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        account: HypontechAccount,
+        plant_id: str,
+        statistics: HypontechEnergyStatistics,
+        days: int = DEFAULT_BACKFILL_DAYS,
+    ) -> None:
+        """Initialisation de l'import d'historique."""
+        self._hass = hass
+        self._account = account
+        self._plant_id = plant_id
+        self._statistics = statistics
+        self._days = days
+        self._limiter = RateLimiter(HISTORY_REQUEST_RATE)
+        self._lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        """Indique si un import est en cours."""
+        return self._lock.locked()
+
+    async def async_run(self, days: int | None = None) -> int:
+        """Importe l'historique des `days` derniers jours non encore importés.
+
+        Retourne le nombre d'heures importées.
+        """
+        if self._lock.locked():
+            _LOGGER.debug("Import de l'historique de %s déjà en cours", self._plant_id)
+            return 0
+        async with self._lock:
+            imported = await self._async_run(days or self._days)
+        _LOGGER.info(
+            "Historique de %s: %s valeur(s) importée(s)", self._plant_id, imported
+        )
+        return imported
+
+    async def _async_run(self, days: int) -> int:
+        """Importe la partie de la plage demandée pas encore parcourue."""
+        statistics = self._statistics
+        await statistics.async_load()
+        time_zone = dt_util.get_time_zone(self._hass.config.time_zone)
+        now = dt_util.now(time_zone)
+        # Seules les heures terminées sont importées
+        current_hour = now.replace(minute=0, second=0, microsecond=0)
+        hourly_from = now.date() - timedelta(days=HISTORY_HOURLY_DAYS)
+        start = _start_of_day(now.date() - timedelta(days=days), time_zone)
+
+        imported = 0
+        covered_from = statistics.backfill_from
+        if covered_from is not None and start < covered_from:
+            # Profondeur augmentée: période antérieure à la plage parcourue
+            imported += await self._async_import_range(
+                start, covered_from, hourly_from, time_zone
+            )
+            await statistics.async_set_backfill_progress(
+                start, statistics.backfill_until or covered_from
+            )
+        covered_from = statistics.backfill_from or start
+        if statistics.backfill_until is not None and start > statistics.backfill_until:
+            # Plage parcourue trop ancienne pour rester contiguë
+            covered_from = start
+
+        async def _async_progress(covered_until: datetime) -> None:
+            await statistics.async_set_backfill_progress(covered_from, covered_until)
+
+        resume = start
+        if statistics.backfill_until is not None:
+            resume = max(start, statistics.backfill_until)
+        imported += await self._async_import_range(
+            resume, current_hour, hourly_from, time_zone, _async_progress
+        )
+        return imported
+
+    async def _async_import_range(
+        self,
+        range_start: datetime,
+        range_end: datetime,
+        hourly_from: date,
+        time_zone: tzinfo,
+        progress: Callable[[datetime], Awaitable[None]] | None = None,
+    ) -> int:
+        """Importe l'historique de [range_start, range_end) par lots.
+
+        `progress` reçoit la fin de la plage importée après chaque lot.
+        """
+        if range_start >= range_end:
+            return 0
+        imported = 0
+        batch: list[tuple[datetime, float]] = []
+        span = HOUR
+        # Fin de la dernière période reçue en entier
+        covered: datetime | None = None
+
+        async def _async_flush() -> None:
+            nonlocal batch, imported
+            if batch:
+                imported += await self._statistics.async_import(sorted(batch), span)
+                batch = []
+            if progress is not None and covered is not None:
+                await progress(covered)
+
+        try:
+            for granularity, period, upper_bound in self._periods(
+                range_start.astimezone(time_zone).date(),
+                hourly_from,
+                (range_end - timedelta(seconds=1)).astimezone(time_zone).date(),
+                time_zone,
+                range_end,
+            ):
+                period_span = DAY if granularity == HISTORY_GRANULARITY_DAY else HOUR
+                if period_span != span:
+                    # Les lignes d'un lot couvrent toutes la même durée
+                    await _async_flush()
+                    span = period_span
+                await self._limiter.acquire()
+                records = await self._account.async_get_history(
+                    self._plant_id, granularity, period
+                )
+                upper_bound = min(upper_bound, range_end)
+                batch.extend(
+                    row
+                    for row in _parse_history(records, granularity, time_zone)
+                    if range_start <= row[0] < upper_bound
+                )
+                covered = upper_bound
+                if len(batch) >= HISTORY_BATCH_SIZE:
+                    await _async_flush()
+        finally:
+            # Les lignes déjà reçues sont importées même si une requête échoue,
+            # le prochain import reprend après la dernière période reçue
+            await _async_flush()
+        return imported
+
+    @staticmethod
+    def _periods(
+        start_day: date,
+        hourly_from: date,
+        today: date,
+        time_zone: tzinfo,
+        current_hour: datetime,
+    ) -> Iterator[tuple[str, str, datetime]]:
+        """Périodes à demander, avec la fin (exclue) de la plage qu'elles couvrent."""
+        day = start_day
+        hourly_start = _start_of_day(hourly_from, time_zone)
+        while day < hourly_from and day <= today:
+            next_month = (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+            yield (
+                HISTORY_GRANULARITY_DAY,
+                day.strftime("%Y-%m"),
+                min(_start_of_day(next_month, time_zone), hourly_start),
+            )
+            day = next_month
+        day = max(start_day, hourly_from)
+        while day <= today:
+            next_day = day + timedelta(days=1)
+            yield (
+                HISTORY_GRANULARITY_HOUR,
+                day.isoformat(),
+                min(_start_of_day(next_day, time_zone), current_hour),
+            )
+            day = next_day
+
+
+def _start_of_day(day: date, time_zone: tzinfo) -> datetime:
+    """Minuit local d'un jour."""
+    return datetime.combine(day, time.min, tzinfo=time_zone)
+
+
+def _parse_history(
+    records: list[dict[str, Any]], granularity: str, time_zone: tzinfo
+) -> Iterator[tuple[datetime, float]]:
+    """Convertit l'historique du cloud en lignes (début de période, kWh).
+
+    Les valeurs journalières sont placées sur l'heure de minuit du jour.
+    """
+    for record in records:
+        try:
+            if granularity == HISTORY_GRANULARITY_DAY:
+                start = _start_of_day(date.fromisoformat(record["time"][:10]), time_zone)
+            else:
+                start = datetime.fromisoformat(
+                    record["time"].replace(" ", "T")[:16]
+                ).replace(minute=0, tzinfo=time_zone)
+            energy = float(record.get("energy") or 0)
+        except (KeyError, TypeError, ValueError) as err:
+            _LOGGER.debug("Valeur d'historique ignorée %s: %s", record, err)
+            continue
+        yield start, energy
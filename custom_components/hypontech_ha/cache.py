@@ -0,0 +1,67 @@
+"""Caches en mémoire pour l'intégration Hypontech."""
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+
+class TTLCache:
+    """Cache de valeurs valables pendant une durée limitée."""
+
+    def __init__(self, ttl: float) -> None:
+        """Initialisation du cache avec une durée de vie en secondes."""
+        self.ttl = ttl
+        self._entries: dict[Hashable, tuple[float, Any]] = {}
+
+    def get(self, key: Hashable) -> Any | None:
+        """Retourne la valeur si elle est encore valable."""
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] >= self.ttl:
+            return None
+        return entry[1]
+
+    def get_stale(self, key: Hashable) -> Any | None:
+        """Retourne la dernière valeur connue, même expirée."""
+        entry = self._entries.get(key)
+        return None if entry is None else entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Enregistre une valeur."""
+        self._entries[key] = (time.monotonic(), value)
+
+    def pop(self, key: Hashable) -> None:
+        """Supprime une valeur."""
+        self._entries.pop(key, None)
+
+
+class LRUCache:
+    """Cache de taille bornée: l'entrée la moins récemment utilisée est évincée."""
+
+    def __init__(self, maxsize: int) -> None:
+        """Initialisation du cache avec un nombre maximum d'entrées."""
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Nombre d'entrées en cache."""
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any | None:
+        """Retourne la valeur et la marque comme la plus récemment utilisée."""
+        if key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Enregistre une valeur et évince la plus ancienne si le cache est plein."""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """Supprime une valeur."""
+        self._entries.pop(key, None)
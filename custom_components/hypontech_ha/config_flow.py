@@ -2,44 +2,134 @@
 from __future__ import annotations
 
 import logging
+from collections.abc import Mapping
 from typing import Any
 
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.const import CONF_PASSWORD
-from homeassistant.core import HomeAssistant
+from homeassistant.const import CONF_HOST, CONF_PASSWORD, CONF_PORT, CONF_SCAN_INTERVAL
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
 from homeassistant.exceptions import HomeAssistantError
 
-from .const import DOMAIN, CONF_USERNAME, CONF_PLANT_ID
+from .const import (
+    DOMAIN,
+    CONF_USERNAME,
+    CONF_PLANT_ID,
+    CONF_BACKFILL,
+    CONF_BACKFILL_DAYS,
+    CONF_CONNECTOR_LIMIT,
+    CONF_DEVICE_INTERVAL,
+    CONF_DEVICE_POLLING,
+    CONF_ENERGY_STATE_CLASS,
+    CONF_FAST_START,
+    CONF_GRACE_PERIOD,
+    CONF_HOURLY_STATISTICS,
+    CONF_MAX_CONCURRENCY,
+    CONF_MIN_FRESHNESS,
+    CONF_POLLING_MODE,
+    CONF_SLOW_INTERVAL,
+    CONF_TRANSPORT,
+    CONF_UNIT_ID,
+    DATA_ACCOUNTS,
+    DEFAULT_BACKFILL,
+    DEFAULT_BACKFILL_DAYS,
+    DEFAULT_CONNECTOR_LIMIT,
+    DEFAULT_DEVICE_INTERVAL,
+    DEFAULT_DEVICE_POLLING,
+    DEFAULT_ENERGY_STATE_CLASS,
+    DEFAULT_FAST_START,
+    DEFAULT_GRACE_PERIOD,
+    DEFAULT_HOURLY_STATISTICS,
+    DEFAULT_LOCAL_SCAN_INTERVAL,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_MIN_FRESHNESS,
+    DEFAULT_MODBUS_PORT,
+    DEFAULT_POLLING_MODE,
+    DEFAULT_SLOW_INTERVAL,
+    DEFAULT_UNIT_ID,
+    MODBUS_REGISTERS,
+    POLLING_MODE_FIXED,
+    POLLING_MODE_SOLAR,
+    DEFAULT_SCAN_INTERVAL,
+    TRANSPORT_CLOUD,
+    TRANSPORT_MODBUS,
+)
+from .exceptions import HypontechAuthError, HypontechError
 from .hypontech_api import HypontechAPI
+from .modbus import HypontechModbusClient, plan_reads
+from .session import async_acquire_session_manager, async_release_session_manager
 
 _LOGGER = logging.getLogger(__name__)
 
 
+async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> None:
+    """Teste l'authentification sur la session HTTP partagée.
+
+    Lève `InvalidAuth` si les identifiants sont refusés, `CannotConnect` si
+    l'API ne répond pas correctement.
+    """
+    session_manager = async_acquire_session_manager(hass)
+    api = HypontechAPI(
+        data[CONF_USERNAME],
+        data[CONF_PASSWORD],
+        data[CONF_PLANT_ID],
+        session=session_manager.session,
+    )
+    try:
+        await api._login()
+    except HypontechAuthError as err:
+        raise InvalidAuth from err
+    except HypontechError as err:
+        raise CannotConnect from err
+    finally:
+        # Le client de test ne doit pas laisser de renouvellement de jeton planifié
+        await api.close()
+        await async_release_session_manager(hass)
+
+
+async def validate_local_input(data: dict[str, Any]) -> None:
+    """Teste la lecture des registres de l'onduleur."""
+    client = HypontechModbusClient(data[CONF_HOST], data[CONF_PORT], data[CONF_UNIT_ID])
+    try:
+        for address, count in plan_reads(MODBUS_REGISTERS):
+            await client.async_read_registers(address, count)
+    finally:
+        await client.close()
+
+
 class HypontechConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Gestionnaire de configuration pour Hypontech."""
 
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> HypontechOptionsFlow:
+        """Retourne le gestionnaire d'options."""
+        return HypontechOptionsFlow(config_entry)
+
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
-        """Étape de configuration utilisateur."""
+        """Choix du transport: API cloud ou onduleur sur le réseau local."""
+        return self.async_show_menu(
+            step_id="user", menu_options=[TRANSPORT_CLOUD, "local"]
+        )
+
+    async def async_step_cloud(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Configuration d'une installation via l'API cloud."""
         errors = {}
 
         if user_input is not None:
             try:
-                # Test de connexion
-                api = HypontechAPI(
-                    user_input[CONF_USERNAME],
-                    user_input[CONF_PASSWORD],
-                    user_input[CONF_PLANT_ID]
-                )
-                
                 # Test de l'authentification
-                await api._login()
+                await validate_input(self.hass, user_input)
                 
                 # Création de l'entrée de configuration
                 return self.async_create_entry(
@@ -47,9 +137,11 @@ class HypontechConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     data=user_input,
                 )
                 
-            except Exception as ex:
+            except InvalidAuth:
+                errors["base"] = "invalid_auth"
+            except CannotConnect as ex:
                 errors["base"] = "cannot_connect"
-                _LOGGER.error(f"Erreur de configuration: {ex}")
+                _LOGGER.error("Erreur de configuration: %s", ex.__cause__)
 
         # Schéma de configuration
         data_schema = vol.Schema(
@@ -61,7 +153,7 @@ class HypontechConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
 
         return self.async_show_form(
-            step_id="user",
+            step_id=TRANSPORT_CLOUD,
             data_schema=data_schema,
             errors=errors,
             description_placeholders={
@@ -71,68 +163,263 @@ class HypontechConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             },
         )
 
-    async def async_step_reauth(
+    async def async_step_local(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
-        """Étape de reconfiguration des identifiants."""
+        """Configuration d'un onduleur lu localement en Modbus TCP."""
         errors = {}
 
         if user_input is not None:
+            plant_id = (
+                f"{user_input[CONF_HOST]}:{user_input[CONF_PORT]}:{user_input[CONF_UNIT_ID]}"
+            )
+            await self.async_set_unique_id(plant_id)
+            self._abort_if_unique_id_configured()
             try:
-                # Test de connexion avec les nouveaux identifiants
-                api = HypontechAPI(
-                    user_input[CONF_USERNAME],
-                    user_input[CONF_PASSWORD],
-                    user_input[CONF_PLANT_ID]
-                )
-                
-                # Test de l'authentification
-                await api._login()
-                
-                # Mise à jour de l'entrée de configuration existante
-                existing_entry = self._get_existing_entry()
-                if existing_entry:
-                    self.hass.config_entries.async_update_entry(
-                        existing_entry,
-                        data=user_input,
-                        title=f"Hypontech - {user_input[CONF_USERNAME]}"
-                    )
-                    await self.hass.config_entries.async_reload(existing_entry.entry_id)
-                    return self.async_abort(reason="reauth_successful")
-                
+                await validate_local_input(user_input)
             except Exception as ex:
                 errors["base"] = "cannot_connect"
-                _LOGGER.error(f"Erreur de reconfiguration: {ex}")
+                _LOGGER.error("Erreur de lecture Modbus: %s", ex)
+            else:
+                return self.async_create_entry(
+                    title=f"Hypontech - {user_input[CONF_HOST]}",
+                    data={
+                        **user_input,
+                        CONF_TRANSPORT: TRANSPORT_MODBUS,
+                        CONF_PLANT_ID: plant_id,
+                        CONF_SCAN_INTERVAL: DEFAULT_LOCAL_SCAN_INTERVAL,
+                    },
+                )
 
-        # Schéma de reconfiguration avec les valeurs actuelles pré-remplies
-        existing_entry = self._get_existing_entry()
-        current_data = existing_entry.data if existing_entry else {}
-        
         data_schema = vol.Schema(
             {
-                vol.Required(CONF_USERNAME, default=current_data.get(CONF_USERNAME, "")): str,
-                vol.Required(CONF_PASSWORD, default=""): str,  # Mot de passe vide pour sécurité
-                vol.Required(CONF_PLANT_ID, default=current_data.get(CONF_PLANT_ID, "")): str,
+                vol.Required(CONF_HOST): str,
+                vol.Required(CONF_PORT, default=DEFAULT_MODBUS_PORT): vol.All(
+                    vol.Coerce(int), vol.Range(min=1, max=65535)
+                ),
+                vol.Required(CONF_UNIT_ID, default=DEFAULT_UNIT_ID): vol.All(
+                    vol.Coerce(int), vol.Range(min=0, max=247)
+                ),
             }
         )
 
         return self.async_show_form(
-            step_id="reauth",
+            step_id="local", data_schema=data_schema, errors=errors
+        )
+
+    async def async_step_reauth(self, entry_data: Mapping[str, Any]) -> FlowResult:
+        """Réauthentification demandée après un refus des identifiants."""
+        self._reauth_entry = self.hass.config_entries.async_get_entry(
+            self.context["entry_id"]
+        )
+        return await self.async_step_reauth_confirm()
+
+    async def async_step_reauth_confirm(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Saisie du nouveau mot de passe.
+
+        Le nom d'utilisateur n'est pas modifiable: il identifie le compte
+        partagé, libéré au déchargement d'après les données de l'entrée.
+        """
+        errors = {}
+        entry = self._reauth_entry
+
+        if user_input is not None:
+            data = {**entry.data, CONF_PASSWORD: user_input[CONF_PASSWORD]}
+            try:
+                # Test de l'authentification avec les nouveaux identifiants
+                await validate_input(self.hass, data)
+            except InvalidAuth:
+                errors["base"] = "invalid_auth"
+            except CannotConnect as ex:
+                errors["base"] = "cannot_connect"
+                _LOGGER.error("Erreur de réauthentification: %s", ex.__cause__)
+            else:
+                # Le compte partagé encore chargé ne bloque plus l'authentification,
+                # même si le mot de passe saisi est inchangé
+                accounts = self.hass.data.get(DOMAIN, {}).get(DATA_ACCOUNTS, {})
+                if (account := accounts.get(entry.data[CONF_USERNAME])) is not None:
+                    account.api.update_credentials(data[CONF_PASSWORD])
+                # Les autres installations du même compte reçoivent les mêmes identifiants
+                for other in self.hass.config_entries.async_entries(DOMAIN):
+                    if (
+                        other.entry_id != entry.entry_id
+                        and other.data.get(CONF_USERNAME) == entry.data[CONF_USERNAME]
+                    ):
+                        self.hass.config_entries.async_update_entry(
+                            other,
+                            data={**other.data, CONF_PASSWORD: data[CONF_PASSWORD]},
+                        )
+                        for flow in other.async_get_active_flows(
+                            self.hass, {config_entries.SOURCE_REAUTH}
+                        ):
+                            self.hass.config_entries.flow.async_abort(flow["flow_id"])
+                        self.hass.config_entries.async_schedule_reload(other.entry_id)
+                self.hass.config_entries.async_update_entry(entry, data=data)
+                # Rechargée même sans changement des données, contrairement à
+                # async_update_reload_and_abort
+                self.hass.config_entries.async_schedule_reload(entry.entry_id)
+                return self.async_abort(reason="reauth_successful")
+
+        data_schema = vol.Schema({vol.Required(CONF_PASSWORD): str})
+
+        return self.async_show_form(
+            step_id="reauth_confirm",
             data_schema=data_schema,
             errors=errors,
             description_placeholders={
-                "username": "Votre nom d'utilisateur Hypontech",
-                "password": "Votre mot de passe Hypontech",
-                "plant_id": "ID de votre installation (ex: 1332746207645638656)",
+                "plant_id": entry.data.get(CONF_PLANT_ID, ""),
+                "username": entry.data.get(CONF_USERNAME, ""),
             },
         )
 
-    def _get_existing_entry(self):
-        """Récupère l'entrée de configuration existante."""
-        for entry in self.hass.config_entries.async_entries(DOMAIN):
-            if entry.source == config_entries.SOURCE_USER:
-                return entry
-        return None
+
+class HypontechOptionsFlow(config_entries.OptionsFlow):
+    """Gestionnaire des options Hypontech."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialisation du gestionnaire d'options."""
+        self._entry = config_entry
+
+    async def async_step_init(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Étape de modification des options."""
+        if user_input is not None:
+            self._async_share_options(user_input)
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self._entry.options
+        local = self._entry.data.get(CONF_TRANSPORT) == TRANSPORT_MODBUS
+        schema: dict[Any, Any] = {
+            vol.Optional(
+                CONF_SCAN_INTERVAL,
+                default=options.get(
+                    CONF_SCAN_INTERVAL,
+                    DEFAULT_LOCAL_SCAN_INTERVAL
+                    if local
+                    else int(DEFAULT_SCAN_INTERVAL.total_seconds()),
+                ),
+            ): vol.All(vol.Coerce(int), vol.Range(min=1 if local else 10)),
+        }
+        if not local:
+            schema[
+                vol.Optional(
+                    CONF_SLOW_INTERVAL,
+                    default=options.get(CONF_SLOW_INTERVAL, DEFAULT_SLOW_INTERVAL),
+                )
+            ] = vol.All(vol.Coerce(int), vol.Range(min=60))
+        schema.update(
+            {
+                vol.Optional(
+                    CONF_POLLING_MODE,
+                    default=options.get(CONF_POLLING_MODE, DEFAULT_POLLING_MODE),
+                ): vol.In(
+                    {
+                        POLLING_MODE_FIXED: "Intervalle fixe",
+                        POLLING_MODE_SOLAR: "Adaptatif (soleil et puissance)",
+                    }
+                ),
+                vol.Optional(
+                    CONF_FAST_START,
+                    default=options.get(CONF_FAST_START, DEFAULT_FAST_START),
+                ): bool,
+                vol.Optional(
+                    CONF_MIN_FRESHNESS,
+                    default=options.get(CONF_MIN_FRESHNESS, DEFAULT_MIN_FRESHNESS),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=3600)),
+                vol.Optional(
+                    CONF_GRACE_PERIOD,
+                    default=options.get(CONF_GRACE_PERIOD, DEFAULT_GRACE_PERIOD),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=86400)),
+            }
+        )
+        # Onduleurs, historique et session HTTP ne concernent que l'API cloud
+        if not local:
+            schema.update(
+                {
+                    vol.Optional(
+                        CONF_DEVICE_POLLING,
+                        default=options.get(CONF_DEVICE_POLLING, DEFAULT_DEVICE_POLLING),
+                    ): bool,
+                    vol.Optional(
+                        CONF_DEVICE_INTERVAL,
+                        default=options.get(CONF_DEVICE_INTERVAL, DEFAULT_DEVICE_INTERVAL),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=30)),
+                    vol.Optional(
+                        CONF_BACKFILL,
+                        default=options.get(CONF_BACKFILL, DEFAULT_BACKFILL),
+                    ): bool,
+                    vol.Optional(
+                        CONF_BACKFILL_DAYS,
+                        default=options.get(CONF_BACKFILL_DAYS, DEFAULT_BACKFILL_DAYS),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=3650)),
+                }
+            )
+        schema.update(
+            {
+                vol.Optional(
+                    CONF_HOURLY_STATISTICS,
+                    default=options.get(
+                        CONF_HOURLY_STATISTICS, DEFAULT_HOURLY_STATISTICS
+                    ),
+                ): bool,
+                vol.Optional(
+                    CONF_ENERGY_STATE_CLASS,
+                    default=options.get(
+                        CONF_ENERGY_STATE_CLASS, DEFAULT_ENERGY_STATE_CLASS
+                    ),
+                ): bool,
+            }
+        )
+        if not local:
+            schema.update(
+                {
+                    vol.Optional(
+                        CONF_CONNECTOR_LIMIT,
+                        default=options.get(CONF_CONNECTOR_LIMIT, DEFAULT_CONNECTOR_LIMIT),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=100)),
+                    vol.Optional(
+                        CONF_MAX_CONCURRENCY,
+                        default=options.get(CONF_MAX_CONCURRENCY, DEFAULT_MAX_CONCURRENCY),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=50)),
+                }
+            )
+        data_schema = vol.Schema(schema)
+
+        return self.async_show_form(step_id="init", data_schema=data_schema)
+
+    @callback
+    def _async_share_options(self, user_input: dict[str, Any]) -> None:
+        """Recopie les options communes dans les autres entrées cloud.
+
+        Le pool HTTP est partagé par toute l'intégration et le client d'un
+        compte par ses installations: les entrées concernées gardent les mêmes
+        valeurs, quel que soit l'ordre dans lequel elles sont chargées.
+        """
+        integration_wide = {
+            key: user_input[key] for key in (CONF_CONNECTOR_LIMIT,) if key in user_input
+        }
+        account_wide = {
+            key: user_input[key]
+            for key in (CONF_MAX_CONCURRENCY, CONF_SLOW_INTERVAL)
+            if key in user_input
+        }
+        username = self._entry.data.get(CONF_USERNAME)
+        for other in self.hass.config_entries.async_entries(DOMAIN):
+            if (
+                other.entry_id == self._entry.entry_id
+                or other.data.get(CONF_TRANSPORT) == TRANSPORT_MODBUS
+            ):
+                continue
+            shared = dict(integration_wide)
+            if other.data.get(CONF_USERNAME) == username:
+                shared.update(account_wide)
+            if shared:
+                self.hass.config_entries.async_update_entry(
+                    other, options={**other.options, **shared}
+                )
 
 
 class CannotConnect(HomeAssistantError):
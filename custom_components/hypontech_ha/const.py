@@ -7,13 +7,175 @@ DOMAIN = "hypontech_ha"
 CONF_USERNAME = "username"
 CONF_PLANT_ID = "plant_id"
 DEFAULT_SCAN_INTERVAL = timedelta(minutes=1)
+CONF_CONNECTOR_LIMIT = "connector_limit"
+DEFAULT_CONNECTOR_LIMIT = 10
+CONF_MAX_CONCURRENCY = "max_concurrency"
+DEFAULT_MAX_CONCURRENCY = 4
+CONF_POLLING_MODE = "polling_mode"
+POLLING_MODE_FIXED = "fixed"
+POLLING_MODE_SOLAR = "solar"
+DEFAULT_POLLING_MODE = POLLING_MODE_FIXED
+
+CONF_FAST_START = "fast_start"
+DEFAULT_FAST_START = False
+CONF_SLOW_INTERVAL = "slow_interval"
+DEFAULT_SLOW_INTERVAL = 900
+CONF_DEVICE_POLLING = "device_polling"
+DEFAULT_DEVICE_POLLING = False
+CONF_DEVICE_INTERVAL = "device_interval"
+DEFAULT_DEVICE_INTERVAL = 300
+CONF_BACKFILL = "backfill"
+DEFAULT_BACKFILL = False
+CONF_BACKFILL_DAYS = "backfill_days"
+DEFAULT_BACKFILL_DAYS = 365
+CONF_HOURLY_STATISTICS = "hourly_statistics"
+DEFAULT_HOURLY_STATISTICS = False
+CONF_ENERGY_STATE_CLASS = "energy_state_class"
+DEFAULT_ENERGY_STATE_CLASS = True
+CONF_MIN_FRESHNESS = "min_freshness"
+DEFAULT_MIN_FRESHNESS = 30
+CONF_GRACE_PERIOD = "grace_period"
+DEFAULT_GRACE_PERIOD = 600
+
+# Transport: API cloud ou lecture locale des registres en Modbus TCP
+CONF_TRANSPORT = "transport"
+TRANSPORT_CLOUD = "cloud"
+TRANSPORT_MODBUS = "modbus"
+CONF_UNIT_ID = "unit_id"
+DEFAULT_MODBUS_PORT = 502
+DEFAULT_UNIT_ID = 1
+DEFAULT_LOCAL_SCAN_INTERVAL = 5
+
+# Niveaux de rafraîchissement: aperçu temps réel à chaque cycle,
+# production détaillée (agrégats) à l'intervalle lent
+TIER_FAST = "fast"
+TIER_SLOW = "slow"
+ALL_TIERS = frozenset({TIER_FAST, TIER_SLOW})
+
+# Planification adaptative
+NIGHT_SCAN_INTERVAL = timedelta(minutes=15)
+MIN_SCAN_INTERVAL = timedelta(seconds=30)
+# Variation relative de puissance entre deux mesures considérée comme rapide
+FAST_CHANGE_RATIO = 0.25
+# Décalage aléatoire des rafraîchissements: fraction de l'intervalle, plafonnée (secondes)
+STAGGER_JITTER_RATIO = 0.05
+STAGGER_MAX_JITTER = 5.0
+# Sources faisant leur premier rafraîchissement en même temps au démarrage
+STARTUP_CONCURRENCY = 4
+# Intervalle minimum entre deux relevés, dimensionne les tampons des fenêtres glissantes
+ROLLING_SAMPLE_INTERVAL = 10
+
+# Onduleurs d'une installation
+# Numéros de série par requête temps réel groupée
+DEVICE_BATCH_SIZE = 20
+# Intervalle de redécouverte de la liste des onduleurs (secondes)
+DEVICE_DISCOVERY_INTERVAL = 3600
+
+# Lecture locale en Modbus TCP
+# Registres inutilisés tolérés entre deux plages lues dans la même requête
+MODBUS_MAX_GAP = 16
+# Nombre maximum de registres par requête (limite du protocole)
+MODBUS_MAX_READ = 125
+# Carte des registres de maintien: adresse, nombre de mots (poids fort en
+# premier) et facteur d'échelle vers l'unité des capteurs
+MODBUS_REGISTERS = {
+    "status": {"address": 0x0000, "count": 1},
+    "power": {"address": 0x0010, "count": 2, "scale": 1},
+    "e_today": {"address": 0x0012, "count": 1, "scale": 0.1},
+    "e_total": {"address": 0x0013, "count": 2, "scale": 0.1},
+}
+# Codes d'état de l'onduleur
+MODBUS_STATUS = {0: "wait", 1: "normal", 2: "fault", 3: "offline"}
+
+# Import de l'historique dans les statistiques à long terme
+HISTORY_GRANULARITY_HOUR = "hour"
+HISTORY_GRANULARITY_DAY = "day"
+HISTORY_GRANULARITY_POWER = "power"
+HISTORY_GRANULARITY_MONTH = "month"
+HISTORY_GRANULARITY_YEAR = "year"
+# Jours récents importés heure par heure, les plus anciens jour par jour
+HISTORY_HOURLY_DAYS = 30
+# Lignes de statistiques envoyées à l'enregistreur par lot
+HISTORY_BATCH_SIZE = 720
+# Débit maximum des requêtes d'historique (requêtes par seconde)
+HISTORY_REQUEST_RATE = 2.0
+# Nombre maximum d'intervalles manquants mémorisés par statistique
+STATISTICS_MAX_GAPS = 100
+
+# Service de consultation de l'historique
+# Nombre de séries conservées en mémoire
+HISTORY_CACHE_SIZE = 256
+# Durée de validité de la série de la période en cours (secondes)
+HISTORY_CURRENT_TTL = 300
+
+# Mesures de performance
+# Bornes de l'histogramme des latences (millisecondes)
+METRICS_LATENCY_BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+# Fenêtre des latences récentes (secondes) et nombre maximum de requêtes conservées
+METRICS_WINDOW = 3600
+METRICS_WINDOW_CAPACITY = 512
+
+# Services
+SERVICE_BACKFILL = "backfill"
+SERVICE_PROFILE = "profile"
+SERVICE_GET_HISTORY = "get_history"
+ATTR_DAYS = "days"
+ATTR_GRANULARITY = "granularity"
+ATTR_PERIOD = "period"
+ATTR_CYCLES = "cycles"
+DEFAULT_PROFILE_CYCLES = 3
+# Durée maximum d'un profilage (secondes)
+PROFILE_TIMEOUT = 3600
+
+# Données partagées dans hass.data[DOMAIN]
+DATA_SESSION = "session"
+DATA_ACCOUNTS = "accounts"
+DATA_STAGGER = "stagger"
+DATA_HISTORY = "history"
 
 # API
 API_BASE_URL = "https://api.hypon.cloud/v2"
 API_LOGIN_URL = f"{API_BASE_URL}/login"
 API_OVERVIEW_URL = f"{API_BASE_URL}/plant/overview"
+API_TIMEOUT = 10
+
+# Nouvelles tentatives et disjoncteur (secondes)
+RETRY_MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 30.0
+# Temps maximum consacré aux nouvelles tentatives d'une requête
+RETRY_BUDGET = 20.0
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RECOVERY_TIMEOUT = 60.0
+
+# Jeton d'authentification (secondes)
+TOKEN_REFRESH_MARGIN = 300
+TOKEN_EXPIRY_SAFETY = 5
+TOKEN_MIN_LIFETIME = 60
+
+# Stockage
+STORAGE_VERSION = 1
+STORAGE_KEY_TOKEN = f"{DOMAIN}.token"
+STORAGE_KEY_SNAPSHOT = f"{DOMAIN}.snapshot"
+# Délai de regroupement des écritures de l'instantané (secondes)
+SNAPSHOT_SAVE_DELAY = 60
+STORAGE_KEY_STATISTICS = f"{DOMAIN}.statistics"
+STORAGE_KEY_HISTORY = f"{DOMAIN}.history"
+
+# Session HTTP
+DNS_CACHE_TTL = 300
+KEEPALIVE_TIMEOUT = 60
+
+# Points d'accès de l'API alimentant les capteurs
+ENDPOINT_OVERVIEW = "overview"
+ENDPOINT_PRODUCTION = "production2"
 
 # Capteurs
+# "endpoint": point d'accès dont la réponse fournit la valeur, "field"
+# (optionnel): nom du champ dans la réponse s'il diffère de la clé du capteur.
+# Ajouter un champ de l'API revient à ajouter une entrée ici.
+# "tolerance" (optionnelle): écart en dessous duquel une nouvelle valeur
+# n'est pas considérée comme un changement et n'entraîne pas d'écriture d'état
 SENSOR_TYPES = {
     "e_total": {
         "name": "Énergie Totale",
@@ -21,6 +183,8 @@ SENSOR_TYPES = {
         "icon": "mdi:lightning-bolt",
         "device_class": "energy",
         "state_class": "total_increasing",
+        "tier": TIER_FAST,
+        "endpoint": ENDPOINT_OVERVIEW,
     },
     "e_today": {
         "name": "Énergie Aujourd'hui",
@@ -28,6 +192,8 @@ SENSOR_TYPES = {
         "icon": "mdi:lightning-bolt",
         "device_class": "energy",
         "state_class": "total_increasing",
+        "tier": TIER_FAST,
+        "endpoint": ENDPOINT_OVERVIEW,
     },
     "total_co2": {
         "name": "CO2 Évité Total",
@@ -35,6 +201,8 @@ SENSOR_TYPES = {
         "icon": "mdi:molecule-co2",
         "device_class": None,
         "state_class": "total_increasing",
+        "tier": TIER_FAST,
+        "endpoint": ENDPOINT_OVERVIEW,
     },
     "total_tree": {
         "name": "Arbres Équivalents",
@@ -42,6 +210,8 @@ SENSOR_TYPES = {
         "icon": "mdi:tree",
         "device_class": None,
         "state_class": "total_increasing",
+        "tier": TIER_FAST,
+        "endpoint": ENDPOINT_OVERVIEW,
     },
     "power": {
         "name": "Puissance Actuelle",
@@ -49,6 +219,8 @@ SENSOR_TYPES = {
         "icon": "mdi:flash",
         "device_class": "power",
         "state_class": "measurement",
+        "tier": TIER_FAST,
+        "endpoint": ENDPOINT_OVERVIEW,
     },
     "normal_dev_num": {
         "name": "Appareils Normaux",
@@ -56,6 +228,8 @@ SENSOR_TYPES = {
         "icon": "mdi:check-circle",
         "device_class": None,
         "state_class": "measurement",
+        "tier": TIER_FAST,
+        "endpoint": ENDPOINT_OVERVIEW,
     },
     "offline_dev_num": {
         "name": "Appareils Hors Ligne",
@@ -63,6 +237,8 @@ SENSOR_TYPES = {
         "icon": "mdi:close-circle",
         "device_class": None,
         "state_class": "measurement",
+        "tier": TIER_FAST,
+        "endpoint": ENDPOINT_OVERVIEW,
     },
     "fault_dev_num": {
         "name": "Appareils en Erreur",
@@ -70,6 +246,8 @@ SENSOR_TYPES = {
         "icon": "mdi:alert-circle",
         "device_class": None,
         "state_class": "measurement",
+        "tier": TIER_FAST,
+        "endpoint": ENDPOINT_OVERVIEW,
     },
     "wait_dev_num": {
         "name": "Appareils en Attente",
@@ -77,6 +255,8 @@ SENSOR_TYPES = {
         "icon": "mdi:clock",
         "device_class": None,
         "state_class": "measurement",
+        "tier": TIER_FAST,
+        "endpoint": ENDPOINT_OVERVIEW,
     },
     "capacity": {
         "name": "Capacité",
@@ -84,6 +264,8 @@ SENSOR_TYPES = {
         "icon": "mdi:gauge",
         "device_class": "power",
         "state_class": "measurement",
+        "tier": TIER_FAST,
+        "endpoint": ENDPOINT_OVERVIEW,
     },
     # Nouveaux capteurs pour l'endpoint production2
     "today_generation": {
@@ -92,6 +274,8 @@ SENSOR_TYPES = {
         "icon": "mdi:solar-panel",
         "device_class": "energy",
         "state_class": "total_increasing",
+        "tier": TIER_SLOW,
+        "endpoint": ENDPOINT_PRODUCTION,
     },
     "month_generation": {
         "name": "Génération du Mois",
@@ -99,6 +283,8 @@ SENSOR_TYPES = {
         "icon": "mdi:calendar-month",
         "device_class": "energy",
         "state_class": "total_increasing",
+        "tier": TIER_SLOW,
+        "endpoint": ENDPOINT_PRODUCTION,
     },
     "year_generation": {
         "name": "Génération de l'Année",
@@ -106,6 +292,8 @@ SENSOR_TYPES = {
         "icon": "mdi:calendar-year",
         "device_class": "energy",
         "state_class": "total_increasing",
+        "tier": TIER_SLOW,
+        "endpoint": ENDPOINT_PRODUCTION,
     },
     "total_generation": {
         "name": "Génération Totale",
@@ -113,6 +301,8 @@ SENSOR_TYPES = {
         "icon": "mdi:lightning-bolt-circle",
         "device_class": "energy",
         "state_class": "total_increasing",
+        "tier": TIER_SLOW,
+        "endpoint": ENDPOINT_PRODUCTION,
     },
     "co2_saved": {
         "name": "CO2 Évité",
@@ -120,6 +310,9 @@ SENSOR_TYPES = {
         "icon": "mdi:molecule-co2",
         "device_class": None,
         "state_class": "total_increasing",
+        "tier": TIER_SLOW,
+        "endpoint": ENDPOINT_PRODUCTION,
+        "field": "co2",
     },
     "tree_equivalent": {
         "name": "Équivalent Arbres",
@@ -127,6 +320,9 @@ SENSOR_TYPES = {
         "icon": "mdi:tree",
         "device_class": None,
         "state_class": "total_increasing",
+        "tier": TIER_SLOW,
+        "endpoint": ENDPOINT_PRODUCTION,
+        "field": "tree",
     },
     "diesel_saved": {
         "name": "Diesel Économisé",
@@ -134,6 +330,9 @@ SENSOR_TYPES = {
         "icon": "mdi:fuel",
         "device_class": None,
         "state_class": "total_increasing",
+        "tier": TIER_SLOW,
+        "endpoint": ENDPOINT_PRODUCTION,
+        "field": "diesel",
     },
     "today_revenue": {
         "name": "Revenus Aujourd'hui",
@@ -141,6 +340,8 @@ SENSOR_TYPES = {
         "icon": "mdi:currency-eur",
         "device_class": "monetary",
         "state_class": "total_increasing",
+        "tier": TIER_SLOW,
+        "endpoint": ENDPOINT_PRODUCTION,
     },
     "month_revenue": {
         "name": "Revenus du Mois",
@@ -148,6 +349,8 @@ SENSOR_TYPES = {
         "icon": "mdi:calendar-month",
         "device_class": "monetary",
         "state_class": "total_increasing",
+        "tier": TIER_SLOW,
+        "endpoint": ENDPOINT_PRODUCTION,
     },
     "total_revenue": {
         "name": "Revenus Totaux",
@@ -155,5 +358,175 @@ SENSOR_TYPES = {
         "icon": "mdi:bank",
         "device_class": "monetary",
         "state_class": "total_increasing",
+        "tier": TIER_SLOW,
+        "endpoint": ENDPOINT_PRODUCTION,
+    },
+}
+
+# Statistiques glissantes calculées en mémoire à chaque relevé
+# "source": champ suivi, "window": durée de la fenêtre en secondes (aucune pour
+# le pic du jour), "statistic": mean, min, max ou peak
+ROLLING_SENSOR_TYPES = {
+    "power_mean_5min": {
+        "name": "Puissance Moyenne 5 min",
+        "unit": "W",
+        "icon": "mdi:chart-bell-curve-cumulative",
+        "device_class": "power",
+        "state_class": "measurement",
+        "tier": TIER_FAST,
+        "source": "power",
+        "window": 300,
+        "statistic": "mean",
+    },
+    "power_mean_1h": {
+        "name": "Puissance Moyenne 1 h",
+        "unit": "W",
+        "icon": "mdi:chart-bell-curve-cumulative",
+        "device_class": "power",
+        "state_class": "measurement",
+        "tier": TIER_FAST,
+        "source": "power",
+        "window": 3600,
+        "statistic": "mean",
+    },
+    "power_min_1h": {
+        "name": "Puissance Minimum 1 h",
+        "unit": "W",
+        "icon": "mdi:arrow-collapse-down",
+        "device_class": "power",
+        "state_class": "measurement",
+        "tier": TIER_FAST,
+        "source": "power",
+        "window": 3600,
+        "statistic": "min",
+    },
+    "power_max_1h": {
+        "name": "Puissance Maximum 1 h",
+        "unit": "W",
+        "icon": "mdi:arrow-collapse-up",
+        "device_class": "power",
+        "state_class": "measurement",
+        "tier": TIER_FAST,
+        "source": "power",
+        "window": 3600,
+        "statistic": "max",
+    },
+    "power_peak_today": {
+        "name": "Pic de Puissance Aujourd'hui",
+        "unit": "W",
+        "icon": "mdi:summit",
+        "device_class": "power",
+        "state_class": "measurement",
+        "tier": TIER_FAST,
+        "source": "power",
+        "window": None,
+        "statistic": "peak",
+    },
+}
+
+# Capteurs de diagnostic
+# Latences: moyenne de la dernière heure; compteurs: depuis le démarrage
+DIAGNOSTIC_SENSOR_TYPES = {
+    "saved_requests": {
+        "name": "Requêtes Économisées",
+        "unit": "requêtes",
+        "icon": "mdi:sleep",
+        "state_class": "measurement",
+    },
+    "skipped_writes": {
+        "name": "Écritures Évitées",
+        "unit": "écritures",
+        "icon": "mdi:database-off",
+        "state_class": "total_increasing",
+        "enabled": False,
+    },
+    "coalesced_refreshes": {
+        "name": "Rafraîchissements Regroupés",
+        "unit": "demandes",
+        "icon": "mdi:call-merge",
+        "state_class": "total_increasing",
+        "enabled": False,
+    },
+    "latency_overview": {
+        "name": "Latence Aperçu",
+        "unit": "ms",
+        "icon": "mdi:timer-outline",
+        "state_class": "measurement",
+        "enabled": False,
+    },
+    "latency_production2": {
+        "name": "Latence Production",
+        "unit": "ms",
+        "icon": "mdi:timer-outline",
+        "state_class": "measurement",
+        "enabled": False,
+    },
+    "api_requests": {
+        "name": "Requêtes API",
+        "unit": "requêtes",
+        "icon": "mdi:swap-vertical",
+        "state_class": "total_increasing",
+        "enabled": False,
+    },
+    "api_errors": {
+        "name": "Erreurs API",
+        "unit": "requêtes",
+        "icon": "mdi:alert-circle-outline",
+        "state_class": "total_increasing",
+        "enabled": False,
+    },
+    "logins": {
+        "name": "Authentifications",
+        "unit": "connexions",
+        "icon": "mdi:login",
+        "state_class": "total_increasing",
+        "enabled": False,
+    },
+    "retries": {
+        "name": "Nouvelles Tentatives",
+        "unit": "requêtes",
+        "icon": "mdi:refresh",
+        "state_class": "total_increasing",
+        "enabled": False,
+    },
+    "last_success": {
+        "name": "Dernier Rafraîchissement Réussi",
+        "unit": None,
+        "icon": "mdi:clock-check-outline",
+        "state_class": None,
+        "device_class": "timestamp",
+        "enabled": False,
+    },
+}
+
+# Capteurs par onduleur, alimentés par la requête temps réel groupée
+DEVICE_SENSOR_TYPES = {
+    "power": {
+        "name": "Puissance",
+        "unit": "W",
+        "icon": "mdi:solar-power",
+        "device_class": "power",
+        "state_class": "measurement",
+    },
+    "e_today": {
+        "name": "Énergie Aujourd'hui",
+        "unit": "kWh",
+        "icon": "mdi:calendar-today",
+        "device_class": "energy",
+        "state_class": "total_increasing",
+    },
+    "e_total": {
+        "name": "Énergie Totale",
+        "unit": "kWh",
+        "icon": "mdi:lightning-bolt",
+        "device_class": "energy",
+        "state_class": "total_increasing",
+    },
+    "status": {
+        "name": "Statut",
+        "unit": None,
+        "icon": "mdi:information-outline",
+        "device_class": None,
+        "state_class": None,
     },
-} 
+}
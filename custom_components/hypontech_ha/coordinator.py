@@ -0,0 +1,314 @@
+"""Coordinateur de données pour l'intégration Hypontech."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .account import HypontechAccount
+from .const import (
+    ALL_TIERS,
+    DOMAIN,
+    ROLLING_SAMPLE_INTERVAL,
+    ROLLING_SENSOR_TYPES,
+    SNAPSHOT_SAVE_DELAY,
+    TIER_SLOW,
+)
+from .descriptions import SENSOR_DESCRIPTIONS
+from .exceptions import HypontechAuthError
+from .profiler import PHASE_DISPATCH
+from .rolling import RollingStatistics
+from .scheduler import SolarAwareScheduler
+
+if TYPE_CHECKING:
+    from .backfill import HypontechBackfill
+    from .devices import HypontechDeviceCoordinator
+    from .energy_statistics import HypontechEnergyStatistics
+    from .local import HypontechLocalSource
+    from .stagger import RefreshStagger
+
+_LOGGER = logging.getLogger(__name__)
+
+# Champs et tolérance de comparaison par niveau de rafraîchissement
+_TIER_FIELDS: dict[str, list[tuple[str, float]]] = {}
+for _description in SENSOR_DESCRIPTIONS.values():
+    _TIER_FIELDS.setdefault(_description.tier, []).append(
+        (_description.key, _description.tolerance)
+    )
+
+
+class HypontechDataUpdateCoordinator(DataUpdateCoordinator[dict[str, Any]]):
+    """Coordinateur des données d'une installation Hypontech."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        account: HypontechAccount | HypontechLocalSource,
+        plant_id: str,
+        update_interval: timedelta,
+        scheduler: SolarAwareScheduler | None = None,
+        snapshot_store: Store | None = None,
+        min_freshness: timedelta = timedelta(0),
+        grace_period: timedelta = timedelta(0),
+    ) -> None:
+        """Initialisation du coordinateur."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN}_{plant_id}",
+            update_interval=update_interval,
+        )
+        self.account = account
+        self.plant_id = plant_id
+        self.scheduler = scheduler
+        self.base_interval = update_interval
+        # Répartition des rafraîchissements entre les entrées
+        self.stagger: RefreshStagger | None = None
+        self._snapshot_store = snapshot_store
+        # Données restaurées depuis le disque, pas encore confirmées par l'API
+        self.stale = False
+        self.data_timestamp: str | None = None
+        self.last_success: datetime | None = None
+        # Niveaux de rafraîchissement mis à jour par la dernière donnée reçue
+        self.refreshed_tiers: frozenset[str] = ALL_TIERS
+        # Champs modifiés par la dernière donnée reçue et dernières valeurs notifiées
+        self.changed_fields: frozenset[str] = frozenset()
+        self._notified_values: dict[str, Any] = {}
+        # Écritures d'état évitées par les capteurs dont la valeur n'a pas changé
+        self.skipped_writes = 0
+        # Demandes de rafraîchissement servies par des données assez récentes
+        # ou par un rafraîchissement déjà en cours
+        self.min_freshness = min_freshness
+        self.coalesced_refreshes = 0
+        self._requested_refresh: asyncio.Task[None] | None = None
+        # Après un échec, les dernières données restent servies pendant grace_period
+        self.grace_period = grace_period
+        self._unsub_grace: Callable[[], None] | None = None
+        # Moyennes, extrêmes et pics calculés en mémoire sur les derniers relevés
+        self.rolling = RollingStatistics(
+            ROLLING_SENSOR_TYPES,
+            min(update_interval.total_seconds(), ROLLING_SAMPLE_INTERVAL),
+        )
+        # Coordinateur des onduleurs quand leur interrogation est activée
+        self.device_coordinator: HypontechDeviceCoordinator | None = None
+        # Import de l'historique quand l'enregistreur est disponible
+        self.backfill: HypontechBackfill | None = None
+        # Statistiques horaires calculées à partir de l'énergie du jour
+        self.statistics: HypontechEnergyStatistics | None = None
+        account.register(plant_id, self)
+
+    @property
+    def diagnostics(self) -> dict[str, Any]:
+        """Valeurs exposées par les capteurs de diagnostic."""
+        diagnostics: dict[str, Any] = {
+            "skipped_writes": self.skipped_writes,
+            "coalesced_refreshes": self.coalesced_refreshes,
+        }
+        if self.scheduler is not None:
+            diagnostics["saved_requests"] = self.scheduler.saved_requests_today
+        metrics = self.account.api.metrics
+        diagnostics.update(
+            {
+                "latency_overview": metrics.latency("overview"),
+                "latency_production2": metrics.latency("production2"),
+                "api_requests": metrics.requests,
+                "api_errors": metrics.errors,
+                "logins": metrics.logins,
+                "retries": metrics.retries,
+                "last_success": self.last_success,
+            }
+        )
+        return diagnostics
+
+    @property
+    def available(self) -> bool:
+        """Données utilisables: dernier rafraîchissement réussi ou échec récent.
+
+        Un échec passager ne rend pas les capteurs indisponibles tant que le
+        dernier succès date de moins de `grace_period`.
+        """
+        if self.last_update_success:
+            return True
+        return (
+            self.last_success is not None
+            and dt_util.utcnow() - self.last_success < self.grace_period
+        )
+
+    @property
+    def data_age(self) -> float | None:
+        """Âge des dernières données reçues de l'API (secondes)."""
+        if self.last_success is None:
+            return None
+        return round((dt_util.utcnow() - self.last_success).total_seconds())
+
+    async def async_restore_snapshot(self) -> bool:
+        """Restaure les dernières données connues; retourne True si possible."""
+        if self._snapshot_store is None:
+            return False
+        snapshot = await self._snapshot_store.async_load()
+        if not snapshot or not snapshot.get("data"):
+            return False
+        self.data = snapshot["data"]
+        self.data_timestamp = snapshot.get("timestamp")
+        self.stale = True
+        self.changed_fields = self._changed_fields(self.data)
+        _LOGGER.debug(
+            "Données de %s restaurées (%s)", self.plant_id, self.data_timestamp
+        )
+        return True
+
+    def _snapshot_data(self) -> dict[str, Any]:
+        """Instantané persisté des dernières données."""
+        return {"data": self.data, "timestamp": self.data_timestamp}
+
+    async def _async_update_data(self) -> dict[str, Any]:
+        """Récupère les données de l'installation via le client de compte."""
+        try:
+            data = await self.account.async_get_plant_data(self.plant_id)
+        except HypontechAuthError as err:
+            # Arrêt des interrogations et lancement de la réauthentification
+            raise ConfigEntryAuthFailed(str(err)) from err
+        except Exception as err:
+            raise UpdateFailed(str(err)) from err
+        self._async_process_data(data)
+        return data
+
+    async def async_request_refresh(self) -> None:
+        """Rafraîchissement demandé par `homeassistant.update_entity` ou une automatisation.
+
+        Une demande reçue moins de `min_freshness` après le dernier
+        rafraîchissement réussi est servie par les données courantes; les
+        demandes simultanées attendent toutes le même rafraîchissement. Une
+        rafale de demandes sur les capteurs d'une installation coûte donc au
+        plus un aller-retour.
+        """
+        if self._requested_refresh is None:
+            if (
+                self.last_update_success
+                and self.last_success is not None
+                and dt_util.utcnow() - self.last_success < self.min_freshness
+            ):
+                self.coalesced_refreshes += 1
+                return
+            self._requested_refresh = self.hass.async_create_task(
+                self._async_requested_refresh()
+            )
+        else:
+            self.coalesced_refreshes += 1
+        await asyncio.shield(self._requested_refresh)
+
+    async def _async_requested_refresh(self) -> None:
+        """Rafraîchissement partagé par les demandes simultanées."""
+        try:
+            await self.async_refresh()
+        finally:
+            self._requested_refresh = None
+
+    @callback
+    def async_set_updated_data(self, data: dict[str, Any]) -> None:
+        """Reçoit des données récupérées par le cycle d'une autre installation."""
+        self._async_process_data(data)
+        super().async_set_updated_data(data)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notifie les entités, en mesurant la diffusion pendant un profilage."""
+        if self.last_update_success:
+            self._async_cancel_grace()
+        elif self._unsub_grace is None and self.available:
+            # Les capteurs deviennent indisponibles à la fin de la période de
+            # grâce, même si plus aucun rafraîchissement n'a lieu
+            self._unsub_grace = async_call_later(
+                self.hass,
+                self.grace_period - (dt_util.utcnow() - self.last_success),
+                self._async_grace_expired,
+            )
+        profiler = self.account.api.profiler
+        if profiler is None:
+            super().async_update_listeners()
+            return
+        start = time.perf_counter()
+        super().async_update_listeners()
+        profiler.record(PHASE_DISPATCH, self.plant_id, start, time.perf_counter())
+        profiler.cycle_done(self.plant_id)
+
+    @callback
+    def _async_grace_expired(self, _now: datetime) -> None:
+        """Fin de la période de grâce sans rafraîchissement réussi."""
+        self._unsub_grace = None
+        if not self.last_update_success:
+            super().async_update_listeners()
+
+    @callback
+    def _async_cancel_grace(self) -> None:
+        """Annule la fin de période de grâce planifiée."""
+        if self._unsub_grace is not None:
+            self._unsub_grace()
+            self._unsub_grace = None
+
+    async def async_shutdown(self) -> None:
+        """Arrêt du coordinateur."""
+        self._async_cancel_grace()
+        await super().async_shutdown()
+
+    @callback
+    def _async_process_data(self, data: dict[str, Any]) -> None:
+        """Traitements communs à toute nouvelle donnée."""
+        self.refreshed_tiers = self.account.refreshed_tiers(self.plant_id)
+        data.update(self.rolling.update(dt_util.utcnow(), data))
+        self.changed_fields = self._changed_fields(data)
+        self.stale = False
+        self.last_success = dt_util.utcnow()
+        self.data_timestamp = self.last_success.isoformat()
+        if self._snapshot_store is not None:
+            self._snapshot_store.async_delay_save(self._snapshot_data, SNAPSHOT_SAVE_DELAY)
+        # L'intervalle est appliqué à la planification qui suit cette mise à jour
+        interval = self.base_interval
+        if self.scheduler is not None:
+            interval = self.scheduler.async_next_interval(data)
+        if self.stagger is not None:
+            interval = self.stagger.next_interval(self.account, interval)
+        self.update_interval = interval
+        # Génération du jour de l'installation: `e_today` provient de l'aperçu
+        # du compte et cumule toutes ses installations
+        if self.statistics is not None and TIER_SLOW in self.refreshed_tiers:
+            rows = self.statistics.async_add_sample(
+                dt_util.utcnow(), float(data.get("today_generation") or 0)
+            )
+            if rows:
+                self.config_entry.async_create_background_task(
+                    self.hass,
+                    self.statistics.async_import(rows),
+                    f"{DOMAIN} statistics {self.plant_id}",
+                )
+
+    def _changed_fields(self, data: dict[str, Any]) -> frozenset[str]:
+        """Compare les champs rafraîchis aux dernières valeurs notifiées."""
+        changed = set()
+        notified = self._notified_values
+        for tier in self.refreshed_tiers:
+            for key, tolerance in _TIER_FIELDS.get(tier, ()):
+                value = data.get(key)
+                previous = notified.get(key)
+                if value == previous and key in notified:
+                    continue
+                if (
+                    tolerance
+                    and isinstance(value, (int, float))
+                    and isinstance(previous, (int, float))
+                    and abs(value - previous) <= tolerance
+                ):
+                    continue
+                notified[key] = value
+                changed.add(key)
+        return frozenset(changed)
@@ -0,0 +1,62 @@
+"""Descriptions précompilées des capteurs Hypontech."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.components.sensor import SensorDeviceClass, SensorStateClass
+from homeassistant.helpers.typing import StateType
+
+from .const import DEVICE_SENSOR_TYPES, ROLLING_SENSOR_TYPES, SENSOR_TYPES
+
+
+@dataclass(frozen=True, slots=True)
+class HypontechSensorDescription:
+    """Description immuable d'un capteur, compilée depuis SENSOR_TYPES ou DEVICE_SENSOR_TYPES."""
+
+    key: str
+    name: str
+    unit: str | None
+    icon: str | None
+    device_class: SensorDeviceClass | None
+    state_class: SensorStateClass | None
+    tier: str | None
+    tolerance: float
+    value_fn: Callable[[dict[str, Any]], StateType]
+
+
+def _value_extractor(key: str) -> Callable[[dict[str, Any]], StateType]:
+    """Retourne l'extracteur de valeur d'un champ de l'API."""
+
+    def _extract(data: dict[str, Any]) -> StateType:
+        return data.get(key, 0)
+
+    return _extract
+
+
+def _compile(key: str, sensor: dict[str, Any]) -> HypontechSensorDescription:
+    """Compile une entrée de SENSOR_TYPES ou DEVICE_SENSOR_TYPES."""
+    device_class = sensor["device_class"]
+    state_class = sensor["state_class"]
+    return HypontechSensorDescription(
+        key=key,
+        name=sensor["name"],
+        unit=sensor["unit"],
+        icon=sensor["icon"],
+        device_class=SensorDeviceClass(device_class) if device_class else None,
+        state_class=SensorStateClass(state_class) if state_class else None,
+        tier=sensor.get("tier"),
+        tolerance=sensor.get("tolerance", 0),
+        value_fn=_value_extractor(key),
+    )
+
+
+SENSOR_DESCRIPTIONS: dict[str, HypontechSensorDescription] = {
+    key: _compile(key, sensor)
+    for key, sensor in {**SENSOR_TYPES, **ROLLING_SENSOR_TYPES}.items()
+}
+
+DEVICE_SENSOR_DESCRIPTIONS: dict[str, HypontechSensorDescription] = {
+    key: _compile(key, sensor) for key, sensor in DEVICE_SENSOR_TYPES.items()
+}
@@ -0,0 +1,95 @@
+"""Coordinateur des onduleurs d'une installation Hypontech."""
+from __future__ import annotations
+
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
+
+from .account import HypontechAccount
+from .const import DEVICE_DISCOVERY_INTERVAL, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HypontechDeviceCoordinator(DataUpdateCoordinator[dict[str, dict[str, Any]]]):
+    """Données temps réel des onduleurs d'une installation, par numéro de série.
+
+    La liste des onduleurs est redécouverte périodiquement; les données temps
+    réel sont récupérées par lots à chaque rafraîchissement, à une cadence
+    propre indépendante de celle de l'installation.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        account: HypontechAccount,
+        plant_id: str,
+        update_interval: timedelta,
+        grace_period: timedelta = timedelta(0),
+    ) -> None:
+        """Initialisation du coordinateur des onduleurs."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN}_{plant_id}_devices",
+            update_interval=update_interval,
+        )
+        self.account = account
+        self.plant_id = plant_id
+        # Onduleurs découverts: numéro de série -> identification
+        self.devices: dict[str, dict[str, Any]] = {}
+        self._discovered_at: float | None = None
+        # Dernières données servies après un échec pendant grace_period
+        self.grace_period = grace_period
+        self.last_success: datetime | None = None
+
+    @property
+    def available(self) -> bool:
+        """Dernier rafraîchissement réussi ou échec pendant la période de grâce."""
+        if self.last_update_success:
+            return True
+        return (
+            self.last_success is not None
+            and dt_util.utcnow() - self.last_success < self.grace_period
+        )
+
+    async def _async_discover(self) -> None:
+        """Met à jour la liste des onduleurs quand elle a expiré."""
+        if (
+            self._discovered_at is not None
+            and time.monotonic() - self._discovered_at < DEVICE_DISCOVERY_INTERVAL
+        ):
+            return
+        try:
+            devices = await self.account.async_discover_devices(self.plant_id)
+        except Exception as err:
+            if not self.devices:
+                raise
+            # Liste indisponible: les onduleurs déjà connus restent interrogés
+            _LOGGER.debug("Découverte des onduleurs de %s en échec: %s", self.plant_id, err)
+            return
+        self._discovered_at = time.monotonic()
+        if devices.keys() != self.devices.keys():
+            _LOGGER.debug(
+                "%s onduleur(s) découvert(s) pour %s", len(devices), self.plant_id
+            )
+        self.devices = devices
+
+    async def _async_update_data(self) -> dict[str, dict[str, Any]]:
+        """Récupère les données temps réel de tous les onduleurs."""
+        try:
+            await self._async_discover()
+            if not self.devices:
+                return {}
+            data = await self.account.async_fetch_devices(
+                self.plant_id, list(self.devices)
+            )
+        except Exception as err:
+            raise UpdateFailed(str(err)) from err
+        self.last_success = dt_util.utcnow()
+        return data
@@ -0,0 +1,50 @@
+"""Diagnostics de l'intégration Hypontech."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_PASSWORD
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_USERNAME, DATA_HISTORY, DATA_SESSION, DOMAIN
+from .coordinator import HypontechDataUpdateCoordinator
+
+TO_REDACT = {CONF_PASSWORD, CONF_USERNAME, "token", "title"}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Diagnostics d'une entrée: configuration, mesures du client et données."""
+    coordinator: HypontechDataUpdateCoordinator = hass.data[DOMAIN][entry.entry_id]
+    session_manager = hass.data[DOMAIN].get(DATA_SESSION)
+    history = hass.data[DOMAIN].get(DATA_HISTORY)
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "client": coordinator.account.api.diagnostics(),
+        "session": session_manager.stats if session_manager is not None else None,
+        "history": history.diagnostics() if history is not None else None,
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "last_success": coordinator.last_success,
+            "update_interval": (
+                coordinator.update_interval.total_seconds()
+                if coordinator.update_interval
+                else None
+            ),
+            "phase": (
+                coordinator.stagger.phase(
+                    coordinator.account, coordinator.base_interval.total_seconds()
+                )
+                if coordinator.stagger is not None
+                else None
+            ),
+            "stale": coordinator.stale,
+            "available": coordinator.available,
+            "data_age": coordinator.data_age,
+            "diagnostics": coordinator.diagnostics,
+        },
+        "data": coordinator.data,
+    }
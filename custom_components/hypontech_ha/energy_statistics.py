@@ -0,0 +1,287 @@
+"""Statistiques d'énergie à long terme importées dans l'enregistreur."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+from typing import Any
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import (
+    async_add_external_statistics,
+    statistics_during_period,
+)
+from homeassistant.components.recorder.tasks import SynchronizeTask
+from homeassistant.const import UnitOfEnergy
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util, slugify
+
+from .const import DOMAIN, SNAPSHOT_SAVE_DELAY, STATISTICS_MAX_GAPS
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUR = timedelta(hours=1)
+
+
+def _parse(value: str | None) -> datetime | None:
+    """Date ISO du point de reprise."""
+    return dt_util.parse_datetime(value) if value is not None else None
+
+
+def _format(value: datetime | None) -> str | None:
+    """Date persistée dans le point de reprise."""
+    return value.isoformat() if value is not None else None
+
+
+class HypontechEnergyStatistics:
+    """Statistique externe de production horaire d'une installation.
+
+    Les lignes sont ajoutées à la suite de la dernière importée; le point de
+    reprise (fin de la dernière ligne et somme cumulée) est conservé sur
+    disque pour qu'une heure ne soit jamais importée deux fois. Les heures
+    sont produites par l'import de l'historique ou calculées à partir des
+    relevés successifs de l'énergie du jour.
+
+    Quand une ligne est ajoutée après une interruption, l'intervalle manquant
+    est mémorisé: une ligne de l'historique qui y tient entièrement y est
+    insérée plus tard, et la somme cumulée des lignes suivantes est
+    recalculée à partir de l'enregistreur.
+    """
+
+    def __init__(self, hass: HomeAssistant, plant_id: str, store: Store) -> None:
+        """Initialisation de la statistique d'une installation."""
+        self._hass = hass
+        self._store = store
+        self.statistic_id = f"{DOMAIN}:energy_{slugify(plant_id)}"
+        self._metadata = StatisticMetaData(
+            has_mean=False,
+            has_sum=True,
+            name=f"Hypontech {plant_id} Production",
+            source=DOMAIN,
+            statistic_id=self.statistic_id,
+            unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        )
+        self.last_start: datetime | None = None
+        self.last_end: datetime | None = None
+        self.sum = 0.0
+        # Intervalles [début, fin) sans ligne importée, début None: sans limite
+        self.gaps: list[tuple[datetime | None, datetime]] = []
+        # Plage déjà parcourue par l'import de l'historique
+        self.backfill_from: datetime | None = None
+        self.backfill_until: datetime | None = None
+        self._loaded = False
+        self._lock = asyncio.Lock()
+        # Heure en cours: début, énergie du jour à son début, dernier relevé
+        # et énergie produite avant une remise à zéro survenue pendant l'heure
+        self._hour: datetime | None = None
+        self._baseline = 0.0
+        self._last = 0.0
+        self._produced = 0.0
+        # Suivi (re)commencé en cours d'heure: le début de l'heure manque
+        self._partial = False
+
+    async def async_load(self) -> None:
+        """Charge le point de reprise depuis le disque."""
+        if self._loaded:
+            return
+        checkpoint = await self._store.async_load() or {}
+        if (last_start := _parse(checkpoint.get("last_start"))) is not None:
+            self.last_start = last_start
+            # Points de reprise antérieurs à la fin de ligne: ligne horaire
+            self.last_end = _parse(checkpoint.get("last_end")) or last_start + HOUR
+            self.sum = checkpoint.get("sum", 0.0)
+        self.gaps = [
+            (_parse(start), _parse(end)) for start, end in checkpoint.get("gaps", [])
+        ]
+        self.backfill_from = _parse(checkpoint.get("backfill_from"))
+        self.backfill_until = _parse(checkpoint.get("backfill_until"))
+        if (hour := checkpoint.get("hour")) is not None:
+            self._hour = dt_util.parse_datetime(hour)
+            self._baseline = checkpoint.get("baseline", 0.0)
+            self._last = checkpoint.get("last", 0.0)
+            self._produced = checkpoint.get("produced", 0.0)
+            self._partial = checkpoint.get("partial", False)
+        self._loaded = True
+
+    def _checkpoint(self) -> dict[str, Any]:
+        """Point de reprise persisté."""
+        return {
+            "last_start": _format(self.last_start),
+            "last_end": _format(self.last_end),
+            "sum": self.sum,
+            "gaps": [[_format(start), _format(end)] for start, end in self.gaps],
+            "backfill_from": _format(self.backfill_from),
+            "backfill_until": _format(self.backfill_until),
+            "hour": _format(self._hour),
+            "baseline": self._baseline,
+            "last": self._last,
+            "produced": self._produced,
+            "partial": self._partial,
+        }
+
+    async def async_set_backfill_progress(
+        self, backfill_from: datetime, backfill_until: datetime
+    ) -> None:
+        """Enregistre la plage parcourue par l'import de l'historique."""
+        self.backfill_from, self.backfill_until = backfill_from, backfill_until
+        await self._store.async_save(self._checkpoint())
+
+    @callback
+    def async_add_sample(
+        self, when: datetime, energy_today: float
+    ) -> list[tuple[datetime, float]]:
+        """Enregistre un relevé de l'énergie du jour (kWh).
+
+        Retourne la ligne de l'heure terminée quand le relevé ouvre une
+        nouvelle heure. La remise à zéro de minuit est prise en compte; après
+        une interruption de plus d'une heure le calcul repart de zéro, les
+        heures manquantes relevant de l'import de l'historique. Une heure dont
+        le début n'a pas été observé n'est pas produite: incomplète, elle
+        fausserait la somme sans laisser d'intervalle à combler.
+        """
+        when = dt_util.as_utc(when)
+        hour = when.replace(minute=0, second=0, microsecond=0)
+        if self._hour is None or hour - self._hour > timedelta(hours=1):
+            self._hour, self._baseline, self._last = hour, energy_today, energy_today
+            self._produced = 0.0
+            self._partial = when > hour
+            self._store.async_delay_save(self._checkpoint, SNAPSHOT_SAVE_DELAY)
+            return []
+
+        if energy_today < self._last:
+            # Remise à zéro quotidienne
+            self._produced += self._last - self._baseline
+            self._baseline = 0.0
+        self._last = energy_today
+        rows = []
+        if hour > self._hour:
+            if not self._partial:
+                rows.append((self._hour, self._produced + energy_today - self._baseline))
+            self._hour, self._baseline, self._produced = hour, energy_today, 0.0
+            self._partial = False
+        self._store.async_delay_save(self._checkpoint, SNAPSHOT_SAVE_DELAY)
+        return rows
+
+    def _take_gap(self, start: datetime, end: datetime) -> tuple[bool, datetime | None]:
+        """Retire [start, end) des intervalles manquants s'il y tient entièrement.
+
+        Retourne aussi le début de l'intervalle qui contenait la ligne.
+        """
+        for index, (gap_start, gap_end) in enumerate(self.gaps):
+            if (gap_start is None or gap_start <= start) and end <= gap_end:
+                pieces = []
+                if gap_start is None or gap_start < start:
+                    pieces.append((gap_start, start))
+                if end < gap_end:
+                    pieces.append((end, gap_end))
+                self.gaps[index : index + 1] = pieces
+                return True, gap_start
+        return False, None
+
+    async def async_import(
+        self, rows: Iterable[tuple[datetime, float]], span: timedelta = HOUR
+    ) -> int:
+        """Importe des lignes (début de période, énergie en kWh) en un seul lot.
+
+        `span` est la durée couverte par chaque ligne. Les lignes postérieures
+        à la dernière importée sont ajoutées à la suite, celles qui comblent
+        un intervalle manquant y sont insérées, les autres sont ignorées;
+        retourne le nombre de lignes importées.
+        """
+        await self.async_load()
+        async with self._lock:
+            appended: list[tuple[datetime, float]] = []
+            inserted: list[tuple[datetime, float]] = []
+            # Début de l'intervalle manquant le plus ancien concerné par l'insertion
+            rebase_from: datetime | None = None
+            last_end = self.last_end
+            for start, energy in rows:
+                end = start + span
+                if last_end is None or start >= last_end:
+                    if last_end is None or start > last_end:
+                        # Interruption: lignes antérieures manquantes
+                        self.gaps.append((last_end, start))
+                    appended.append((start, energy))
+                    self.last_start, last_end = start, end
+                    continue
+                found, gap_start = self._take_gap(start, end)
+                if found:
+                    inserted.append((start, energy))
+                    lower = gap_start if gap_start is not None else start
+                    rebase_from = lower if rebase_from is None else min(rebase_from, lower)
+            self.last_end = last_end
+            # Les intervalles les plus anciens sont oubliés au-delà de la limite
+            del self.gaps[:-STATISTICS_MAX_GAPS]
+
+            if inserted:
+                await self._async_insert(inserted, rebase_from)
+            if appended:
+                statistics = []
+                for start, energy in appended:
+                    self.sum += energy
+                    statistics.append(StatisticData(start=start, sum=self.sum))
+                async_add_external_statistics(self._hass, self._metadata, statistics)
+            if not inserted and not appended:
+                return 0
+
+            await self._store.async_save(self._checkpoint())
+        _LOGGER.debug(
+            "%s heure(s) importée(s) dans %s (%s insérée(s)) jusqu'à %s",
+            len(appended) + len(inserted),
+            self.statistic_id,
+            len(inserted),
+            self.last_start,
+        )
+        return len(appended) + len(inserted)
+
+    async def _async_insert(
+        self, inserted: list[tuple[datetime, float]], rebase_from: datetime
+    ) -> None:
+        """Insère des lignes dans des intervalles manquants.
+
+        Les lignes existantes à partir de la première insérée sont relues dans
+        l'enregistreur et réécrites avec leur somme cumulée décalée.
+        """
+        recorder = get_instance(self._hass)
+        # Lignes déjà envoyées à l'enregistreur mais pas encore écrites; la
+        # file peut être vide pendant l'écriture du dernier lot, d'où une
+        # synchronisation inconditionnelle
+        written = asyncio.Event()
+        recorder.queue_task(SynchronizeTask(written))
+        await written.wait()
+        # Marge couvrant la ligne journalière (jour de 25 h compris) qui
+        # précède l'intervalle manquant
+        stats = await recorder.async_add_executor_job(
+            statistics_during_period,
+            self._hass,
+            dt_util.as_utc(rebase_from) - timedelta(days=2),
+            None,
+            {self.statistic_id},
+            "hour",
+            None,
+            {"sum"},
+        )
+        existing = [
+            (dt_util.utc_from_timestamp(row["start"]), row.get("sum") or 0.0)
+            for row in stats.get(self.statistic_id, [])
+        ]
+        first = min(start for start, _ in inserted)
+        total = 0.0
+        for start, row_sum in existing:
+            if start < first:
+                total = row_sum
+        merged = list(inserted)
+        previous = total
+        for start, row_sum in existing:
+            if start >= first:
+                merged.append((start, row_sum - previous))
+                previous = row_sum
+        statistics = []
+        for start, energy in sorted(merged, key=lambda row: row[0]):
+            total += energy
+            statistics.append(StatisticData(start=start, sum=total))
+        self.sum += sum(energy for _, energy in inserted)
+        async_add_external_statistics(self._hass, self._metadata, statistics)
@@ -0,0 +1,45 @@
+"""Exceptions de l'API Hypontech."""
+from __future__ import annotations
+
+
+class HypontechError(Exception):
+    """Erreur de l'API Hypontech."""
+
+
+class HypontechAuthError(HypontechError):
+    """Authentification refusée par l'API Hypontech."""
+
+
+class HypontechConnectionError(HypontechError):
+    """Erreur réseau lors d'une requête."""
+
+
+class HypontechTimeoutError(HypontechConnectionError):
+    """Requête sans réponse dans le délai imparti."""
+
+
+class HypontechServerError(HypontechError):
+    """Erreur 5xx renvoyée par l'API."""
+
+    def __init__(self, message: str, status: int) -> None:
+        """Initialisation avec le code HTTP."""
+        super().__init__(message)
+        self.status = status
+
+
+class HypontechRateLimitError(HypontechError):
+    """Limite de requêtes atteinte (429)."""
+
+    def __init__(self, message: str, retry_after: float | None = None) -> None:
+        """Initialisation avec le délai demandé par le serveur."""
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class HypontechCircuitOpenError(HypontechError):
+    """Requêtes suspendues tant que l'API est considérée indisponible."""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        """Initialisation avec le délai avant la prochaine tentative."""
+        super().__init__(message)
+        self.retry_after = retry_after
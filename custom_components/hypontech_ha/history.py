@@ -0,0 +1,167 @@
+"""Consultation de l'historique de production avec cache mémoire et disque."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Hashable
+from datetime import date
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .account import HypontechAccount
+from .cache import LRUCache
+from .const import (
+    DATA_HISTORY,
+    DOMAIN,
+    HISTORY_CACHE_SIZE,
+    HISTORY_CURRENT_TTL,
+    HISTORY_GRANULARITY_DAY,
+    HISTORY_GRANULARITY_HOUR,
+    HISTORY_GRANULARITY_MONTH,
+    HISTORY_GRANULARITY_POWER,
+    HISTORY_GRANULARITY_YEAR,
+    STORAGE_KEY_HISTORY,
+    STORAGE_VERSION,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Format de la période de chaque granularité (longueur de la date ISO)
+HISTORY_PERIOD_FORMATS = {
+    HISTORY_GRANULARITY_POWER: "%Y-%m-%d",
+    HISTORY_GRANULARITY_HOUR: "%Y-%m-%d",
+    HISTORY_GRANULARITY_DAY: "%Y-%m",
+    HISTORY_GRANULARITY_MONTH: "%Y",
+    # Toutes les années: une seule période, jamais close
+    HISTORY_GRANULARITY_YEAR: "",
+}
+
+
+def current_period(granularity: str, today: date) -> str:
+    """Période de la granularité contenant `today`."""
+    return today.strftime(HISTORY_PERIOD_FORMATS[granularity])
+
+
+def normalize_period(granularity: str, period: str | None, today: date) -> str:
+    """Valide la période demandée; la période en cours par défaut.
+
+    Lève `ValueError` si la période ne correspond pas à la granularité.
+    """
+    if period is None or granularity == HISTORY_GRANULARITY_YEAR:
+        return current_period(granularity, today)
+    length = len(current_period(granularity, today))
+    if len(period) != length:
+        raise ValueError(period)
+    # "2024-05" est complété en "2024-05-01" pour être validé comme une date
+    date.fromisoformat(period + "-01-01"[: 10 - length])
+    return period
+
+
+def is_closed(granularity: str, period: str, today: date) -> bool:
+    """Indique si la période est terminée et ses valeurs définitives."""
+    if granularity == HISTORY_GRANULARITY_YEAR:
+        return False
+    # Les périodes d'un même format se comparent comme des chaînes
+    return period < current_period(granularity, today)
+
+
+class HypontechHistory:
+    """Séries d'historique servies depuis un cache LRU et un stockage disque.
+
+    Les périodes terminées ne changent plus: elles sont écrites une fois sur
+    disque, dans un fichier par installation, granularité et mois (année pour
+    une période annuelle) lu seulement en cas d'absence du cache mémoire. La période en cours est
+    redemandée au cloud au plus une fois par `HISTORY_CURRENT_TTL`. Les
+    demandes simultanées d'une même série partagent la même requête.
+    """
+
+    def __init__(self, hass: HomeAssistant, maxsize: int = HISTORY_CACHE_SIZE) -> None:
+        """Initialisation du cache d'historique."""
+        self._hass = hass
+        # (installation, granularité, période) -> (instant, close, enregistrements)
+        self._cache = LRUCache(maxsize)
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self._save_lock = asyncio.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "cloud_requests": 0}
+
+    async def async_get(
+        self, account: HypontechAccount, plant_id: str, granularity: str, period: str
+    ) -> list[dict[str, Any]]:
+        """Retourne les enregistrements d'une période d'historique."""
+        key = (plant_id, granularity, period)
+        entry = self._cache.get(key)
+        if entry is not None:
+            fetched_at, closed, records = entry
+            if closed or time.monotonic() - fetched_at < HISTORY_CURRENT_TTL:
+                self.stats["memory_hits"] += 1
+                return records
+        if (future := self._inflight.get(key)) is None:
+            future = self._inflight[key] = asyncio.ensure_future(
+                self._async_load(account, plant_id, granularity, period)
+            )
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def _async_load(
+        self, account: HypontechAccount, plant_id: str, granularity: str, period: str
+    ) -> list[dict[str, Any]]:
+        """Lit la période sur disque si elle est close, sinon la demande au cloud."""
+        key = (plant_id, granularity, period)
+        closed = is_closed(granularity, period, dt_util.now().date())
+        if closed:
+            stored = await self._store(plant_id, granularity, period).async_load()
+            if stored and (records := stored.get(period)) is not None:
+                self.stats["disk_hits"] += 1
+                self._cache.set(key, (time.monotonic(), True, records))
+                return records
+
+        self.stats["cloud_requests"] += 1
+        records = await account.async_get_history(plant_id, granularity, period)
+        self._cache.set(key, (time.monotonic(), closed, records))
+        if closed:
+            await self._async_save(plant_id, granularity, period, records)
+        return records
+
+    async def _async_save(
+        self, plant_id: str, granularity: str, period: str, records: list[dict[str, Any]]
+    ) -> None:
+        """Ajoute une période close au fichier qui la contient."""
+        store = self._store(plant_id, granularity, period)
+        # Lecture et écriture du fichier sans entrelacement entre deux périodes
+        async with self._save_lock:
+            stored = await store.async_load() or {}
+            stored[period] = records
+            await store.async_save(stored)
+        _LOGGER.debug(
+            "Historique %s %s de %s enregistré", granularity, period, plant_id
+        )
+
+    def _store(self, plant_id: str, granularity: str, period: str) -> Store:
+        """Fichier des périodes closes d'une installation et d'une granularité.
+
+        Le fichier est celui du mois de la période (de l'année pour une
+        période annuelle): une lecture ou une écriture porte au plus sur un
+        mois de séries journalières.
+        """
+        return Store(
+            self._hass,
+            STORAGE_VERSION,
+            f"{STORAGE_KEY_HISTORY}.{plant_id}.{granularity}.{period[:7]}",
+        )
+
+    def diagnostics(self) -> dict[str, Any]:
+        """État du cache pour le téléchargement des diagnostics."""
+        return {**self.stats, "cached": len(self._cache)}
+
+
+@callback
+def async_get_history_cache(hass: HomeAssistant) -> HypontechHistory:
+    """Retourne le cache d'historique partagé par toutes les entrées."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (history := domain_data.get(DATA_HISTORY)) is None:
+        history = domain_data[DATA_HISTORY] = HypontechHistory(hass)
+    return history
@@ -1,35 +1,162 @@
 """API client pour Hypontech."""
 import asyncio
 import logging
-from typing import Any, Dict
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
 import aiohttp
 import async_timeout
 
-from .const import API_LOGIN_URL, API_OVERVIEW_URL, API_BASE_URL
+try:
+    # Décodeur JSON rapide fourni avec Home Assistant, bibliothèque standard sinon
+    from orjson import loads as json_loads
+except ImportError:  # pragma: no cover
+    from json import loads as json_loads
+
+from .const import (
+    API_BASE_URL,
+    API_TIMEOUT,
+    ENDPOINT_OVERVIEW,
+    ENDPOINT_PRODUCTION,
+    RETRY_BUDGET,
+    RETRY_MAX_ATTEMPTS,
+    SENSOR_TYPES,
+)
+from .exceptions import (
+    HypontechAuthError,
+    HypontechConnectionError,
+    HypontechError,
+    HypontechRateLimitError,
+    HypontechServerError,
+    HypontechTimeoutError,
+)
+from .metrics import HypontechMetrics
+from .profiler import PHASE_DECODE, PHASE_NETWORK, HypontechProfiler
+from .resilience import CircuitBreaker, backoff_delay, parse_retry_after
+from .token_manager import HypontechTokenManager
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _field_table(endpoint: str) -> Tuple[Tuple[str, str], ...]:
+    """Couples (clé du capteur, champ de la réponse) d'un point d'accès."""
+    return tuple(
+        (key, sensor.get('field', key))
+        for key, sensor in SENSOR_TYPES.items()
+        if sensor.get('endpoint') == endpoint
+    )
+
+
+# Tables de correspondance compilées une fois depuis SENSOR_TYPES
+OVERVIEW_FIELDS = _field_table(ENDPOINT_OVERVIEW)
+PRODUCTION_FIELDS = _field_table(ENDPOINT_PRODUCTION)
+
+
+def extract_fields(
+    data: Dict[str, Any], fields: Tuple[Tuple[str, str], ...]
+) -> Dict[str, Any]:
+    """Extrait les champs d'une réponse selon une table (0 si absent)."""
+    get = data.get
+    return {key: get(field, 0) for key, field in fields}
+
+
+def extract_overview_data(overview_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Extrait les données pertinentes de l'aperçu."""
+    return extract_fields(overview_data, OVERVIEW_FIELDS)
+
+
+def extract_production_data(production_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Extrait les données de production détaillées."""
+    return extract_fields(production_data, PRODUCTION_FIELDS)
+
+
+def extract_device_info(device: Dict[str, Any]) -> Dict[str, Any]:
+    """Extrait l'identification d'un onduleur de la liste de l'installation."""
+    return {
+        'sn': str(device.get('sn', '')),
+        'model': device.get('model'),
+        'name': device.get('name'),
+    }
+
+
+def extract_device_data(device: Dict[str, Any]) -> Dict[str, Any]:
+    """Extrait les données temps réel d'un onduleur."""
+    return {
+        'power': device.get('power', 0),
+        'e_today': device.get('e_today', 0),
+        'e_total': device.get('e_total', 0),
+        'status': device.get('status'),
+    }
+
+
 class HypontechAPI:
     """Client API pour Hypontech."""
 
-    def __init__(self, username: str, password: str, plant_id: str):
+    def __init__(
+        self,
+        username: str,
+        password: str,
+        plant_id: str,
+        session: Optional[aiohttp.ClientSession] = None,
+        store: Optional[Any] = None,
+        base_url: str = API_BASE_URL,
+        timeout: float = API_TIMEOUT,
+    ):
         """Initialisation du client API."""
         self._username = username
         self._password = password
         self._plant_id = plant_id
-        self._auth_token = None
-        self._session = None
+        self._base_url = base_url
+        self._timeout = timeout
+        self._session = session
+        # Une session fournie appartient à l'appelant et n'est pas fermée ici
+        self._owns_session = session is None
+        # Jeton partagé, renouvelé une seule fois pour tous les appels concurrents
+        self._tokens = HypontechTokenManager(self._async_fetch_token, store)
+        # Suspend les requêtes quand l'API est indisponible
+        self._breaker = CircuitBreaker()
+        # Latences, réponses, authentifications et nouvelles tentatives
+        self.metrics = HypontechMetrics()
+        # Profileur attaché par le service de profilage, None le reste du temps
+        self.profiler: Optional[HypontechProfiler] = None
+        # Identifiants refusés: plus aucune authentification jusqu'à leur mise à jour
+        self.credentials_rejected = False
+
+    async def async_initialize(self) -> None:
+        """Restaure le jeton persisté s'il est encore valide."""
+        await self._tokens.async_load()
 
     async def _get_session(self) -> aiohttp.ClientSession:
         """Obtient ou crée une session HTTP."""
-        if self._session is None or self._session.closed:
+        if self._owns_session and (self._session is None or self._session.closed):
             self._session = aiohttp.ClientSession()
         return self._session
 
     async def _login(self) -> bool:
         """Authentification auprès de l'API Hypontech."""
+        return await self._tokens.async_login() is not None
+
+    def set_session(self, session: aiohttp.ClientSession) -> None:
+        """Remplace la session fournie par l'appelant (nouveau connecteur)."""
+        if not self._owns_session:
+            self._session = session
+
+    def update_credentials(self, password: str) -> None:
+        """Remplace le mot de passe après une réauthentification."""
+        self._password = password
+        self.credentials_rejected = False
+
+    async def _async_fetch_token(self) -> Optional[str]:
+        """Demande un nouveau jeton à l'API Hypontech.
+
+        Des identifiants refusés (401, 403) lèvent `HypontechAuthError` et
+        bloquent les authentifications suivantes sans requête: l'entrée passe
+        en réauthentification au lieu de répéter une connexion vouée à
+        l'échec. Les autres erreurs sont typées comme pour les requêtes de
+        données et restent transitoires.
+        """
+        if self.credentials_rejected:
+            raise HypontechAuthError("Identifiants refusés, réauthentification requise")
         session = await self._get_session()
         
         login_data = {
@@ -37,138 +164,242 @@ class HypontechAPI:
             "username": self._username
         }
 
+        start = time.monotonic()
         try:
-            async with async_timeout.timeout(10):
-                async with session.post(API_LOGIN_URL, json=login_data) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        self._auth_token = data['data']['token']
+            async with async_timeout.timeout(self._timeout):
+                async with session.post(f"{self._base_url}/login", json=login_data) as response:
+                    status = response.status
+                    self.metrics.record_request("login", time.monotonic() - start, status)
+                    if status == 200:
+                        data = json_loads(await response.read())
                         _LOGGER.debug("Authentification réussie")
-                        return True
-                    else:
-                        _LOGGER.error(f"Erreur d'authentification: {response.status}")
-                        return False
-        except asyncio.TimeoutError:
-            _LOGGER.error("Timeout lors de l'authentification")
-            return False
-        except Exception as e:
-            _LOGGER.error(f"Erreur lors de l'authentification: {e}")
-            return False
+                        self.metrics.logins += 1
+                        return data['data']['token']
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        except asyncio.TimeoutError as err:
+            self.metrics.record_request("login", time.monotonic() - start, "timeout")
+            raise HypontechTimeoutError("Timeout lors de l'authentification") from err
+        except aiohttp.ClientError as err:
+            self.metrics.record_request("login", time.monotonic() - start, "connection")
+            raise HypontechConnectionError(
+                f"Erreur de connexion lors de l'authentification: {err}"
+            ) from err
+        except (KeyError, TypeError, ValueError) as err:
+            raise HypontechError(f"Réponse d'authentification invalide: {err}") from err
 
-    async def _get_overview_data(self) -> Dict[str, Any]:
-        """Récupère les données d'aperçu de l'installation."""
-        if not self._auth_token:
-            if not await self._login():
-                raise Exception("Impossible de s'authentifier")
+        if status in (401, 403):
+            self.credentials_rejected = True
+            _LOGGER.error("Identifiants Hypontech refusés (%s)", status)
+            raise HypontechAuthError(f"Identifiants refusés ({status})")
+        if status == 429:
+            raise HypontechRateLimitError(
+                "Limite de requêtes atteinte (login)", retry_after
+            )
+        if status >= 500:
+            raise HypontechServerError(f"Erreur API login: {status}", status)
+        raise HypontechError(f"Erreur d'authentification: {status}")
+
+    async def _async_ensure_token(self) -> str:
+        """Retourne un jeton valide en s'authentifiant si nécessaire."""
+        token = await self._tokens.async_get_token()
+        if token is None:
+            raise HypontechError("Impossible de s'authentifier")
+        return token
+
+    async def _async_relogin(self, expired_token: str) -> str:
+        """Renouvelle un jeton refusé, une seule fois pour tous les appels concurrents."""
+        _LOGGER.debug("Token expiré, nouvelle authentification")
+        token = await self._tokens.async_invalidate(expired_token)
+        if token is None:
+            raise HypontechError("Impossible de se réauthentifier")
+        return token
 
+    async def _async_get(self, url: str, label: str) -> Dict[str, Any]:
+        """Requête authentifiée avec nouvelles tentatives et disjoncteur.
+
+        Les erreurs transitoires (5xx, 429, timeout, réseau) sont retentées avec
+        un backoff à gigue qui respecte Retry-After, dans la limite d'un nombre
+        de tentatives et d'un budget de temps.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + RETRY_BUDGET
+        attempt = 0
+        while True:
+            trial = self._breaker.before_request()
+            try:
+                data = await self._async_get_once(url, label)
+            except (
+                HypontechConnectionError,
+                HypontechServerError,
+                HypontechRateLimitError,
+            ) as err:
+                retry_after = getattr(err, "retry_after", None)
+                self._breaker.record_failure(retry_after)
+                attempt += 1
+                delay = backoff_delay(attempt, retry_after)
+                if attempt >= RETRY_MAX_ATTEMPTS or loop.time() + delay > deadline:
+                    _LOGGER.error(
+                        "Erreur lors de la récupération des données %s: %s", label, err
+                    )
+                    raise
+                self.metrics.retries += 1
+                _LOGGER.debug(
+                    "Tentative %s pour %s dans %.1f s: %s", attempt + 1, label, delay, err
+                )
+                await asyncio.sleep(delay)
+                continue
+            except HypontechError as err:
+                if trial:
+                    self._breaker.release_trial()
+                _LOGGER.error(
+                    "Erreur lors de la récupération des données %s: %s", label, err
+                )
+                raise
+            except BaseException:
+                # Annulation ou erreur inattendue pendant l'essai
+                if trial:
+                    self._breaker.release_trial()
+                raise
+            self._breaker.record_success()
+            return data
+
+    async def _async_get_once(self, url: str, label: str) -> Dict[str, Any]:
+        """Effectue une requête authentifiée et retourne le champ `data`."""
+        token = await self._async_ensure_token()
         session = await self._get_session()
-        headers = {"Authorization": f"Bearer {self._auth_token}"}
 
+        start = time.monotonic()
         try:
-            async with async_timeout.timeout(10):
-                async with session.get(API_OVERVIEW_URL, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data['data']
-                    elif response.status == 401:
-                        # Token expiré, nouvelle authentification
-                        _LOGGER.debug("Token expiré, nouvelle authentification")
-                        self._auth_token = None
-                        if await self._login():
-                            return await self._get_overview_data()
-                        else:
-                            raise Exception("Impossible de se réauthentifier")
-                    else:
-                        _LOGGER.error(f"Erreur API: {response.status}")
-                        raise Exception(f"Erreur API: {response.status}")
-        except asyncio.TimeoutError:
-            _LOGGER.error("Timeout lors de la récupération des données")
-            raise Exception("Timeout lors de la récupération des données")
-        except Exception as e:
-            _LOGGER.error(f"Erreur lors de la récupération des données: {e}")
-            raise
+            for attempt in range(2):
+                headers = {"Authorization": f"Bearer {token}"}
+                start = time.monotonic()
+                profile_start = time.perf_counter()
+                async with async_timeout.timeout(self._timeout):
+                    async with session.get(url, headers=headers) as response:
+                        if response.status == 200:
+                            # Lecture et décodage séparés pour mesurer chaque phase
+                            body = await response.read()
+                            self.metrics.record_request(label, time.monotonic() - start, 200)
+                            if self.profiler is None:
+                                return json_loads(body)['data']
+                            received = time.perf_counter()
+                            data = json_loads(body)
+                            self.profiler.record(
+                                PHASE_NETWORK, label, profile_start, received
+                            )
+                            self.profiler.record(
+                                PHASE_DECODE, label, received, time.perf_counter()
+                            )
+                            return data['data']
+                        status = response.status
+                        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                self.metrics.record_request(label, time.monotonic() - start, status)
+                if status == 401 and attempt == 0:
+                    token = await self._async_relogin(token)
+                    continue
+                if status == 401:
+                    # Jeton neuf refusé: le login a réussi, les identifiants ne
+                    # sont pas en cause et l'erreur n'ouvre pas de réauthentification
+                    raise HypontechError(
+                        f"Jeton refusé après une nouvelle authentification ({label})"
+                    )
+                if status == 429:
+                    raise HypontechRateLimitError(
+                        f"Limite de requêtes atteinte ({label})", retry_after
+                    )
+                if status >= 500:
+                    raise HypontechServerError(f"Erreur API {label}: {status}", status)
+                raise HypontechError(f"Erreur API {label}: {status}")
+        except asyncio.TimeoutError as err:
+            self.metrics.record_request(label, time.monotonic() - start, "timeout")
+            raise HypontechTimeoutError(
+                f"Timeout lors de la récupération des données {label}"
+            ) from err
+        except aiohttp.ClientError as err:
+            self.metrics.record_request(label, time.monotonic() - start, "connection")
+            raise HypontechConnectionError(
+                f"Erreur de connexion ({label}): {err}"
+            ) from err
+        except (KeyError, TypeError, ValueError) as err:
+            raise HypontechError(f"Réponse invalide ({label}): {err}") from err
 
-    async def _get_production2_data(self) -> Dict[str, Any]:
-        """Récupère les données de production détaillées de l'installation."""
-        if not self._auth_token:
-            if not await self._login():
-                raise Exception("Impossible de s'authentifier")
+    async def _get_overview_data(self) -> Dict[str, Any]:
+        """Récupère les données d'aperçu de l'installation."""
+        return await self._async_get(f"{self._base_url}/plant/overview", "overview")
 
-        session = await self._get_session()
-        headers = {"Authorization": f"Bearer {self._auth_token}"}
-        
+    async def _get_production2_data(self, plant_id: Optional[str] = None) -> Dict[str, Any]:
+        """Récupère les données de production détaillées de l'installation."""
         # Construction de l'URL avec le plant_id dynamique
-        production2_url = f"{API_BASE_URL}/plant/{self._plant_id}/production2"
+        production2_url = f"{self._base_url}/plant/{plant_id or self._plant_id}/production2"
+        return await self._async_get(production2_url, "production2")
 
-        try:
-            async with async_timeout.timeout(10):
-                async with session.get(production2_url, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data['data']
-                    elif response.status == 401:
-                        # Token expiré, nouvelle authentification
-                        _LOGGER.debug("Token expiré, nouvelle authentification")
-                        self._auth_token = None
-                        if await self._login():
-                            return await self._get_production2_data()
-                        else:
-                            raise Exception("Impossible de se réauthentifier")
-                    else:
-                        _LOGGER.error(f"Erreur API production2: {response.status}")
-                        raise Exception(f"Erreur API production2: {response.status}")
-        except asyncio.TimeoutError:
-            _LOGGER.error("Timeout lors de la récupération des données de production")
-            raise Exception("Timeout lors de la récupération des données de production")
-        except Exception as e:
-            _LOGGER.error(f"Erreur lors de la récupération des données de production: {e}")
-            raise
+    async def async_get_devices(self, plant_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Liste les onduleurs de l'installation."""
+        devices_url = f"{self._base_url}/plant/{plant_id or self._plant_id}/devices"
+        return await self._async_get(devices_url, "devices")
+
+    async def async_get_devices_realtime(
+        self, serials: List[str], plant_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Récupère en une requête les données temps réel de plusieurs onduleurs."""
+        realtime_url = (
+            f"{self._base_url}/plant/{plant_id or self._plant_id}/devices/realtime"
+            f"?sn={','.join(serials)}"
+        )
+        return await self._async_get(realtime_url, "devices realtime")
+
+    async def async_get_history(
+        self, granularity: str, period: str, plant_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Récupère l'historique de production d'une période.
+
+        `granularity` "hour" retourne les heures du jour `period` (AAAA-MM-JJ),
+        "power" la courbe de puissance de ce jour, "day" les jours du mois
+        `period` (AAAA-MM), "month" les mois de l'année `period` (AAAA) et
+        "year" toutes les années.
+        """
+        history_url = (
+            f"{self._base_url}/plant/{plant_id or self._plant_id}/history"
+            f"?granularity={granularity}&date={period}"
+        )
+        return await self._async_get(history_url, "history")
 
     async def async_get_data(self) -> Dict[str, Any]:
         """Récupère toutes les données de l'installation."""
         try:
-            # Récupération des données d'aperçu
-            overview_data = await self._get_overview_data()
-            
-            # Récupération des données de production détaillées
-            production_data = await self._get_production2_data()
-            
-            # Extraction des données pertinentes de l'aperçu
-            relevant_data = {
-                'e_total': overview_data.get('e_total', 0),
-                'e_today': overview_data.get('e_today', 0),
-                'total_co2': overview_data.get('total_co2', 0),
-                'total_tree': overview_data.get('total_tree', 0),
-                'power': overview_data.get('power', 0),
-                'normal_dev_num': overview_data.get('normal_dev_num', 0),
-                'offline_dev_num': overview_data.get('offline_dev_num', 0),
-                'fault_dev_num': overview_data.get('fault_dev_num', 0),
-                'wait_dev_num': overview_data.get('wait_dev_num', 0),
-                'capacity': overview_data.get('capacity', 0),
-            }
+            # Récupération concurrente de l'aperçu et de la production détaillée :
+            # la latence d'un rafraîchissement est celle de l'appel le plus lent
+            overview_data, production_data = await asyncio.gather(
+                self._get_overview_data(),
+                self._get_production2_data(),
+            )
             
-            # Ajout des données de production détaillées
-            relevant_data.update({
-                'today_generation': production_data.get('today_generation', 0),
-                'month_generation': production_data.get('month_generation', 0),
-                'year_generation': production_data.get('year_generation', 0),
-                'total_generation': production_data.get('total_generation', 0),
-                'co2_saved': production_data.get('co2', 0),
-                'tree_equivalent': production_data.get('tree', 0),
-                'diesel_saved': production_data.get('diesel', 0),
-                'today_revenue': production_data.get('today_revenue', 0),
-                'month_revenue': production_data.get('month_revenue', 0),
-                'total_revenue': production_data.get('total_revenue', 0),
-            })
+            relevant_data = extract_overview_data(overview_data)
+            relevant_data.update(extract_production_data(production_data))
             
-            _LOGGER.debug(f"Données récupérées: {relevant_data}")
+            _LOGGER.debug("Données récupérées: %s", relevant_data)
             return relevant_data
             
         except Exception as e:
-            _LOGGER.error(f"Erreur lors de la récupération des données: {e}")
+            _LOGGER.error("Erreur lors de la récupération des données: %s", e)
             raise
 
+    def diagnostics(self) -> Dict[str, Any]:
+        """État du client pour le téléchargement des diagnostics, sans secret."""
+        return {
+            "metrics": self.metrics.as_dict(),
+            "token": {
+                "valid": self._tokens.is_valid,
+                "expires_at": self._tokens.expires_at,
+                "learned_lifetime": self._tokens.learned_lifetime,
+                "login_count": self._tokens.login_count,
+            },
+            "circuit_open": self._breaker.is_open,
+            "credentials_rejected": self.credentials_rejected,
+        }
+
     async def close(self):
-        """Ferme la session HTTP."""
-        if self._session and not self._session.closed:
+        """Arrête le renouvellement du jeton et ferme la session si elle appartient au client."""
+        self._tokens.shutdown()
+        if self._owns_session and self._session and not self._session.closed:
             await self._session.close() 
\ No newline at end of file
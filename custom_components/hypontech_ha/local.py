@@ -0,0 +1,88 @@
+"""Source de données locale: registres de l'onduleur lus en Modbus TCP."""
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Any
+
+from .const import (
+    ALL_TIERS,
+    MODBUS_REGISTERS,
+    MODBUS_STATUS,
+    SENSOR_TYPES,
+)
+from .modbus import HypontechModbusClient, decode_registers, plan_reads
+from .profiler import PHASE_EXTRACTION
+
+if TYPE_CHECKING:
+    from .coordinator import HypontechDataUpdateCoordinator
+
+
+class HypontechLocalSource:
+    """Remplace le client de compte pour une installation lue localement.
+
+    Les registres de la carte sont regroupés en un minimum de lectures,
+    calculées une fois pour toutes. Les données produites ont les clés de
+    `SENSOR_TYPES`: les capteurs existants fonctionnent sur les deux
+    transports, ceux qu'aucun registre n'alimente restent à l'état inconnu.
+    """
+
+    def __init__(self, api: HypontechModbusClient) -> None:
+        """Initialisation de la source locale."""
+        self.api = api
+        self._reads = plan_reads(MODBUS_REGISTERS)
+        self._coordinators: dict[str, HypontechDataUpdateCoordinator] = {}
+
+    @property
+    def plant_ids(self) -> list[str]:
+        """Installation servie par cette source."""
+        return list(self._coordinators)
+
+    def register(self, plant_id: str, coordinator: HypontechDataUpdateCoordinator) -> None:
+        """Enregistre le coordinateur de l'installation."""
+        self._coordinators[plant_id] = coordinator
+
+    def unregister(self, plant_id: str) -> None:
+        """Retire le coordinateur de l'installation."""
+        self._coordinators.pop(plant_id, None)
+
+    def refreshed_tiers(self, plant_id: str) -> frozenset[str]:
+        """Tous les champs sont relus à chaque cycle."""
+        return ALL_TIERS
+
+    async def async_get_plant_data(self, plant_id: str) -> dict[str, Any]:
+        """Lit les registres de l'onduleur et les convertit en données de capteurs."""
+        values: dict[int, int] = {}
+        for address, count in self._reads:
+            registers = await self.api.async_read_registers(address, count)
+            values.update(zip(range(address, address + count), registers))
+
+        profiler = self.api.profiler
+        extraction_start = time.perf_counter() if profiler is not None else 0.0
+        data = extract_register_data(decode_registers(MODBUS_REGISTERS, values))
+        if profiler is not None:
+            profiler.record(
+                PHASE_EXTRACTION, plant_id, extraction_start, time.perf_counter()
+            )
+        return data
+
+    async def async_close(self) -> None:
+        """Ferme la connexion Modbus."""
+        await self.api.close()
+
+
+def extract_register_data(registers: dict[str, Any]) -> dict[str, Any]:
+    """Construit les données de capteurs à partir des registres décodés."""
+    data: dict[str, Any] = dict.fromkeys(SENSOR_TYPES)
+    status = MODBUS_STATUS.get(registers["status"], "offline")
+    data.update(
+        {
+            "power": registers["power"],
+            "e_today": registers["e_today"],
+            "e_total": registers["e_total"],
+            "today_generation": registers["e_today"],
+            "total_generation": registers["e_total"],
+        }
+    )
+    for state in MODBUS_STATUS.values():
+        data[f"{state}_dev_num"] = int(state == status)
+    return data
@@ -0,0 +1,109 @@
+"""Mesures de performance du client API Hypontech."""
+from __future__ import annotations
+
+import bisect
+import time
+from collections import Counter
+from typing import Any
+
+from .const import (
+    METRICS_LATENCY_BUCKETS,
+    METRICS_WINDOW,
+    METRICS_WINDOW_CAPACITY,
+)
+from .rolling import RollingWindow
+
+
+class EndpointMetrics:
+    """Latences et réponses d'un point d'accès de l'API.
+
+    L'histogramme et les compteurs couvrent toute la durée de fonctionnement;
+    la moyenne et le maximum portent sur la dernière heure.
+    """
+
+    __slots__ = ("histogram", "statuses", "requests", "errors", "recent")
+
+    def __init__(self) -> None:
+        """Initialisation des mesures d'un point d'accès."""
+        # Un compteur par borne de METRICS_LATENCY_BUCKETS, plus les dépassements
+        self.histogram = [0] * (len(METRICS_LATENCY_BUCKETS) + 1)
+        self.statuses: Counter[str] = Counter()
+        self.requests = 0
+        self.errors = 0
+        self.recent = RollingWindow(METRICS_WINDOW, METRICS_WINDOW_CAPACITY)
+
+    def record(self, duration: float, status: int | str) -> None:
+        """Enregistre une requête terminée."""
+        milliseconds = duration * 1000
+        self.histogram[bisect.bisect_left(METRICS_LATENCY_BUCKETS, milliseconds)] += 1
+        self.statuses[str(status)] += 1
+        self.requests += 1
+        if status != 200:
+            self.errors += 1
+        self.recent.add(time.monotonic(), milliseconds)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Résumé sérialisable des mesures."""
+        buckets = [f"<={bound}ms" for bound in METRICS_LATENCY_BUCKETS]
+        buckets.append(f">{METRICS_LATENCY_BUCKETS[-1]}ms")
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "statuses": dict(self.statuses),
+            "latency_histogram": dict(zip(buckets, self.histogram)),
+            "latency_mean_1h_ms": _round(self.recent.mean),
+            "latency_max_1h_ms": _round(self.recent.max),
+        }
+
+
+class HypontechMetrics:
+    """Compteurs de requêtes, d'authentifications et de nouvelles tentatives."""
+
+    def __init__(self) -> None:
+        """Initialisation des compteurs."""
+        self.endpoints: dict[str, EndpointMetrics] = {}
+        self.logins = 0
+        self.retries = 0
+
+    def record_request(self, endpoint: str, duration: float, status: int | str) -> None:
+        """Enregistre une requête vers un point d'accès.
+
+        `status` est le code HTTP, ou "timeout" / "connection" sans réponse.
+        """
+        metrics = self.endpoints.get(endpoint)
+        if metrics is None:
+            metrics = self.endpoints[endpoint] = EndpointMetrics()
+        metrics.record(duration, status)
+
+    @property
+    def requests(self) -> int:
+        """Nombre total de requêtes."""
+        return sum(metrics.requests for metrics in self.endpoints.values())
+
+    @property
+    def errors(self) -> int:
+        """Nombre total de requêtes en échec."""
+        return sum(metrics.errors for metrics in self.endpoints.values())
+
+    def latency(self, endpoint: str) -> float | None:
+        """Latence moyenne d'un point d'accès sur la dernière heure (ms)."""
+        metrics = self.endpoints.get(endpoint)
+        return None if metrics is None else _round(metrics.recent.mean)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Résumé sérialisable pour le téléchargement des diagnostics."""
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "logins": self.logins,
+            "retries": self.retries,
+            "endpoints": {
+                endpoint: metrics.as_dict()
+                for endpoint, metrics in self.endpoints.items()
+            },
+        }
+
+
+def _round(value: float | None) -> float | None:
+    """Arrondi au dixième de milliseconde."""
+    return None if value is None else round(value, 1)
@@ -0,0 +1,168 @@
+"""Client Modbus TCP minimal pour la lecture locale des onduleurs Hypontech."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import struct
+import time
+from typing import Any
+
+import async_timeout
+
+from .const import API_TIMEOUT, MODBUS_MAX_GAP, MODBUS_MAX_READ
+from .exceptions import HypontechConnectionError, HypontechError, HypontechTimeoutError
+from .metrics import HypontechMetrics
+from .profiler import PHASE_NETWORK, HypontechProfiler
+
+_LOGGER = logging.getLogger(__name__)
+
+# Fonction Modbus de lecture des registres de maintien
+READ_HOLDING_REGISTERS = 0x03
+
+
+def plan_reads(
+    registers: dict[str, dict[str, Any]],
+    max_gap: int = MODBUS_MAX_GAP,
+    max_count: int = MODBUS_MAX_READ,
+) -> list[tuple[int, int]]:
+    """Regroupe les registres en blocs contigus (adresse, nombre).
+
+    Deux plages séparées de moins de `max_gap` registres sont lues ensemble:
+    quelques registres inutiles coûtent moins qu'un aller-retour de plus.
+    """
+    spans = sorted(
+        (spec["address"], spec["address"] + spec["count"]) for spec in registers.values()
+    )
+    blocks: list[list[int]] = []
+    for start, end in spans:
+        if blocks and start - blocks[-1][1] <= max_gap and end - blocks[-1][0] <= max_count:
+            blocks[-1][1] = max(blocks[-1][1], end)
+        else:
+            blocks.append([start, end])
+    return [(start, end - start) for start, end in blocks]
+
+
+def decode_registers(
+    registers: dict[str, dict[str, Any]], values: dict[int, int]
+) -> dict[str, float | int]:
+    """Convertit les registres lus en valeurs des champs (mot de poids fort en premier)."""
+    decoded: dict[str, float | int] = {}
+    for field, spec in registers.items():
+        raw = 0
+        for offset in range(spec["count"]):
+            raw = (raw << 16) | values[spec["address"] + offset]
+        if spec.get("signed") and raw >= 1 << (16 * spec["count"] - 1):
+            raw -= 1 << (16 * spec["count"])
+        scale = spec.get("scale", 1)
+        decoded[field] = raw if scale == 1 else round(raw * scale, 3)
+    return decoded
+
+
+class HypontechModbusClient:
+    """Lecture de registres de maintien en Modbus TCP.
+
+    La connexion est conservée entre les lectures et rétablie une fois en cas
+    d'erreur; les requêtes sont sérialisées sur la connexion.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        unit_id: int,
+        timeout: float = API_TIMEOUT,
+    ) -> None:
+        """Initialisation du client Modbus."""
+        self._host = host
+        self._port = port
+        self._unit_id = unit_id
+        self._timeout = timeout
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._lock = asyncio.Lock()
+        self._transaction = 0
+        self.metrics = HypontechMetrics()
+        self.profiler: HypontechProfiler | None = None
+
+    async def async_read_registers(self, address: int, count: int) -> list[int]:
+        """Lit `count` registres de maintien à partir de `address`."""
+        async with self._lock:
+            for attempt in range(2):
+                start = time.monotonic()
+                profile_start = time.perf_counter()
+                try:
+                    if self._writer is None:
+                        async with async_timeout.timeout(self._timeout):
+                            self._reader, self._writer = await asyncio.open_connection(
+                                self._host, self._port
+                            )
+                    values = await self._async_request(address, count)
+                except asyncio.TimeoutError as err:
+                    self.metrics.record_request("modbus", time.monotonic() - start, "timeout")
+                    self._disconnect()
+                    if attempt:
+                        raise HypontechTimeoutError(
+                            f"Timeout Modbus ({self._host}:{self._port})"
+                        ) from err
+                except (OSError, asyncio.IncompleteReadError) as err:
+                    self.metrics.record_request(
+                        "modbus", time.monotonic() - start, "connection"
+                    )
+                    self._disconnect()
+                    if attempt:
+                        raise HypontechConnectionError(
+                            f"Erreur de connexion Modbus ({self._host}:{self._port}): {err}"
+                        ) from err
+                else:
+                    self.metrics.record_request("modbus", time.monotonic() - start, 200)
+                    if self.profiler is not None:
+                        self.profiler.record(
+                            PHASE_NETWORK, "modbus", profile_start, time.perf_counter()
+                        )
+                    return values
+                _LOGGER.debug("Nouvelle connexion Modbus à %s:%s", self._host, self._port)
+        raise HypontechConnectionError("Lecture Modbus impossible")
+
+    async def _async_request(self, address: int, count: int) -> list[int]:
+        """Envoie une requête de lecture et décode la réponse."""
+        self._transaction = (self._transaction + 1) & 0xFFFF
+        pdu = struct.pack(">BHH", READ_HOLDING_REGISTERS, address, count)
+        header = struct.pack(">HHHB", self._transaction, 0, len(pdu) + 1, self._unit_id)
+        self._writer.write(header + pdu)
+        async with async_timeout.timeout(self._timeout):
+            await self._writer.drain()
+            transaction, _, length, _ = struct.unpack(
+                ">HHHB", await self._reader.readexactly(7)
+            )
+            body = await self._reader.readexactly(length - 1)
+
+        if transaction != self._transaction:
+            self._disconnect()
+            raise HypontechError("Réponse Modbus inattendue")
+        if body[0] & 0x80:
+            raise HypontechError(f"Exception Modbus {body[1]} (registre {address})")
+        byte_count = body[1]
+        return list(struct.unpack(f">{byte_count // 2}H", body[2 : 2 + byte_count]))
+
+    def _disconnect(self) -> None:
+        """Ferme la connexion courante."""
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    def diagnostics(self) -> dict[str, Any]:
+        """État du client pour le téléchargement des diagnostics."""
+        return {
+            "metrics": self.metrics.as_dict(),
+            "connected": self._writer is not None,
+        }
+
+    async def close(self) -> None:
+        """Ferme la connexion."""
+        writer = self._writer
+        self._disconnect()
+        if writer is not None:
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
@@ -0,0 +1,91 @@
+"""Profilage à la demande des cycles de rafraîchissement."""
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import io
+import json
+import pstats
+import time
+from typing import Any
+
+PHASE_NETWORK = "network"
+PHASE_DECODE = "decode"
+PHASE_EXTRACTION = "extraction"
+PHASE_DISPATCH = "dispatch"
+
+
+class HypontechProfiler:
+    """Profil CPU et chronologie par phase des prochains cycles d'une installation.
+
+    Le client API, le client de compte et le coordinateur n'enregistrent des
+    phases que lorsqu'un profileur leur est attaché: hors profilage, le coût se
+    limite à un test d'attribut.
+    """
+
+    def __init__(self, plant_id: str, cycles: int) -> None:
+        """Initialisation du profilage de `cycles` cycles de `plant_id`."""
+        self.plant_id = plant_id
+        self.cycles = cycles
+        self.completed = 0
+        self.timeline: list[dict[str, Any]] = []
+        self.finished: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._profile = cProfile.Profile()
+        self._origin = time.perf_counter()
+
+    def start(self) -> None:
+        """Démarre le profil CPU de la boucle d'événements."""
+        self._origin = time.perf_counter()
+        self._profile.enable()
+
+    def stop(self) -> None:
+        """Arrête le profil CPU."""
+        self._profile.disable()
+
+    def record(self, phase: str, label: str, start: float, end: float) -> None:
+        """Enregistre une phase mesurée avec `time.perf_counter()`."""
+        self.timeline.append(
+            {
+                "cycle": self.completed + 1,
+                "phase": phase,
+                "label": label,
+                "start_ms": round((start - self._origin) * 1000, 3),
+                "duration_ms": round((end - start) * 1000, 3),
+            }
+        )
+
+    def cycle_done(self, plant_id: str) -> None:
+        """Signale la fin d'un cycle; termine le profilage après le dernier."""
+        if plant_id != self.plant_id or self.finished.done():
+            return
+        self.completed += 1
+        if self.completed >= self.cycles:
+            self.finished.set_result(None)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Durée totale et nombre de mesures par phase."""
+        phases: dict[str, dict[str, float]] = {}
+        for event in self.timeline:
+            phase = phases.setdefault(event["phase"], {"count": 0, "total_ms": 0.0})
+            phase["count"] += 1
+            phase["total_ms"] = round(phase["total_ms"] + event["duration_ms"], 3)
+        return phases
+
+    def write(self, base_path: str) -> str:
+        """Écrit le profil (`.prof`) et la chronologie (`.json`); à exécuter hors de la boucle."""
+        self._profile.dump_stats(f"{base_path}.prof")
+        stream = io.StringIO()
+        pstats.Stats(self._profile, stream=stream).sort_stats("cumulative").print_stats(30)
+        with open(f"{base_path}.json", "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "plant_id": self.plant_id,
+                    "cycles": self.completed,
+                    "phases": self.summary(),
+                    "timeline": self.timeline,
+                    "top_functions": stream.getvalue().splitlines(),
+                },
+                file,
+                indent=2,
+            )
+        return f"{base_path}.json"
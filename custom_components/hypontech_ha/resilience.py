@@ -0,0 +1,147 @@
+"""Nouvelles tentatives, disjoncteur et limitation de débit pour les requêtes Hypontech."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from .const import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RECOVERY_TIMEOUT,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+)
+from .exceptions import HypontechCircuitOpenError
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Convertit un en-tête Retry-After (secondes ou date HTTP) en secondes."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+
+
+def backoff_delay(attempt: int, retry_after: float | None = None) -> float:
+    """Délai avant la tentative suivante: backoff exponentiel à gigue complète.
+
+    Un Retry-After envoyé par le serveur sert de minimum.
+    """
+    delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class CircuitBreaker:
+    """Suspend les requêtes après une série d'échecs.
+
+    Après `failure_threshold` échecs consécutifs le circuit s'ouvre et toute
+    requête échoue immédiatement pendant `recovery_timeout` secondes (ou le
+    Retry-After du serveur s'il est plus long). Une seule requête d'essai est
+    ensuite autorisée: son succès referme le circuit, son échec le rouvre.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        recovery_timeout: float = CIRCUIT_RECOVERY_TIMEOUT,
+    ) -> None:
+        """Initialisation du disjoncteur."""
+        self._failure_threshold = failure_threshold
+        self._recovery_timeout = recovery_timeout
+        self._failures = 0
+        self._open_until: float | None = None
+        self._trial_in_progress = False
+
+    @property
+    def is_open(self) -> bool:
+        """Indique si les requêtes sont suspendues."""
+        return self._open_until is not None
+
+    def before_request(self) -> bool:
+        """Lève une erreur si le circuit interdit la requête.
+
+        Retourne True si la requête est la requête d'essai: l'appelant doit
+        alors appeler `record_success`, `record_failure` ou `release_trial`.
+        """
+        if self._open_until is None:
+            return False
+        remaining = self._open_until - time.monotonic()
+        if remaining > 0 or self._trial_in_progress:
+            raise HypontechCircuitOpenError(
+                "API Hypontech indisponible, requêtes suspendues", max(remaining, 0)
+            )
+        # Délai écoulé: une requête d'essai
+        self._trial_in_progress = True
+        return True
+
+    def release_trial(self) -> None:
+        """Termine un essai sans verdict (erreur non transitoire, annulation).
+
+        Le circuit reste ouvert mais son délai est écoulé: la requête suivante
+        sert de nouvel essai.
+        """
+        self._trial_in_progress = False
+
+    def record_success(self) -> None:
+        """Referme le circuit après une requête réussie."""
+        if self._open_until is not None:
+            _LOGGER.info("API Hypontech de nouveau disponible")
+        self._failures = 0
+        self._open_until = None
+        self._trial_in_progress = False
+
+    def record_failure(self, retry_after: float | None = None) -> None:
+        """Comptabilise un échec et ouvre le circuit si nécessaire.
+
+        Un Retry-After du serveur ouvre le circuit au moins pour ce délai.
+        """
+        self._failures += 1
+        if self._trial_in_progress or self._failures >= self._failure_threshold:
+            timeout = max(self._recovery_timeout, retry_after or 0)
+        elif retry_after is not None:
+            timeout = retry_after
+        else:
+            return
+        if timeout > 0:
+            if self._open_until is None or self._trial_in_progress:
+                _LOGGER.warning(
+                    "API Hypontech indisponible, requêtes suspendues pendant %.0f s",
+                    timeout,
+                )
+            self._open_until = time.monotonic() + timeout
+        self._trial_in_progress = False
+
+
+class RateLimiter:
+    """Espace les requêtes pour ne pas dépasser un débit donné."""
+
+    def __init__(self, rate: float) -> None:
+        """Initialisation avec un débit maximum en requêtes par seconde."""
+        self._interval = 1 / rate
+        self._next_slot = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Attend le prochain créneau disponible."""
+        async with self._lock:
+            now = time.monotonic()
+            if self._next_slot > now:
+                await asyncio.sleep(self._next_slot - now)
+                now = self._next_slot
+            self._next_slot = now + self._interval
@@ -0,0 +1,179 @@
+"""Statistiques glissantes en mémoire sur les derniers relevés."""
+from __future__ import annotations
+
+import math
+from array import array
+from collections import deque
+from datetime import date, datetime
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from .const import ROLLING_SAMPLE_INTERVAL
+
+
+class RollingWindow:
+    """Fenêtre glissante temporelle sur un tampon circulaire de taille fixe.
+
+    Horodatages et valeurs sont conservés dans deux tableaux `array('d')`
+    préalloués; moyenne, minimum et maximum sont mis à jour en O(1) amorti par
+    relevé (somme courante et files monotones de numéros de relevés). Quand le
+    tampon est plein le relevé le plus ancien est écrasé: la mémoire ne dépend
+    que de la capacité.
+    """
+
+    __slots__ = (
+        "duration",
+        "_capacity",
+        "_times",
+        "_values",
+        "_start",
+        "_end",
+        "_sum",
+        "_minima",
+        "_maxima",
+    )
+
+    def __init__(self, duration: float, capacity: int) -> None:
+        """Initialisation d'une fenêtre de `duration` secondes."""
+        self.duration = duration
+        self._capacity = capacity
+        self._times = array("d", bytes(8 * capacity))
+        self._values = array("d", bytes(8 * capacity))
+        # Numéros du plus ancien relevé conservé et du prochain relevé
+        self._start = 0
+        self._end = 0
+        self._sum = 0.0
+        self._minima: deque[int] = deque()
+        self._maxima: deque[int] = deque()
+
+    def __len__(self) -> int:
+        """Nombre de relevés dans la fenêtre."""
+        return self._end - self._start
+
+    def add(self, timestamp: float, value: float) -> None:
+        """Ajoute un relevé et retire ceux sortis de la fenêtre."""
+        capacity = self._capacity
+        values = self._values
+        cutoff = timestamp - self.duration
+        while self._start < self._end and (
+            self._times[self._start % capacity] <= cutoff
+            or self._end - self._start >= capacity
+        ):
+            self._evict()
+
+        slot = self._end % capacity
+        self._times[slot] = timestamp
+        values[slot] = value
+        self._sum += value
+        while self._maxima and values[self._maxima[-1] % capacity] <= value:
+            self._maxima.pop()
+        self._maxima.append(self._end)
+        while self._minima and values[self._minima[-1] % capacity] >= value:
+            self._minima.pop()
+        self._minima.append(self._end)
+        self._end += 1
+
+        if self._end % capacity == 0:
+            # Recalcul périodique de la somme pour borner l'erreur d'arrondi
+            self._sum = math.fsum(
+                values[index % capacity] for index in range(self._start, self._end)
+            )
+
+    def _evict(self) -> None:
+        """Retire le relevé le plus ancien."""
+        index = self._start
+        self._sum -= self._values[index % self._capacity]
+        if self._minima and self._minima[0] == index:
+            self._minima.popleft()
+        if self._maxima and self._maxima[0] == index:
+            self._maxima.popleft()
+        self._start += 1
+
+    @property
+    def mean(self) -> float | None:
+        """Moyenne des relevés de la fenêtre."""
+        count = self._end - self._start
+        return self._sum / count if count else None
+
+    @property
+    def min(self) -> float | None:
+        """Minimum des relevés de la fenêtre."""
+        return self._values[self._minima[0] % self._capacity] if self._minima else None
+
+    @property
+    def max(self) -> float | None:
+        """Maximum des relevés de la fenêtre."""
+        return self._values[self._maxima[0] % self._capacity] if self._maxima else None
+
+
+class DailyPeak:
+    """Valeur maximale depuis minuit."""
+
+    __slots__ = ("day", "value")
+
+    def __init__(self) -> None:
+        """Initialisation du pic du jour."""
+        self.day: date | None = None
+        self.value: float | None = None
+
+    def add(self, day: date, value: float) -> None:
+        """Ajoute un relevé, le pic repart de zéro chaque jour."""
+        if day != self.day or self.value is None:
+            self.day = day
+            self.value = value
+        elif value > self.value:
+            self.value = value
+
+
+class RollingStatistics:
+    """Fenêtres glissantes et pics du jour d'une installation.
+
+    Les fenêtres sont partagées entre les statistiques d'un même champ et
+    d'une même durée; leur capacité est dimensionnée sur l'intervalle minimum
+    entre deux relevés.
+    """
+
+    def __init__(
+        self,
+        sensor_types: dict[str, dict[str, Any]],
+        sample_interval: float = ROLLING_SAMPLE_INTERVAL,
+    ) -> None:
+        """Initialisation à partir des descriptions de capteurs glissants."""
+        self._sensors: list[tuple[str, RollingWindow | DailyPeak, str]] = []
+        self._windows: dict[tuple[str, float], RollingWindow] = {}
+        self._peaks: dict[str, DailyPeak] = {}
+        for key, sensor in sensor_types.items():
+            source = sensor["source"]
+            if sensor["statistic"] == "peak":
+                tracker = self._peaks.setdefault(source, DailyPeak())
+            else:
+                duration = sensor["window"]
+                tracker = self._windows.get((source, duration))
+                if tracker is None:
+                    tracker = self._windows[(source, duration)] = RollingWindow(
+                        duration, math.ceil(duration / sample_interval) + 1
+                    )
+            self._sensors.append((key, tracker, sensor["statistic"]))
+
+    def update(self, when: datetime, data: dict[str, Any]) -> dict[str, float | None]:
+        """Ajoute les relevés de `data` et retourne les statistiques à jour."""
+        timestamp = when.timestamp()
+        for (source, _), window in self._windows.items():
+            value = data.get(source)
+            if isinstance(value, (int, float)):
+                window.add(timestamp, float(value))
+        day = dt_util.as_local(when).date()
+        for source, peak in self._peaks.items():
+            value = data.get(source)
+            if isinstance(value, (int, float)):
+                peak.add(day, float(value))
+
+        results: dict[str, float | None] = {}
+        for key, tracker, statistic in self._sensors:
+            if statistic == "peak":
+                value = tracker.value
+            else:
+                value = getattr(tracker, statistic)
+            results[key] = None if value is None else round(value, 2)
+        return results
@@ -0,0 +1,87 @@
+"""Planification adaptative des rafraîchissements selon l'ensoleillement."""
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from homeassistant.const import SUN_EVENT_SUNRISE
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.sun import get_astral_event_next, is_up
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    FAST_CHANGE_RATIO,
+    MIN_SCAN_INTERVAL,
+    NIGHT_SCAN_INTERVAL,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class SolarAwareScheduler:
+    """Calcule l'intervalle du prochain rafraîchissement.
+
+    La nuit (soleil couché et puissance nulle) l'intervalle est étiré jusqu'au
+    lever du soleil, de jour l'intervalle configuré est utilisé, et il est
+    resserré quand la puissance varie rapidement.
+    """
+
+    def __init__(self, hass: HomeAssistant, base_interval: timedelta) -> None:
+        """Initialisation du planificateur."""
+        self._hass = hass
+        self._base_interval = base_interval
+        self._last_power: float | None = None
+        self._day: date | None = None
+        self._day_start: datetime | None = None
+        self.polls_today = 0
+        self.saved_requests_today = 0
+        self.saved_requests_yesterday: int | None = None
+
+    @callback
+    def async_next_interval(self, data: dict[str, Any]) -> timedelta:
+        """Enregistre un rafraîchissement et retourne l'intervalle suivant."""
+        now = dt_util.now()
+        self._record_poll(now)
+
+        power = float(data.get("power") or 0)
+        last_power, self._last_power = self._last_power, power
+
+        if power <= 0 and not is_up(self._hass, now):
+            # Nuit: rien ne change avant le lever du soleil
+            sunrise = get_astral_event_next(self._hass, SUN_EVENT_SUNRISE, now)
+            return max(
+                min(NIGHT_SCAN_INTERVAL, sunrise - now), self._base_interval
+            )
+
+        if (
+            last_power is not None
+            and abs(power - last_power) > FAST_CHANGE_RATIO * max(last_power, 1)
+        ):
+            # Puissance en forte variation: rafraîchissements rapprochés, sans
+            # descendre sous le plancher ni dépasser l'intervalle configuré
+            return min(
+                self._base_interval, max(self._base_interval / 2, MIN_SCAN_INTERVAL)
+            )
+
+        return self._base_interval
+
+    def _record_poll(self, now: datetime) -> None:
+        """Compte les rafraîchissements et les requêtes évitées sur la journée."""
+        today = now.date()
+        if self._day != today:
+            if self._day is not None:
+                self.saved_requests_yesterday = self.saved_requests_today
+                _LOGGER.debug(
+                    "Rafraîchissements évités hier: %s", self.saved_requests_yesterday
+                )
+            self._day = today
+            self._day_start = max(
+                dt_util.start_of_local_day(now), self._day_start or now
+            )
+            self.polls_today = 0
+
+        self.polls_today += 1
+        # Rafraîchissements qu'un intervalle fixe aurait effectués depuis le début du suivi
+        fixed_polls = (now - self._day_start) / self._base_interval + 1
+        self.saved_requests_today = max(int(fixed_polls) - self.polls_today, 0)
@@ -4,6 +4,7 @@ from __future__ import annotations
 from typing import Any
 
 from homeassistant.components.sensor import (
+    SensorDeviceClass,
     SensorEntity,
     SensorStateClass,
 )
@@ -14,8 +15,8 @@ from homeassistant.const import (
     UnitOfPower,
     UnitOfTime,
 )
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import DeviceInfo, EntityCategory
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import StateType
 from homeassistant.helpers.update_coordinator import (
@@ -23,7 +24,16 @@ from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
 )
 
-from .const import DOMAIN, SENSOR_TYPES
+from .coordinator import HypontechDataUpdateCoordinator
+from .descriptions import DEVICE_SENSOR_DESCRIPTIONS, SENSOR_DESCRIPTIONS
+from .devices import HypontechDeviceCoordinator
+
+from .const import (
+    CONF_ENERGY_STATE_CLASS,
+    DEFAULT_ENERGY_STATE_CLASS,
+    DIAGNOSTIC_SENSOR_TYPES,
+    DOMAIN,
+)
 
 
 async def async_setup_entry(
@@ -32,14 +42,52 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Configuration des capteurs Hypontech."""
-    coordinator: DataUpdateCoordinator = hass.data[DOMAIN][config_entry.entry_id]
+    coordinator: HypontechDataUpdateCoordinator = hass.data[DOMAIN][config_entry.entry_id]
 
     entities = []
-    for sensor_type in SENSOR_TYPES:
+    for sensor_type in SENSOR_DESCRIPTIONS:
         entities.append(HypontechSensor(coordinator, sensor_type, config_entry))
 
+    # Capteurs de diagnostic pour les fonctionnalités actives
+    for sensor_type in coordinator.diagnostics:
+        entities.append(HypontechDiagnosticSensor(coordinator, sensor_type, config_entry))
+
     async_add_entities(entities)
 
+    device_coordinator = coordinator.device_coordinator
+    if device_coordinator is None:
+        return
+
+    # Capteurs des onduleurs créés au fil de leur découverte
+    known_serials: set[str] = set()
+
+    @callback
+    def _async_add_devices() -> None:
+        """Ajoute les capteurs des onduleurs nouvellement découverts."""
+        new_serials = device_coordinator.devices.keys() - known_serials
+        if not new_serials:
+            return
+        known_serials.update(new_serials)
+        async_add_entities(
+            HypontechDeviceSensor(device_coordinator, serial, sensor_type, config_entry)
+            for serial in new_serials
+            for sensor_type in DEVICE_SENSOR_DESCRIPTIONS
+        )
+
+    _async_add_devices()
+    config_entry.async_on_unload(device_coordinator.async_add_listener(_async_add_devices))
+
+
+def _device_info(config_entry: ConfigEntry) -> DeviceInfo:
+    """Appareil regroupant les capteurs d'une installation."""
+    return DeviceInfo(
+        identifiers={(DOMAIN, config_entry.entry_id)},
+        name="Hypontech Solar",
+        manufacturer="Hypontech",
+        model="Solar Inverter",
+        configuration_url="https://hypon.cloud",
+    )
+
 
 class HypontechSensor(CoordinatorEntity, SensorEntity):
     """Représentation d'un capteur Hypontech."""
@@ -52,51 +100,149 @@ class HypontechSensor(CoordinatorEntity, SensorEntity):
     ) -> None:
         """Initialisation du capteur."""
         super().__init__(coordinator)
+        description = SENSOR_DESCRIPTIONS[sensor_type]
         self._sensor_type = sensor_type
         self._config_entry = config_entry
-        self._attr_name = f"Hypontech {SENSOR_TYPES[sensor_type]['name']}"
+        self._value_fn = description.value_fn
+        self._attr_name = f"Hypontech {description.name}"
         self._attr_unique_id = f"{config_entry.entry_id}_{sensor_type}"
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, config_entry.entry_id)},
-            name="Hypontech Solar",
-            manufacturer="Hypontech",
-            model="Solar Inverter",
-            configuration_url="https://hypon.cloud",
-        )
+        self._attr_native_unit_of_measurement = description.unit
+        self._attr_icon = description.icon
+        self._attr_device_class = description.device_class
+        self._attr_state_class = description.state_class
+        if description.device_class == SensorDeviceClass.ENERGY and not (
+            config_entry.options.get(CONF_ENERGY_STATE_CLASS, DEFAULT_ENERGY_STATE_CLASS)
+        ):
+            # Statistiques horaires importées par l'intégration: l'enregistreur
+            # ne compile plus de statistiques à partir de ces états
+            self._attr_state_class = None
+        self._attr_device_info = _device_info(config_entry)
+        self._written_status: tuple[bool, bool] | None = None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Écrit l'état seulement si la valeur, la disponibilité ou la fraîcheur a changé."""
+        status = (self.available, self.coordinator.stale)
+        if status == self._written_status and (
+            # Échec pendant la période de grâce: dernière valeur conservée
+            not self.coordinator.last_update_success
+            or self._sensor_type not in self.coordinator.changed_fields
+        ):
+            self.coordinator.skipped_writes += 1
+            return
+        self._written_status = status
+        super()._handle_coordinator_update()
 
     @property
     def native_value(self) -> StateType:
         """Retourne la valeur native du capteur."""
         if self.coordinator.data is None:
             return None
-        return self.coordinator.data.get(self._sensor_type, 0)
+        return self._value_fn(self.coordinator.data)
 
     @property
-    def native_unit_of_measurement(self) -> str | None:
-        """Retourne l'unité de mesure du capteur."""
-        return SENSOR_TYPES[self._sensor_type]["unit"]
+    def available(self) -> bool:
+        """Disponible tant que les dernières données sont dans la période de grâce."""
+        return self.coordinator.available
 
     @property
-    def icon(self) -> str | None:
-        """Retourne l'icône du capteur."""
-        return SENSOR_TYPES[self._sensor_type]["icon"]
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Signale les données restaurées en attente de confirmation par l'API."""
+        if not self.coordinator.stale:
+            return None
+        return {"stale": True, "data_timestamp": self.coordinator.data_timestamp}
+
+
+class HypontechDiagnosticSensor(CoordinatorEntity, SensorEntity):
+    """Capteur de diagnostic sur le fonctionnement de l'intégration."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        coordinator: HypontechDataUpdateCoordinator,
+        sensor_type: str,
+        config_entry: ConfigEntry,
+    ) -> None:
+        """Initialisation du capteur de diagnostic."""
+        super().__init__(coordinator)
+        description = DIAGNOSTIC_SENSOR_TYPES[sensor_type]
+        self._sensor_type = sensor_type
+        self._attr_name = f"Hypontech {description['name']}"
+        self._attr_unique_id = f"{config_entry.entry_id}_{sensor_type}"
+        self._attr_native_unit_of_measurement = description["unit"]
+        self._attr_icon = description["icon"]
+        if description["state_class"] == "measurement":
+            self._attr_state_class = SensorStateClass.MEASUREMENT
+        elif description["state_class"] == "total_increasing":
+            self._attr_state_class = SensorStateClass.TOTAL_INCREASING
+        if description.get("device_class"):
+            self._attr_device_class = SensorDeviceClass(description["device_class"])
+        self._attr_entity_registry_enabled_default = description.get("enabled", True)
+        self._attr_device_info = _device_info(config_entry)
+
+    @property
+    def native_value(self) -> StateType:
+        """Retourne la valeur du diagnostic."""
+        return self.coordinator.diagnostics.get(self._sensor_type)
 
     @property
-    def device_class(self) -> str | None:
-        """Retourne la classe du dispositif."""
-        return SENSOR_TYPES[self._sensor_type]["device_class"]
+    def available(self) -> bool:
+        """Disponible tant que les dernières données sont dans la période de grâce."""
+        return self.coordinator.available
+
+
+class HypontechDeviceSensor(CoordinatorEntity, SensorEntity):
+    """Capteur d'un onduleur de l'installation."""
+
+    def __init__(
+        self,
+        coordinator: HypontechDeviceCoordinator,
+        serial: str,
+        sensor_type: str,
+        config_entry: ConfigEntry,
+    ) -> None:
+        """Initialisation du capteur d'onduleur."""
+        super().__init__(coordinator)
+        description = DEVICE_SENSOR_DESCRIPTIONS[sensor_type]
+        device = coordinator.devices[serial]
+        self._serial = serial
+        self._value_fn = description.value_fn
+        self._attr_name = f"Hypontech {serial} {description.name}"
+        self._attr_unique_id = f"{config_entry.entry_id}_{serial}_{sensor_type}"
+        self._attr_native_unit_of_measurement = description.unit
+        self._attr_icon = description.icon
+        self._attr_device_class = description.device_class
+        self._attr_state_class = description.state_class
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, serial)},
+            name=device.get("name") or f"Hypontech {serial}",
+            manufacturer="Hypontech",
+            model=device.get("model") or "Solar Inverter",
+            via_device=(DOMAIN, config_entry.entry_id),
+        )
+        self._written_state: tuple[bool, StateType] | None = None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Écrit l'état seulement si la valeur ou la disponibilité a changé."""
+        state = (self.available, self.native_value)
+        if state == self._written_state:
+            return
+        self._written_state = state
+        super()._handle_coordinator_update()
 
     @property
-    def state_class(self) -> SensorStateClass | None:
-        """Retourne la classe d'état du capteur."""
-        state_class = SENSOR_TYPES[self._sensor_type]["state_class"]
-        if state_class == "total_increasing":
-            return SensorStateClass.TOTAL_INCREASING
-        elif state_class == "measurement":
-            return SensorStateClass.MEASUREMENT
-        return None
+    def native_value(self) -> StateType:
+        """Retourne la valeur du capteur d'onduleur."""
+        data = (self.coordinator.data or {}).get(self._serial)
+        if data is None:
+            return None
+        return self._value_fn(data)
 
     @property
     def available(self) -> bool:
-        """Retourne si le capteur est disponible."""
-        return self.coordinator.last_update_success 
\ No newline at end of file
+        """Disponible quand le lot de l'onduleur a répondu, ou pendant la période de grâce."""
+        return self.coordinator.available and self._serial in (
+            self.coordinator.data or {}
+        )
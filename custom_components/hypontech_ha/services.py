@@ -0,0 +1,190 @@
+"""Services de l'intégration Hypontech."""
+from __future__ import annotations
+
+import asyncio
+import logging
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    ATTR_CYCLES,
+    ATTR_DAYS,
+    ATTR_GRANULARITY,
+    ATTR_PERIOD,
+    CONF_PLANT_ID,
+    DEFAULT_PROFILE_CYCLES,
+    DOMAIN,
+    PROFILE_TIMEOUT,
+    SERVICE_BACKFILL,
+    SERVICE_GET_HISTORY,
+    SERVICE_PROFILE,
+)
+from .account import HypontechAccount
+from .coordinator import HypontechDataUpdateCoordinator
+from .exceptions import HypontechError
+from .history import HISTORY_PERIOD_FORMATS, async_get_history_cache, normalize_period
+from .profiler import HypontechProfiler
+
+_LOGGER = logging.getLogger(__name__)
+
+SERVICE_BACKFILL_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_PLANT_ID): cv.string,
+        vol.Optional(ATTR_DAYS): vol.All(vol.Coerce(int), vol.Range(min=1, max=3650)),
+    }
+)
+
+SERVICE_PROFILE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_PLANT_ID): cv.string,
+        vol.Optional(ATTR_CYCLES, default=DEFAULT_PROFILE_CYCLES): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=100)
+        ),
+    }
+)
+
+SERVICE_GET_HISTORY_SCHEMA = vol.Schema(
+    {
+        vol.Optional(CONF_PLANT_ID): cv.string,
+        vol.Required(ATTR_GRANULARITY): vol.In(list(HISTORY_PERIOD_FORMATS)),
+        vol.Optional(ATTR_PERIOD): cv.string,
+    }
+)
+
+
+@callback
+def _async_coordinators(
+    hass: HomeAssistant, plant_id: str | None
+) -> list[HypontechDataUpdateCoordinator]:
+    """Coordinateurs chargés, filtrés par installation."""
+    return [
+        coordinator
+        for coordinator in hass.data.get(DOMAIN, {}).values()
+        if isinstance(coordinator, HypontechDataUpdateCoordinator)
+        and (plant_id is None or coordinator.plant_id == plant_id)
+    ]
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Enregistre les services de l'intégration."""
+
+    async def _async_backfill(call: ServiceCall) -> None:
+        """Lance en arrière-plan l'import de l'historique des installations."""
+        coordinators = [
+            coordinator
+            for coordinator in _async_coordinators(hass, call.data.get(CONF_PLANT_ID))
+            if coordinator.backfill is not None
+        ]
+        if not coordinators:
+            raise HomeAssistantError(
+                "Aucune installation Hypontech avec l'enregistreur disponible"
+            )
+        for coordinator in coordinators:
+            coordinator.config_entry.async_create_background_task(
+                hass,
+                coordinator.backfill.async_run(call.data.get(ATTR_DAYS)),
+                f"{DOMAIN} backfill {coordinator.plant_id}",
+            )
+
+    async def _async_profile(call: ServiceCall) -> None:
+        """Profile les prochains cycles de rafraîchissement d'une installation."""
+        coordinators = _async_coordinators(hass, call.data.get(CONF_PLANT_ID))
+        if not coordinators:
+            raise HomeAssistantError("Aucune installation Hypontech chargée")
+        coordinator = coordinators[0]
+        api = coordinator.account.api
+        if api.profiler is not None:
+            raise HomeAssistantError("Un profilage est déjà en cours")
+        profiler = HypontechProfiler(coordinator.plant_id, call.data[ATTR_CYCLES])
+        api.profiler = profiler
+        profiler.start()
+        hass.async_create_background_task(
+            _async_run_profile(hass, coordinator, profiler),
+            f"{DOMAIN} profile {coordinator.plant_id}",
+        )
+
+    async def _async_get_history(call: ServiceCall) -> ServiceResponse:
+        """Retourne une série d'historique d'une installation."""
+        coordinators = [
+            coordinator
+            for coordinator in _async_coordinators(hass, call.data.get(CONF_PLANT_ID))
+            if isinstance(coordinator.account, HypontechAccount)
+        ]
+        if not coordinators:
+            raise HomeAssistantError(
+                "Aucune installation Hypontech chargée avec l'historique du cloud"
+            )
+        coordinator = coordinators[0]
+        granularity = call.data[ATTR_GRANULARITY]
+        try:
+            period = normalize_period(
+                granularity, call.data.get(ATTR_PERIOD), dt_util.now().date()
+            )
+        except ValueError as err:
+            raise HomeAssistantError(
+                f"Période invalide pour la granularité {granularity}: "
+                f"{call.data.get(ATTR_PERIOD)}"
+            ) from err
+        try:
+            records = await async_get_history_cache(hass).async_get(
+                coordinator.account, coordinator.plant_id, granularity, period
+            )
+        except HypontechError as err:
+            raise HomeAssistantError(f"Historique indisponible: {err}") from err
+        return {
+            CONF_PLANT_ID: coordinator.plant_id,
+            ATTR_GRANULARITY: granularity,
+            ATTR_PERIOD: period,
+            "records": records,
+        }
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_BACKFILL, _async_backfill, schema=SERVICE_BACKFILL_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_PROFILE, _async_profile, schema=SERVICE_PROFILE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_HISTORY,
+        _async_get_history,
+        schema=SERVICE_GET_HISTORY_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+async def _async_run_profile(
+    hass: HomeAssistant,
+    coordinator: HypontechDataUpdateCoordinator,
+    profiler: HypontechProfiler,
+) -> None:
+    """Attend la fin des cycles profilés et écrit le résultat."""
+    try:
+        await asyncio.wait_for(asyncio.shield(profiler.finished), PROFILE_TIMEOUT)
+    except asyncio.TimeoutError:
+        _LOGGER.warning(
+            "Profilage de %s interrompu après %s cycle(s)",
+            coordinator.plant_id,
+            profiler.completed,
+        )
+    finally:
+        profiler.stop()
+        coordinator.account.api.profiler = None
+
+    base_path = hass.config.path(
+        f"{DOMAIN}_profile_{dt_util.utcnow().strftime('%Y%m%d_%H%M%S')}"
+    )
+    path = await hass.async_add_executor_job(profiler.write, base_path)
+    _LOGGER.info("Profil de %s écrit dans %s", coordinator.plant_id, path)
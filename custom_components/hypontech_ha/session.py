@@ -0,0 +1,181 @@
+"""Session HTTP partagée pour l'intégration Hypontech."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    API_TIMEOUT,
+    DATA_SESSION,
+    DEFAULT_CONNECTOR_LIMIT,
+    DNS_CACHE_TTL,
+    DOMAIN,
+    KEEPALIVE_TIMEOUT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HypontechSessionManager:
+    """Pool de connexions HTTP partagé par toutes les entrées et le config flow.
+
+    La limite du connecteur plafonne les requêtes en cours pour toute
+    l'intégration; `in_flight` et `peak_in_flight` comptent les requêtes
+    émises et non terminées, y compris celles qui attendent une connexion.
+    """
+
+    def __init__(self, limit: int = DEFAULT_CONNECTOR_LIMIT) -> None:
+        """Initialisation du gestionnaire de session."""
+        self._limit = limit
+        self._session: aiohttp.ClientSession | None = None
+        # Sessions remplacées, fermées après leurs requêtes en cours
+        self._retired: set[aiohttp.ClientSession] = set()
+        self._users = 0
+        self.stats: dict[str, int] = {
+            "new_connections": 0,
+            "reused_connections": 0,
+            "in_flight": 0,
+            "peak_in_flight": 0,
+        }
+
+    @property
+    def limit(self) -> int:
+        """Limite du connecteur."""
+        return self._limit
+
+    def set_limit(self, limit: int) -> aiohttp.ClientSession | None:
+        """Change la limite du connecteur.
+
+        La limite d'un connecteur aiohttp est fixée à sa création: la session
+        ouverte est remplacée à la prochaine utilisation et retournée pour être
+        fermée par `async_close_retired`.
+        """
+        self._limit = limit
+        retired, self._session = self._session, None
+        if retired is None or retired.closed:
+            return None
+        self._retired.add(retired)
+        return retired
+
+    async def async_close_retired(self, session: aiohttp.ClientSession) -> None:
+        """Ferme une session remplacée une fois ses requêtes en cours terminées."""
+        await asyncio.sleep(API_TIMEOUT)
+        if session in self._retired:
+            self._retired.discard(session)
+            await session.close()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """Retourne la session partagée, créée à la première utilisation."""
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+        return self._session
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        """Crée une session avec keep-alive, cache DNS et suivi des connexions."""
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(self._on_connection_create)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reuse)
+        trace_config.on_request_start.append(self._on_request_start)
+        trace_config.on_request_end.append(self._on_request_done)
+        trace_config.on_request_exception.append(self._on_request_done)
+
+        connector = aiohttp.TCPConnector(
+            limit=self._limit,
+            use_dns_cache=True,
+            ttl_dns_cache=DNS_CACHE_TTL,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            enable_cleanup_closed=True,
+        )
+        _LOGGER.debug("Création de la session HTTP partagée (limite: %s)", self._limit)
+        return aiohttp.ClientSession(connector=connector, trace_configs=[trace_config])
+
+    async def _on_connection_create(self, session: Any, context: Any, params: Any) -> None:
+        """Compte les nouvelles connexions (handshake TCP/TLS effectué)."""
+        self.stats["new_connections"] += 1
+
+    async def _on_connection_reuse(self, session: Any, context: Any, params: Any) -> None:
+        """Compte les connexions réutilisées depuis le pool keep-alive."""
+        self.stats["reused_connections"] += 1
+
+    async def _on_request_start(self, session: Any, context: Any, params: Any) -> None:
+        """Compte une requête en cours et le pic de requêtes simultanées."""
+        self.stats["in_flight"] += 1
+        if self.stats["in_flight"] > self.stats["peak_in_flight"]:
+            self.stats["peak_in_flight"] = self.stats["in_flight"]
+
+    async def _on_request_done(self, session: Any, context: Any, params: Any) -> None:
+        """Décompte une requête terminée, avec ou sans réponse."""
+        self.stats["in_flight"] -= 1
+
+    async def async_close(self) -> None:
+        """Ferme la session et libère les sockets."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        for session in self._retired:
+            await session.close()
+        self._retired.clear()
+        _LOGGER.debug(
+            "Session HTTP fermée: %s nouvelles connexions, %s réutilisées",
+            self.stats["new_connections"],
+            self.stats["reused_connections"],
+        )
+
+
+@callback
+def async_acquire_session_manager(
+    hass: HomeAssistant, limit: int | None = None
+) -> HypontechSessionManager:
+    """Retourne le gestionnaire partagé et enregistre un utilisateur de plus.
+
+    La limite sert à la création du pool; pour un pool existant elle est
+    appliquée par `async_set_connector_limit`.
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    manager: HypontechSessionManager | None = domain_data.get(DATA_SESSION)
+    if manager is None:
+        manager = HypontechSessionManager(limit or DEFAULT_CONNECTOR_LIMIT)
+        domain_data[DATA_SESSION] = manager
+    manager._users += 1
+    return manager
+
+
+@callback
+def async_set_connector_limit(
+    hass: HomeAssistant, limit: int | None
+) -> aiohttp.ClientSession | None:
+    """Applique une nouvelle limite au pool existant.
+
+    Retourne la nouvelle session quand celle en cours a été remplacée: les
+    clients qui l'utilisaient doivent passer à la nouvelle.
+    """
+    manager: HypontechSessionManager | None = hass.data.get(DOMAIN, {}).get(
+        DATA_SESSION
+    )
+    if manager is None or limit is None or limit == manager.limit:
+        return None
+    _LOGGER.debug("Limite du connecteur HTTP: %s -> %s", manager.limit, limit)
+    if (retired := manager.set_limit(limit)) is None:
+        return None
+    hass.async_create_background_task(
+        manager.async_close_retired(retired), f"{DOMAIN} close retired session"
+    )
+    return manager.session
+
+
+async def async_release_session_manager(hass: HomeAssistant) -> None:
+    """Libère un utilisateur et ferme le pool quand plus personne ne l'utilise."""
+    domain_data = hass.data.get(DOMAIN, {})
+    manager: HypontechSessionManager | None = domain_data.get(DATA_SESSION)
+    if manager is None:
+        return
+    manager._users -= 1
+    if manager._users <= 0:
+        domain_data.pop(DATA_SESSION)
+        await manager.async_close()
@@ -0,0 +1,126 @@
+"""Répartition des rafraîchissements des entrées sur l'intervalle."""
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections.abc import AsyncIterator, Hashable
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    DATA_STAGGER,
+    DOMAIN,
+    STAGGER_JITTER_RATIO,
+    STAGGER_MAX_JITTER,
+    STARTUP_CONCURRENCY,
+)
+
+
+class RefreshStagger:
+    """Phases de rafraîchissement réparties entre les sources de données.
+
+    Chaque source (compte cloud ou onduleur local) occupe une position; les
+    positions sont réparties régulièrement sur l'intervalle. Les installations
+    d'un même compte partagent la position du compte et donc le même cycle.
+    Un léger décalage aléatoire borné, tiré une fois par source, évite que les
+    instants coïncident avec ceux d'autres clients du cloud. Au démarrage,
+    les premiers rafraîchissements (sans données restaurées) passent par
+    `async_startup_slot`, qui en limite le nombre simultané.
+    """
+
+    def __init__(
+        self, seed: int | None = None, startup_concurrency: int = STARTUP_CONCURRENCY
+    ) -> None:
+        """Initialisation du répartiteur."""
+        # Sources par ordre d'enregistrement et nombre d'entrées qui les utilisent
+        self._slots: dict[Hashable, int] = {}
+        # Décalage aléatoire de chaque source, fraction de la borne de décalage
+        self._jitters: dict[Hashable, float] = {}
+        self._random = random.Random(seed)
+        self._startup = asyncio.Semaphore(startup_concurrency)
+        # Source -> (acquisition de sa place de démarrage, entrées qui l'attendent)
+        self._starting: dict[Hashable, list[Any]] = {}
+
+    def register(self, key: Hashable) -> None:
+        """Ajoute une entrée utilisant la source `key`."""
+        self._slots[key] = self._slots.get(key, 0) + 1
+        self._jitters.setdefault(key, self._random.uniform(-1, 1))
+
+    def unregister(self, key: Hashable) -> None:
+        """Retire une entrée; la source libère sa position à la dernière."""
+        users = self._slots.pop(key, 0) - 1
+        if users > 0:
+            self._slots[key] = users
+        else:
+            self._jitters.pop(key, None)
+
+    @asynccontextmanager
+    async def async_startup_slot(self, key: Hashable) -> AsyncIterator[None]:
+        """Place de premier rafraîchissement de la source `key`.
+
+        Les entrées d'une même source partagent une place, pour que leurs
+        installations restent servies par un seul cycle du compte.
+        """
+        if (starting := self._starting.get(key)) is None:
+            starting = self._starting[key] = [
+                asyncio.ensure_future(self._startup.acquire()),
+                0,
+            ]
+        starting[1] += 1
+        try:
+            await asyncio.shield(starting[0])
+            yield
+        finally:
+            starting[1] -= 1
+            if starting[1] == 0:
+                del self._starting[key]
+                acquired = starting[0]
+                if acquired.done() and not acquired.cancelled():
+                    self._startup.release()
+                else:
+                    acquired.cancel()
+
+    def phase(self, key: Hashable, interval: float) -> float:
+        """Décalage de la source dans l'intervalle (secondes)."""
+        if key not in self._slots:
+            return 0.0
+        return list(self._slots).index(key) / len(self._slots) * interval
+
+    def _jitter(self, key: Hashable, interval: float) -> float:
+        """Décalage aléatoire borné de la source (secondes)."""
+        bound = min(interval * STAGGER_JITTER_RATIO, STAGGER_MAX_JITTER)
+        return self._jitters.get(key, 0.0) * bound
+
+    def initial_delay(self, key: Hashable, interval: timedelta) -> float:
+        """Attente avant le premier rafraîchissement de la source (secondes)."""
+        seconds = interval.total_seconds()
+        return max(self.phase(key, seconds) + self._jitter(key, seconds), 0.0)
+
+    def next_interval(self, key: Hashable, interval: timedelta) -> timedelta:
+        """Intervalle jusqu'au prochain instant de la phase de la source.
+
+        L'instant visé est celui de la phase le plus proche de `maintenant +
+        interval`, de sorte que l'écart entre deux rafraîchissements reste
+        compris entre la moitié et une fois et demie l'intervalle.
+        """
+        seconds = interval.total_seconds()
+        if seconds <= 0:
+            return interval
+        now = time.time()
+        target = now + seconds
+        offset = (target - self.phase(key, seconds) - self._jitter(key, seconds)) % seconds
+        aligned = target - offset if offset <= seconds / 2 else target - offset + seconds
+        return timedelta(seconds=max(aligned - now, seconds / 2))
+
+
+@callback
+def async_get_stagger(hass: HomeAssistant) -> RefreshStagger:
+    """Retourne le répartiteur partagé par toutes les entrées."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (stagger := domain_data.get(DATA_STAGGER)) is None:
+        stagger = domain_data[DATA_STAGGER] = RefreshStagger()
+    return stagger
@@ -0,0 +1,203 @@
+"""Gestion du cycle de vie du jeton d'authentification Hypontech."""
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from .const import TOKEN_EXPIRY_SAFETY, TOKEN_MIN_LIFETIME, TOKEN_REFRESH_MARGIN
+from .exceptions import HypontechError
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def _jwt_claims(token: str) -> dict[str, Any]:
+    """Décode (sans vérification) les claims d'un jeton JWT."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        claims = json.loads(base64.urlsafe_b64decode(payload))
+    except (IndexError, ValueError):
+        return {}
+    return claims if isinstance(claims, dict) else {}
+
+
+class HypontechTokenManager:
+    """Suivi de l'expiration du jeton et renouvellement anticipé.
+
+    L'expiration est lue dans les claims JWT quand elles sont présentes, sinon
+    apprise à partir de l'âge du jeton lors des 401 observés. Le jeton est
+    renouvelé en tâche de fond avant son expiration et persisté dans un `Store`
+    (si fourni) pour être réutilisé après un redémarrage.
+    """
+
+    def __init__(
+        self,
+        login_method: Callable[[], Awaitable[str | None]],
+        store: Any | None = None,
+    ) -> None:
+        """Initialisation du gestionnaire de jeton."""
+        self._login_method = login_method
+        self._store = store
+        self._lock = asyncio.Lock()
+        self._refresh_handle: asyncio.TimerHandle | None = None
+        self._refresh_task: asyncio.Task | None = None
+        self.token: str | None = None
+        self.issued_at: float | None = None
+        self.expires_at: float | None = None
+        self.learned_lifetime: float | None = None
+        self.login_count = 0
+
+    @property
+    def is_valid(self) -> bool:
+        """Indique si le jeton courant peut encore être utilisé."""
+        if self.token is None:
+            return False
+        return self.expires_at is None or time.time() < self.expires_at - TOKEN_EXPIRY_SAFETY
+
+    async def async_load(self) -> None:
+        """Restaure le jeton persisté lors d'une exécution précédente."""
+        if self._store is None:
+            return
+        data = await self._store.async_load()
+        if not data:
+            return
+        self.learned_lifetime = data.get("learned_lifetime")
+        self.token = data.get("token")
+        self.issued_at = data.get("issued_at")
+        self.expires_at = data.get("expires_at")
+        if self.is_valid:
+            _LOGGER.debug("Jeton restauré depuis le stockage")
+            self._schedule_refresh()
+        else:
+            self.token = None
+
+    async def async_get_token(self) -> str | None:
+        """Retourne un jeton valide, en s'authentifiant si nécessaire."""
+        if self.is_valid:
+            return self.token
+        async with self._lock:
+            # Un autre appel a pu s'authentifier pendant l'attente du verrou
+            if self.is_valid:
+                return self.token
+            return await self._async_login()
+
+    async def async_invalidate(self, token: str | None) -> str | None:
+        """Signale un jeton refusé (401) et le renouvelle une seule fois."""
+        async with self._lock:
+            if self.token is not None and self.token != token:
+                # Jeton déjà renouvelé par un appel concurrent
+                return self.token
+            if self.token is not None and self.issued_at is not None:
+                # Durée de vie apprise à partir de l'âge du jeton refusé
+                self.learned_lifetime = max(
+                    time.time() - self.issued_at, TOKEN_MIN_LIFETIME
+                )
+                _LOGGER.debug(
+                    "Durée de vie du jeton apprise: %.0f s", self.learned_lifetime
+                )
+            self.token = None
+            return await self._async_login()
+
+    async def async_login(self) -> str | None:
+        """Force une nouvelle authentification."""
+        async with self._lock:
+            return await self._async_login()
+
+    async def _async_login(self, keep_on_failure: bool = False) -> str | None:
+        """Authentifie le client et planifie le prochain renouvellement.
+
+        Les erreurs de `login_method` sont propagées; le jeton courant est
+        alors conservé.
+        """
+        self.login_count += 1
+        token = await self._login_method()
+        if token is None:
+            if not keep_on_failure:
+                self.token = None
+            return None
+
+        now = time.time()
+        self.token = token
+        self.issued_at = now
+        expires_at = _jwt_claims(token).get("exp")
+        if (
+            isinstance(expires_at, (int, float))
+            and expires_at - TOKEN_EXPIRY_SAFETY <= now
+        ):
+            # Jeton reçu déjà expiré d'après notre horloge (décalage d'horloge):
+            # le claim est ignoré, sinon chaque appel s'authentifierait à nouveau
+            _LOGGER.debug("Claim exp du jeton déjà échu, durée de vie inconnue")
+            expires_at = None
+        if expires_at is not None:
+            self.expires_at = float(expires_at)
+        elif self.learned_lifetime:
+            self.expires_at = now + self.learned_lifetime
+        else:
+            self.expires_at = None
+
+        if self._store is not None:
+            self._store.async_delay_save(self._data_to_save, 1)
+        self._schedule_refresh()
+        return token
+
+    def _data_to_save(self) -> dict[str, Any]:
+        """Données persistées dans le stockage."""
+        return {
+            "token": self.token,
+            "issued_at": self.issued_at,
+            "expires_at": self.expires_at,
+            "learned_lifetime": self.learned_lifetime,
+        }
+
+    def _schedule_refresh(self) -> None:
+        """Planifie le renouvellement anticipé du jeton."""
+        self._cancel_refresh()
+        if self.expires_at is None or self.issued_at is None:
+            return
+        lifetime = self.expires_at - self.issued_at
+        margin = min(TOKEN_REFRESH_MARGIN, lifetime / 10)
+        delay = self.expires_at - margin - time.time()
+        if delay <= 0:
+            # Échéance déjà dépassée: le prochain appel s'authentifie, un
+            # renouvellement immédiat en boucle est évité
+            return
+        loop = asyncio.get_running_loop()
+        self._refresh_handle = loop.call_later(delay, self._start_background_refresh)
+
+    def _start_background_refresh(self) -> None:
+        """Lance le renouvellement en tâche de fond."""
+        self._refresh_handle = None
+        self._refresh_task = asyncio.get_running_loop().create_task(
+            self._async_background_refresh()
+        )
+
+    async def _async_background_refresh(self) -> None:
+        """Renouvelle le jeton pendant que l'ancien est encore valide."""
+        async with self._lock:
+            _LOGGER.debug("Renouvellement anticipé du jeton")
+            # En cas d'échec l'ancien jeton reste utilisé jusqu'à son expiration
+            try:
+                await self._async_login(keep_on_failure=True)
+            except HypontechError as err:
+                _LOGGER.debug("Renouvellement anticipé du jeton impossible: %s", err)
+            except Exception:
+                # Tâche de fond: une erreur inattendue serait sinon perdue
+                _LOGGER.exception("Erreur inattendue lors du renouvellement du jeton")
+
+    def _cancel_refresh(self) -> None:
+        """Annule le renouvellement planifié."""
+        if self._refresh_handle is not None:
+            self._refresh_handle.cancel()
+            self._refresh_handle = None
+
+    def shutdown(self) -> None:
+        """Arrête toute activité en tâche de fond."""
+        self._cancel_refresh()
+        if self._refresh_task is not None and not self._refresh_task.done():
+            self._refresh_task.cancel()
+        self._refresh_task = None